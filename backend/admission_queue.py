@@ -0,0 +1,36 @@
+import itertools
+import threading
+
+
+class AdmissionQueue:
+    """等待 Flink slot 的任务队列：优先级高的先提交，优先级相同时先进入队列的先提交"""
+
+    def __init__(self):
+        self._entries = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def add(self, job_id, priority):
+        """加入队列，已在队列中时保持原来的位置"""
+        with self._lock:
+            if job_id not in self._entries:
+                self._entries[job_id] = (-priority, next(self._counter))
+
+    def remove(self, job_id):
+        """移出队列，返回任务之前是否在队列中"""
+        with self._lock:
+            return self._entries.pop(job_id, None) is not None
+
+    def ordered(self):
+        """按提交顺序返回队列中的任务 ID"""
+        with self._lock:
+            return [job_id for job_id, _ in sorted(self._entries.items(), key=lambda item: item[1])]
+
+    def position(self, job_id):
+        """任务在队列中的位置（从 1 开始），不在队列中时返回 None"""
+        ordered = self.ordered()
+        return ordered.index(job_id) + 1 if job_id in ordered else None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
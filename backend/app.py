@@ -1,14 +1,34 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
+import copy
+import math
 import os
+import queue
 import subprocess
+import threading
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
 from datetime import datetime, timezone, timedelta
 import pymysql
 import pymysql.cursors
 import re
+import signal
+import socket
 import requests
+from admission_queue import AdmissionQueue
+from backpressure import find_bottleneck, sink_backpressure
+from db_pool import ConnectionPool
+from flink_client import FlinkClient
+from job_logs import JobLogBuffer
+from job_metrics import JobMetricsBuffer
+from job_store import JobStore
+from health_check import HealthChecker
+from metadata_cache import MetadataCache
+from metrics import MetricsRegistry
+from table_planner import expand_tables, format_table_list, plan_table_groups
+from verifier import DataVerification, quote_identifier
 
 # 东八区时区（上海时区）
 TZ_SHANGHAI = timezone(timedelta(hours=8))
@@ -20,12 +40,105 @@ def get_shanghai_time():
 app = Flask(__name__)
 CORS(app)
 
-# 存储任务状态
+# 存储任务状态，key 为本地任务 ID
 jobs = {}
+jobs_lock = threading.Lock()
+# 任务状态或日志变化时通知等待中的 SSE / 长轮询连接
+jobs_changed = threading.Condition()
 
 # Flink 相关配置
 FLINK_HOME = os.getenv('FLINK_HOME', '/root/flink/flink-1.19.1')
 FLINK_REST_URL = os.getenv('FLINK_REST_URL', 'http://jobmanager:8081')
+FLINK_OMT_JAR = os.getenv('FLINK_OMT_JAR', f'{FLINK_HOME}/lib/flink-omt-flink_1.18-1.1.jar')
+FLINK_OMT_ENTRY_CLASS = 'com.oceanbase.omt.cli.CommandLineCliFront'
+
+# 任务提交方式：cli 直接使用 flink run；rest 通过 Flink REST jar API 提交（连不上 JobManager 时回退到 flink run），
+# 需要 JobManager 能读取到 FLINKOMT_CONFIG_DIR 中的配置文件，默认的 docker-compose 只把 /tmp 挂载到了后端容器
+FLINK_SUBMIT_MODES = ('cli', 'rest')
+FLINK_SUBMIT_MODE = os.getenv('FLINK_SUBMIT_MODE', 'cli')
+if FLINK_SUBMIT_MODE not in FLINK_SUBMIT_MODES:
+    raise ValueError(f'FLINK_SUBMIT_MODE 必须是 {" / ".join(FLINK_SUBMIT_MODES)}，当前为 {FLINK_SUBMIT_MODE}')
+# FlinkOMT YAML 配置文件目录，REST 方式提交时 JobManager 需要能读取到该目录
+FLINKOMT_CONFIG_DIR = os.getenv('FLINKOMT_CONFIG_DIR', '/tmp')
+
+# 任务提交线程池：同时运行的 flink run 进程数和排队等待提交的任务上限
+FLINK_SUBMIT_WORKERS = int(os.getenv('FLINK_SUBMIT_WORKERS', '2'))
+FLINK_SUBMIT_QUEUE_SIZE = int(os.getenv('FLINK_SUBMIT_QUEUE_SIZE', '20'))
+# 每个任务最多保留的日志条数
+JOB_LOG_MAX_ENTRIES = int(os.getenv('JOB_LOG_MAX_ENTRIES', '500'))
+
+# 持久化任务注册表（SQLite），多个后端进程共享同一个文件
+JOB_STORE_PATH = os.getenv('JOB_STORE_PATH', '/tmp/flinkomt_jobs.db')
+# 持有任务的进程超过该时间没有心跳，其他进程可以接管该任务，单位秒
+JOB_OWNER_TIMEOUT = int(os.getenv('JOB_OWNER_TIMEOUT', '30'))
+# 当前进程的标识，用于区分任务由哪个进程负责提交和监控
+WORKER_ID = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+job_store = JobStore(JOB_STORE_PATH, JOB_LOG_MAX_ENTRIES)
+submit_executor = ThreadPoolExecutor(max_workers=FLINK_SUBMIT_WORKERS, thread_name_prefix='flink-submit')
+
+# Flink REST API 客户端：共用长连接，GET 请求失败时重试
+flink_client = FlinkClient(
+    FLINK_REST_URL,
+    connect_timeout=float(os.getenv('FLINK_CONNECT_TIMEOUT', '3')),
+    read_timeout=float(os.getenv('FLINK_READ_TIMEOUT', '10')),
+    get_retries=int(os.getenv('FLINK_GET_RETRIES', '2')),
+    retry_backoff=float(os.getenv('FLINK_RETRY_BACKOFF', '0.2')),
+    pool_size=int(os.getenv('FLINK_HTTP_POOL_SIZE', '10'))
+)
+
+# 数据库连接池配置
+db_pool = ConnectionPool(
+    max_size=int(os.getenv('DB_POOL_MAX_SIZE', '8')),
+    idle_timeout=int(os.getenv('DB_POOL_IDLE_TIMEOUT', '300')),
+    acquire_timeout=int(os.getenv('DB_POOL_ACQUIRE_TIMEOUT', '10'))
+)
+
+# Prometheus 指标，通过 /metrics 输出
+metrics_registry = MetricsRegistry()
+HTTP_REQUEST_DURATION = metrics_registry.histogram(
+    'flinkomt_http_request_duration_seconds', '接口请求处理耗时（流式接口只统计到开始返回响应）',
+    ('method', 'route', 'status'))
+OUTBOUND_REQUESTS = metrics_registry.counter(
+    'flinkomt_outbound_requests_total', '对 Flink、StarRocks、OceanBase 的调用次数',
+    ('target', 'operation', 'outcome'))
+OUTBOUND_DURATION = metrics_registry.histogram(
+    'flinkomt_outbound_request_duration_seconds', '对 Flink、StarRocks、OceanBase 的调用耗时',
+    ('target', 'operation'))
+JOB_SUBMIT_DURATION = metrics_registry.histogram(
+    'flinkomt_job_submit_duration_seconds', '提交任务到 Flink 的耗时（rest 为 /jars/run，cli 为 flink run 进程）',
+    ('mode', 'outcome'))
+JOBS_BY_STATUS = metrics_registry.gauge(
+    'flinkomt_jobs', '注册表中各状态的任务数', ('status',))
+SUBMIT_QUEUE_LENGTH = metrics_registry.gauge(
+    'flinkomt_submit_queue_length', '当前进程等待提交的任务数')
+ADMISSION_QUEUE_LENGTH = metrics_registry.gauge(
+    'flinkomt_admission_queue_length', '当前进程等待 Flink 空闲 slot 的任务数')
+DB_POOL_CONNECTIONS = metrics_registry.gauge(
+    'flinkomt_db_pool_connections', '连接池中的连接数', ('engine', 'host', 'port', 'state'))
+DB_POOL_EVENTS = metrics_registry.counter(
+    'flinkomt_db_pool_events_total', '连接池累计新建、复用、回收连接和等待连接的次数', ('engine', 'host', 'port', 'event'))
+
+@contextmanager
+def track_outbound(target, operation):
+    """记录一次对 Flink / StarRocks / OceanBase 的调用次数和耗时，可以在 with 块中修改 call['outcome']"""
+    call = {'outcome': 'success'}
+    start = time.perf_counter()
+    try:
+        yield call
+    except Exception:
+        call['outcome'] = 'error'
+        raise
+    finally:
+        OUTBOUND_DURATION.observe(time.perf_counter() - start, target=target, operation=operation)
+        OUTBOUND_REQUESTS.inc(target=target, operation=operation, outcome=call['outcome'])
+
+def flink_request(method, path, operation, **kwargs):
+    """请求 Flink REST API 并记录调用指标，operation 为不含 Job ID 的调用名称"""
+    with track_outbound('flink', operation) as call:
+        response = flink_client.request(method, path, **kwargs)
+        if response.status_code >= 400:
+            call['outcome'] = f'http_{response.status_code // 100}xx'
+        return response
 
 def extract_flink_job_id(output):
     """从 Flink 命令输出中提取 Job ID"""
@@ -45,316 +158,2168 @@ def extract_flink_job_id(output):
     
     return None
 
-def generate_flinkomt_config(config):
-    """生成 FlinkOMT 配置文件"""
-    starrocks = config['starrocks']
-    oceanbase = config['oceanbase']
-    flinkomt = config['flinkOMT']
+def sink_database(config):
+    """同步到 OceanBase 的目标库（oceanbase.targetDatabase），未指定时为 test
+
+    oceanbase.database 只是连接时的默认库（SQL 控制台、健康检查和元数据接口使用），不影响同步的目标库
+    """
+    return (config.get('oceanbase') or {}).get('targetDatabase') or 'test'
+
+# StarRocks 读取参数：配置字段 -> (FlinkOMT 配置项, 默认值, 最小值, 最大值)
+# 默认值为 None 的参数只在填写时写入配置，未填写时使用连接器默认值；scan.max-retries 与之前的版本一样总是写入
+STARROCKS_SCAN_OPTIONS = {
+    'scanMaxRetries': ('scan.max-retries', 1, 0, 10),
+    'scanConnectTimeout': ('scan.connect.timeout-ms', None, 100, 600000),
+    'scanBatchRows': ('scan.params.batch-rows', None, 1, 1000000),
+    'scanKeepAliveMin': ('scan.params.keep-alive-min', None, 1, 1440),
+    'scanQueryTimeout': ('scan.params.query-timeout-s', None, 1, 86400),
+    'scanMemLimit': ('scan.params.mem-limit-byte', None, 64 * 1024 ** 2, 64 * 1024 ** 3),
+    'tabletsPerTask': ('scan.params.tablets-per-task', None, 1, 10000)
+}
+
+def starrocks_scan_urls(starrocks):
+    """StarRocks FE 的 HTTP 地址列表：scanUrls 可以是列表或逗号分隔的 host:port，未填写时使用 host 和 scanPort"""
+    scan_urls = starrocks.get('scanUrls')
+    if isinstance(scan_urls, str):
+        scan_urls = scan_urls.split(',')
+    scan_urls = [str(url).strip() for url in scan_urls or [] if str(url).strip()]
+    if not scan_urls:
+        scan_urls = [f"{starrocks.get('host', '127.0.0.1')}:{starrocks.get('scanPort', '8030')}"]
+    return scan_urls
+
+def validate_starrocks_source(starrocks):
+    """检查 StarRocks FE 地址和读取参数，不合法时抛出 ValueError"""
+    for url in starrocks_scan_urls(starrocks):
+        match = re.fullmatch(r'([A-Za-z0-9._-]+):(\d{1,5})', url)
+        if not match or not 0 < int(match.group(2)) <= 65535:
+            raise ValueError(f'starrocks.scanUrls 中的地址 {url} 格式错误，应为 host:port')
+    for field, (_, _, minimum, maximum) in STARROCKS_SCAN_OPTIONS.items():
+        value = starrocks.get(field)
+        if value in (None, ''):
+            continue
+        try:
+            number = int(value)
+        except (TypeError, ValueError):
+            number = None
+        if number is None or not minimum <= number <= maximum:
+            raise ValueError(f'starrocks.{field} 必须是 {minimum} 到 {maximum} 之间的整数，当前为 {value}')
+
+def starrocks_source_options(starrocks):
+    """生成 source 配置块中的读取参数，返回 YAML 行"""
+    lines = []
+    for field, (key, default, _, _) in STARROCKS_SCAN_OPTIONS.items():
+        value = starrocks.get(field)
+        value = default if value in (None, '') else int(value)
+        if value is not None:
+            lines.append(f'{key}: {value}')
+    return lines
+
+# OceanBase 写入参数：配置字段 -> (FlinkOMT 配置项, 最小值, 最大值)，未填写的使用连接器默认值
+OCEANBASE_WRITE_MODES = ('jdbc', 'direct-load')
+OCEANBASE_JDBC_OPTIONS = {
+    'bufferSize': ('buffer-flush.buffer-size', 1, 1000000),
+    'bufferFlushInterval': ('buffer-flush.interval', 100, 600000),
+    'maxRetries': ('max-retries', 0, 20)
+}
+# 旁路导入（direct-load）直接写 OBServer 的 RPC 端口，适合首次全量同步
+OCEANBASE_DIRECT_LOAD_OPTIONS = {
+    'rpcPort': ('port', 1, 65535),
+    'directLoadParallel': ('parallel', 1, 128),
+    'bufferSize': ('buffer-size', 1, 1000000),
+    'maxErrorRows': ('max-error-rows', 0, 2 ** 31 - 1)
+}
+OCEANBASE_DUP_ACTIONS = ('REPLACE', 'IGNORE', 'STOP_ON_DUP')
+OCEANBASE_LOAD_METHODS = ('full', 'inc', 'inc_replace')
+
+def oceanbase_tenant(oceanbase):
+    """旁路导入使用的租户名：优先使用 tenantName，否则从 user@tenant#cluster 格式的用户名中解析"""
+    if oceanbase.get('tenantName'):
+        return oceanbase['tenantName']
+    match = re.match(r'^[^@#]+@([^@#]+)', oceanbase.get('username') or '')
+    return match.group(1) if match else None
+
+def validate_oceanbase_sink(oceanbase):
+    """检查 OceanBase 目标库和写入参数，不合法时抛出 ValueError"""
+    database = oceanbase.get('targetDatabase')
+    if database and not re.fullmatch(r'[A-Za-z0-9_$]{1,64}', str(database)):
+        raise ValueError(f'oceanbase.targetDatabase 只能包含字母、数字、下划线和 $，当前为 {database}')
+    write_mode = oceanbase.get('writeMode') or 'jdbc'
+    if write_mode not in OCEANBASE_WRITE_MODES:
+        raise ValueError(f'oceanbase.writeMode 必须是 {" / ".join(OCEANBASE_WRITE_MODES)}，当前为 {write_mode}')
+    
+    options = OCEANBASE_DIRECT_LOAD_OPTIONS if write_mode == 'direct-load' else OCEANBASE_JDBC_OPTIONS
+    for field, (_, minimum, maximum) in options.items():
+        value = oceanbase.get(field)
+        if value in (None, ''):
+            continue
+        try:
+            number = int(value)
+        except (TypeError, ValueError):
+            number = None
+        if number is None or not minimum <= number <= maximum:
+            raise ValueError(f'oceanbase.{field} 必须是 {minimum} 到 {maximum} 之间的整数，当前为 {value}')
+    
+    if write_mode == 'direct-load':
+        if not oceanbase_tenant(oceanbase):
+            raise ValueError('旁路导入需要租户名，请填写 oceanbase.tenantName 或使用 user@tenant 格式的用户名')
+        if oceanbase.get('dupAction') and oceanbase['dupAction'] not in OCEANBASE_DUP_ACTIONS:
+            raise ValueError(f'oceanbase.dupAction 必须是 {" / ".join(OCEANBASE_DUP_ACTIONS)}')
+        if oceanbase.get('loadMethod') and oceanbase['loadMethod'] not in OCEANBASE_LOAD_METHODS:
+            raise ValueError(f'oceanbase.loadMethod 必须是 {" / ".join(OCEANBASE_LOAD_METHODS)}')
+
+def validate_submit_mode(value):
+    """检查 flinkOMT.submitMode 是 cli 或 rest，不合法时抛出 ValueError"""
+    if value not in (None, '') and value not in FLINK_SUBMIT_MODES:
+        raise ValueError(f'flinkOMT.submitMode 必须是 {" / ".join(FLINK_SUBMIT_MODES)}，当前为 {value}')
+
+def validate_job_config(config):
+    """提交任务前检查配置，不合法时抛出 ValueError"""
+    validate_parallelism((config.get('flinkOMT') or {}).get('parallelism', '1'))
+    validate_priority((config.get('flinkOMT') or {}).get('priority'))
+    validate_submit_mode((config.get('flinkOMT') or {}).get('submitMode'))
+    validate_starrocks_source(config.get('starrocks') or {})
+    validate_oceanbase_sink(config.get('oceanbase') or {})
+
+def oceanbase_sink_options(oceanbase):
+    """生成 oceanbase 配置块中的写入参数，返回 YAML 行"""
+    lines = []
+    if (oceanbase.get('writeMode') or 'jdbc') == 'direct-load':
+        lines.append('type: direct-load')
+        lines.append(f"host: {oceanbase.get('host', '127.0.0.1')}")
+        lines.append(f'tenant-name: {oceanbase_tenant(oceanbase)}')
+        if not oceanbase.get('rpcPort'):
+            lines.append('port: 2882')
+        options = OCEANBASE_DIRECT_LOAD_OPTIONS
+        lines.append(f"dup-action: {oceanbase.get('dupAction') or 'REPLACE'}")
+        lines.append(f"load-method: {oceanbase.get('loadMethod') or 'full'}")
+    else:
+        options = OCEANBASE_JDBC_OPTIONS
+    for field, (key, _, _) in options.items():
+        value = oceanbase.get(field)
+        if value in (None, ''):
+            continue
+        # 刷新间隔以毫秒填写
+        lines.append(f'{key}: {int(value)}ms' if field == 'bufferFlushInterval' else f'{key}: {int(value)}')
+    return lines
+
+def generate_flinkomt_config(config):
+    """生成 FlinkOMT 配置文件"""
+    starrocks = config['starrocks']
+    oceanbase = config['oceanbase']
+    flinkomt = config['flinkOMT']
+    
+    
+    # 构建 StarRocks JDBC URL
+    starrocks_jdbc_url = f"jdbc:mysql://{starrocks.get('host', '127.0.0.1')}:{starrocks.get('port', '9030')}/sys"
+    
+    # 构建 StarRocks Scan URL (FE 端口，通常是 8030)，多个 FE 时扫描请求分散到各个 FE
+    scan_url = ','.join(starrocks_scan_urls(starrocks))
+    source_options = ''.join(f'  {line}\n' for line in starrocks_source_options(starrocks))
+    tables = starrocks.get('tables', '')
+    
+    
+    # 构建 OceanBase JDBC URL
+    oceanbase_url = f"jdbc:mysql://{oceanbase.get('host', '127.0.0.1')}:{oceanbase.get('port', '2881')}/{sink_database(config)}"
+    sink_options = ''.join(f'  {line}\n' for line in oceanbase_sink_options(oceanbase))
+    
+    # FlinkOMT YAML 配置
+    yaml_content = f"""
+source:
+  type: starrocks
+  jdbc-url: {starrocks_jdbc_url}
+  username: {starrocks.get('username', 'root')}
+  password: {starrocks.get('password', '')}
+  scan-url: {scan_url}
+{source_options}  tables: {tables}
+
+oceanbase:
+  url: {oceanbase_url}
+  username: {oceanbase.get('username', 'root@test')}
+  password: {oceanbase.get('password', '')}
+  schema-name: {sink_database(config)}
+{sink_options}
+pipeline:
+  name: {flinkomt.get('jobName') or 'Sync StarRocks Database to OceanBase'}
+  parallelism: {flinkomt.get('parallelism', '2')}
+"""
+    return yaml_content
+
+# 只在后端本地维护、不需要查询 Flink 的任务状态
+LOCAL_JOB_STATES = ('QUEUED', 'SUBMITTING', 'FAILED', 'CANCELED')
+FLINK_TERMINAL_STATES = ('FINISHED', 'FAILED', 'CANCELED')
+# 只在内存中使用、不写入注册表的字段
+RUNTIME_JOB_FIELDS = ('process', 'future', 'logs', 'metrics')
+
+def persist_job(job):
+    """把任务写入持久化注册表，只有持有该任务的进程会写入"""
+    if job.get('owner') != WORKER_ID:
+        return
+    if job['status'] in FLINK_TERMINAL_STATES and not job.get('end_time'):
+        job['end_time'] = job.get('last_update') or get_shanghai_time().isoformat()
+    record = {key: value for key, value in job.items()
+              if key not in RUNTIME_JOB_FIELDS and not key.startswith('_')}
+    record['owner_heartbeat'] = time.time()
+    try:
+        job_store.save_job(record)
+        if job.get('_persisted_status') != job['status']:
+            job_store.record_transition(job['job_id'], job['status'], job.get('last_update'))
+            job['_persisted_status'] = job['status']
+    except Exception as e:
+        print(f'保存任务 {job["job_id"]} 失败: {str(e)}')
+
+def persist_job_log(job, entry):
+    """把一条日志写入持久化注册表"""
+    if job.get('owner') != WORKER_ID:
+        return
+    try:
+        job_store.save_log(job['job_id'], entry)
+    except Exception as e:
+        print(f'保存任务 {job["job_id"]} 日志失败: {str(e)}')
+
+def load_job_record(record):
+    """把注册表中的记录还原为任务字典，日志从注册表恢复"""
+    job = dict(record)
+    logs = JobLogBuffer(JOB_LOG_MAX_ENTRIES)
+    logs.restore(job_store.fetch_logs(record['job_id']))
+    job['logs'] = logs
+    job['process'] = None
+    job['_persisted_status'] = record['status']
+    return job
+
+def adopt_job(record):
+    """接管注册表中的任务，由当前进程负责监控和写入"""
+    record = dict(record, owner=WORKER_ID)
+    job = load_job_record(record)
+    with jobs_lock:
+        job = jobs.setdefault(job['job_id'], job)
+    persist_job(job)
+    return job
+
+def find_job(job_id, adopt=False):
+    """按本地任务 ID 查找任务，兼容使用 Flink Job ID 查找
+
+    当前进程没有该任务时从注册表加载：adopt=True 时接管持有进程已经没有心跳的任务（用于停止等写操作），
+    其他情况返回只读快照
+    """
+    job = jobs.get(job_id)
+    if job:
+        return job
+    with jobs_lock:
+        for candidate in jobs.values():
+            if candidate.get('flink_job_id') == job_id:
+                return candidate
+    
+    record = job_store.load_job(job_id)
+    if not record:
+        return None
+    if adopt:
+        # 持有进程还在运行时不能接管，否则它之后写入的状态和 Flink Job ID 都会被丢弃
+        now = time.time()
+        if job_store.claim_job(record['job_id'], WORKER_ID, now, stale_before=now - JOB_OWNER_TIMEOUT):
+            return adopt_job(record)
+    return load_job_record(record)
+
+def is_local_job(job):
+    """任务是否由当前进程持有（在内存中实时更新）"""
+    return jobs.get(job['job_id']) is job
+
+def notify_job_changed(job):
+    """任务状态或日志变化后递增版本号并写入注册表，唤醒等待推送的连接"""
+    with jobs_changed:
+        job['version'] = job.get('version', 0) + 1
+        jobs_changed.notify_all()
+    persist_job(job)
+
+def wait_for_job_change(job, version, timeout):
+    """等待任务版本号超过 version，超时返回 False"""
+    with jobs_changed:
+        return jobs_changed.wait_for(lambda: job.get('version', 0) > version, timeout)
+
+def wait_for_job_update(job, version, timeout):
+    """等待任务版本号超过 version，返回 (是否变化, 最新的任务)
+
+    当前进程持有的任务通过条件变量等待；其他进程持有的任务每秒从注册表读取一次
+    """
+    if is_local_job(job):
+        return wait_for_job_change(job, version, timeout), job
+    deadline = time.monotonic() + timeout
+    while True:
+        record = job_store.load_job(job['job_id'])
+        if record and record.get('version', 0) > version:
+            return True, load_job_record(record)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False, job
+        time.sleep(min(1, remaining))
+
+def append_job_log(job, message, collapse=False):
+    """追加任务日志并更新最后更新时间
+
+    collapse=True 时与上一条相同的日志（如心跳、重复的错误）合并为一条并累加计数，
+    合并不算新日志，不会唤醒推送连接
+    """
+    now = get_shanghai_time().isoformat()
+    entry = job['logs'].append(message, now, collapse=collapse)
+    job['last_update'] = now
+    persist_job_log(job, entry)
+    if entry['count'] == 1:
+        notify_job_changed(job)
+
+def set_job_status(job, status, message=None):
+    """更新任务状态，可同时追加一条日志"""
+    job['status'] = status
+    job['last_status'] = status
+    job['last_update'] = get_shanghai_time().isoformat()
+    if message:
+        persist_job_log(job, job['logs'].append(message, job['last_update']))
+    notify_job_changed(job)
+
+def build_flink_command(job):
+    """构建 FlinkOMT 启动命令"""
+    flinkomt = job['config']['flinkOMT']
+    
+    # 转换 checkpointInterval 从毫秒到秒
+    checkpoint_interval_ms = int(flinkomt.get('checkpointInterval', '10000'))
+    checkpoint_interval_sec = checkpoint_interval_ms // 1000
+    parallelism = flinkomt.get('parallelism', '1')
+    
+    return [
+        f'{FLINK_HOME}/bin/flink',
+        'run',
+        '-m', 'jobmanager:8081',
+        '-d',  # 后台运行
+        '-D', f'execution.checkpointing.interval={checkpoint_interval_sec}s',
+        '-D', f'parallelism.default={parallelism}',
+        # 从 savepoint 恢复时继续之前的同步进度
+        *(['-s', job['resume_from']] if job.get('resume_from') else []),
+        '-c', FLINK_OMT_ENTRY_CLASS,
+        FLINK_OMT_JAR,
+        '-config', job['config_file'],
+        '--skip-confirm'
+    ]
+
+# flink run 的输出：最多等待多久出现 Job ID，最多写入任务日志多少行，每行最多保留多少字符
+FLINK_CLI_SUBMIT_TIMEOUT = int(os.getenv('FLINK_CLI_SUBMIT_TIMEOUT', '30'))
+FLINK_CLI_LOG_MAX_LINES = int(os.getenv('FLINK_CLI_LOG_MAX_LINES', '200'))
+FLINK_CLI_LINE_MAX_CHARS = 1000
+# 出现这些输出时提交已经失败，不再等待进程退出
+FLINK_CLI_ERRORS = (
+    (re.compile(r'java\.net\.ConnectException|Connection refused'), '无法连接 JobManager'),
+    (re.compile(r'NoResourceAvailableException|Could not acquire the minimum required resources'),
+     'Flink 集群没有足够的 slot'),
+    (re.compile(r'ClassNotFoundException|NoClassDefFoundError'), '缺少依赖的类，请检查 FlinkOMT jar 和连接器 jar'),
+    (re.compile(r'JAR file does not exist|Could not build the program from JAR file'), 'FlinkOMT jar 不存在或无法加载'),
+    (re.compile(r'ProgramInvocationException'), 'FlinkOMT 程序执行出错')
+)
+
+def _pump_cli_output(job, process, lines):
+    """后台线程：逐行读取 flink run 的输出写入任务日志，并转发给提交线程，进程退出后放入 None"""
+    count = 0
+    for line in process.stdout:
+        line = line.rstrip()
+        if not line:
+            continue
+        count += 1
+        if count <= FLINK_CLI_LOG_MAX_LINES:
+            append_job_log(job, f'[flink run] {line[:FLINK_CLI_LINE_MAX_CHARS]}')
+        lines.put(line)
+    if count > FLINK_CLI_LOG_MAX_LINES:
+        append_job_log(job, f'[flink run] 另有 {count - FLINK_CLI_LOG_MAX_LINES} 行输出未写入日志')
+    process.wait()
+    lines.put(None)
+    if job.get('process') is process:
+        job['process'] = None
+
+def _kill_cli_process(process):
+    """终止 flink run 及其启动的子进程（flink 脚本启动的 java 进程和 flink run 在同一个进程组中）"""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        process.kill()
+
+def submit_job_with_cli(job):
+    """通过 flink run 提交任务，返回 Flink Job ID（未提取到时返回 None）
+
+    逐行读取输出，出现 Job ID 时立即返回，剩余的输出由后台线程继续写入日志；
+    出现已知的提交错误时终止进程并抛出异常
+    """
+    process = subprocess.Popen(
+        build_flink_command(job),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1,
+        start_new_session=True
+    )
+    job['process'] = process
+    lines = queue.Queue()
+    threading.Thread(target=_pump_cli_output, args=(job, process, lines), daemon=True).start()
+    
+    deadline = time.monotonic() + FLINK_CLI_SUBMIT_TIMEOUT
+    while True:
+        remaining = deadline - time.monotonic()
+        try:
+            line = lines.get(timeout=max(remaining, 0))
+        except queue.Empty:
+            _kill_cli_process(process)
+            append_job_log(job, f'flink run 超过 {FLINK_CLI_SUBMIT_TIMEOUT} 秒没有输出 Job ID，已终止提交进程')
+            return None
+        if line is None:
+            append_job_log(job, f'flink run 已退出（退出码 {process.returncode}），没有输出 Job ID')
+            return None
+        
+        flink_job_id = extract_flink_job_id(line)
+        if flink_job_id:
+            return flink_job_id
+        for pattern, reason in FLINK_CLI_ERRORS:
+            if pattern.search(line):
+                _kill_cli_process(process)
+                raise Exception(f'{reason}: {line[:FLINK_CLI_LINE_MAX_CHARS]}')
+
+class FlinkRestSubmitError(Exception):
+    """通过 REST jar API 提交失败；fallback 为 True 时请求没有到达 /jars/run，可以改用 flink run 重试"""
+
+    def __init__(self, message, fallback=True):
+        super().__init__(message)
+        self.fallback = fallback
+
+# 已上传到 JobManager 的 FlinkOMT jar id 缓存
+flink_jar_cache = {'jar_id': None}
+flink_jar_lock = threading.Lock()
+
+def _flink_rest_error(response):
+    """从 Flink REST API 的错误响应中提取错误信息"""
+    error_msg = f'HTTP {response.status_code}'
+    try:
+        errors = response.json().get('errors', [])
+        if errors:
+            error_msg += f' - {errors[0] if isinstance(errors, list) else errors}'
+    except ValueError:
+        error_msg += f' - {response.text[:200]}'
+    return error_msg
+
+def get_flink_jar_id(refresh=False):
+    """获取 FlinkOMT jar 在 JobManager 上的 jar id，没有时上传一次并缓存"""
+    with flink_jar_lock:
+        if flink_jar_cache['jar_id'] and not refresh:
+            return flink_jar_cache['jar_id']
+        
+        jar_name = os.path.basename(FLINK_OMT_JAR)
+        try:
+            # 先查找 JobManager 上已经上传过的同名 jar，避免后端重启后重复上传
+            response = flink_request('GET', '/jars', 'jars_list', timeout=10)
+            if response.status_code == 200:
+                for jar in response.json().get('files', []):
+                    if jar.get('name') == jar_name:
+                        flink_jar_cache['jar_id'] = jar['id']
+                        return jar['id']
+            
+            with open(FLINK_OMT_JAR, 'rb') as f:
+                response = flink_request(
+                    'POST', '/jars/upload', 'jar_upload',
+                    files={'jarfile': (jar_name, f, 'application/x-java-archive')},
+                    timeout=120
+                )
+        except (OSError, requests.exceptions.RequestException) as e:
+            raise FlinkRestSubmitError(f'上传 FlinkOMT jar 失败: {str(e)}')
+        
+        if response.status_code != 200:
+            raise FlinkRestSubmitError(f'上传 FlinkOMT jar 失败: {_flink_rest_error(response)}')
+        
+        # 返回的 filename 是 JobManager 上的完整路径，文件名即 jar id
+        jar_id = os.path.basename(response.json()['filename'])
+        flink_jar_cache['jar_id'] = jar_id
+        return jar_id
+
+def submit_job_with_rest(job):
+    """通过 Flink REST jar API 提交任务，返回 Flink Job ID"""
+    flinkomt = job['config']['flinkOMT']
+    checkpoint_interval_sec = int(flinkomt.get('checkpointInterval', '10000')) // 1000
+    body = {
+        'entryClass': FLINK_OMT_ENTRY_CLASS,
+        'programArgsList': ['-config', job['config_file'], '--skip-confirm'],
+        'parallelism': int(flinkomt.get('parallelism', '1')),
+        'flinkConfiguration': {
+            'execution.checkpointing.interval': f'{checkpoint_interval_sec}s'
+        }
+    }
+    if job.get('resume_from'):
+        body['savepointPath'] = job['resume_from']
+    
+    jar_id = get_flink_jar_id()
+    for attempt in range(2):
+        try:
+            response = flink_request('POST', f'/jars/{jar_id}/run', 'jar_run', json=body, timeout=120)
+        except requests.exceptions.ConnectionError as e:
+            # 没有连上 JobManager，main 方法不可能已经执行，可以改用 flink run
+            raise FlinkRestSubmitError(f'调用 /jars/run 失败: {str(e)}')
+        except requests.exceptions.Timeout:
+            # 请求已经发出，任务可能已经在运行，不能再用 flink run 重复提交
+            raise FlinkRestSubmitError('调用 /jars/run 超时，任务可能仍在提交中', fallback=False)
+        except requests.exceptions.RequestException as e:
+            raise FlinkRestSubmitError(f'调用 /jars/run 失败: {str(e)}', fallback=False)
+        
+        if response.status_code == 404 and attempt == 0:
+            # JobManager 重启后缓存的 jar 已不存在，重新上传
+            jar_id = get_flink_jar_id(refresh=True)
+            continue
+        break
+    
+    if response.status_code != 200:
+        # JobManager 已经处理了请求，main 方法可能已经执行并提交了任务，不回退到 flink run
+        raise FlinkRestSubmitError(f'调用 /jars/run 失败: {_flink_rest_error(response)}', fallback=False)
+    
+    return response.json().get('jobid')
+
+def _timed_submit(mode, submit_func, job):
+    """执行一次提交并记录耗时"""
+    start = time.perf_counter()
+    outcome = 'error'
+    try:
+        flink_job_id = submit_func(job)
+        outcome = 'success' if flink_job_id else 'no_job_id'
+        return flink_job_id
+    finally:
+        JOB_SUBMIT_DURATION.observe(time.perf_counter() - start, mode=mode, outcome=outcome)
+
+def submit_job(job):
+    """按配置的提交方式提交任务，REST 方式在请求到达 /jars/run 之前失败时回退到 flink run"""
+    submit_mode = job['config']['flinkOMT'].get('submitMode') or FLINK_SUBMIT_MODE
+    if submit_mode == 'rest':
+        try:
+            flink_job_id = _timed_submit('rest', submit_job_with_rest, job)
+            append_job_log(job, '已通过 Flink REST API 提交任务')
+            return flink_job_id
+        except FlinkRestSubmitError as e:
+            if not e.fallback:
+                raise
+            append_job_log(job, f'{str(e)}，改用 flink run 提交')
+    return _timed_submit('cli', submit_job_with_cli, job)
+
+# 自动并行度：flinkOMT.parallelism 为 auto 时，提交前根据源表数据量和 Flink 空闲 slot 数确定并行度
+AUTO_PARALLELISM_BYTES_PER_SLOT = int(os.getenv('AUTO_PARALLELISM_BYTES_PER_SLOT', str(1024 ** 3)))
+AUTO_PARALLELISM_ROWS_PER_SLOT = int(os.getenv('AUTO_PARALLELISM_ROWS_PER_SLOT', '5000000'))
+AUTO_PARALLELISM_MAX = int(os.getenv('AUTO_PARALLELISM_MAX', '32'))
+# 读取不到源表大小时使用的保守并行度，不按空闲 slot 数占满集群
+AUTO_PARALLELISM_DEFAULT = int(os.getenv('AUTO_PARALLELISM_DEFAULT', '1'))
+# 正在提交的任务在 Flink 中还不存在，/overview 的空闲 slot 数中没有扣除它们，需要为它们预留；
+# 拿到 Job ID 之后 Flink 已经开始为任务申请 slot，不再预留，避免重复扣除
+SLOT_PENDING_STATES = ('SUBMITTING',)
+auto_parallelism_lock = threading.Lock()
+
+def validate_parallelism(value):
+    """检查 flinkOMT.parallelism 是正整数或 auto，不合法时抛出 ValueError"""
+    if str(value).strip().lower() == 'auto':
+        return
+    try:
+        parallelism = int(value)
+    except (TypeError, ValueError):
+        parallelism = 0
+    if parallelism <= 0:
+        raise ValueError(f'flinkOMT.parallelism 必须是正整数或 auto，当前为 {value}')
+
+def is_auto_parallelism(config):
+    return str(config['flinkOMT'].get('parallelism', '1')).strip().lower() == 'auto'
+
+def format_size(size):
+    """把字节数转换为便于阅读的格式"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024:
+            return f'{size:.1f} {unit}' if unit != 'B' else f'{size} B'
+        size /= 1024
+    return f'{size:.1f} TB'
+
+def fetch_free_slots():
+    """从 Flink /overview 读取空闲 slot 数和 slot 总数"""
+    response = flink_request('GET', '/overview', 'cluster_overview', timeout=5)
+    if response.status_code != 200:
+        raise Exception(_flink_rest_error(response))
+    overview = response.json()
+    return overview.get('slots-available', 0), overview.get('slots-total', 0)
+
+def required_slots(job):
+    """任务需要的 slot 数；auto 并行度在提交时按空闲 slot 确定，至少需要 1 个"""
+    if is_auto_parallelism(job['config']):
+        return 1
+    return int(job['config']['flinkOMT'].get('parallelism', '1'))
+
+def reserved_slots(exclude_job):
+    """当前进程中已准入或正在提交、Flink 还没有为其分配 slot 的任务将要占用的 slot 数"""
+    with jobs_lock:
+        pending = [job for job in jobs.values() if job is not exclude_job and (
+            job['status'] in SLOT_PENDING_STATES or (job['status'] == 'QUEUED' and job.get('admitted')))]
+    return sum(required_slots(job) for job in pending)
+
+def choose_auto_parallelism(job):
+    """根据源表数据量和空闲 slot 数确定并行度，返回 (并行度, 原因)
+
+    按数据量需要的并行度不超过空闲 slot 数，避免申请不到 slot 导致任务一直停留在 CREATED；
+    读取不到源表大小时使用 AUTO_PARALLELISM_DEFAULT，结果不超过 AUTO_PARALLELISM_MAX
+    """
+    starrocks = job['config']['starrocks']
+    reasons = []
+    wanted = None
+    try:
+        connection = get_starrocks_connection(starrocks)
+        try:
+            tables = expand_tables(connection, starrocks.get('tables', ''))
+        finally:
+            connection.close()
+        data_size = sum(t['dataSize'] for t in tables)
+        rows = sum(t['rows'] for t in tables)
+        if data_size:
+            wanted = math.ceil(data_size / AUTO_PARALLELISM_BYTES_PER_SLOT)
+            reasons.append(f'{len(tables)} 张表共 {format_size(data_size)}，'
+                           f'按每个并行度 {format_size(AUTO_PARALLELISM_BYTES_PER_SLOT)} 需要 {wanted}')
+        elif rows:
+            wanted = math.ceil(rows / AUTO_PARALLELISM_ROWS_PER_SLOT)
+            reasons.append(f'{len(tables)} 张表共约 {rows} 行（没有数据大小统计），'
+                           f'按每个并行度 {AUTO_PARALLELISM_ROWS_PER_SLOT} 行需要 {wanted}')
+        else:
+            reasons.append(f'{len(tables)} 张表没有行数和数据大小统计')
+    except Exception as e:
+        reasons.append(f'读取源表大小失败: {str(e)}')
+    
+    available = None
+    try:
+        free, total = fetch_free_slots()
+        reserved = reserved_slots(job)
+        available = max(0, free - reserved)
+        reasons.append(f'Flink 集群共 {total} 个 slot，空闲 {free} 个'
+                       + (f'，其中 {reserved} 个预留给正在提交的任务' if reserved else ''))
+    except Exception as e:
+        reasons.append(f'读取 Flink 空闲 slot 失败: {str(e)}')
+    
+    if wanted is None:
+        wanted = AUTO_PARALLELISM_DEFAULT
+        reasons.append(f'使用默认并行度 {wanted}')
+    if available is None:
+        parallelism = wanted
+    elif available == 0:
+        parallelism = 1
+        reasons.append('当前没有空闲 slot，任务需要等待其他任务释放 slot')
+    else:
+        parallelism = min(wanted, available)
+    if parallelism > AUTO_PARALLELISM_MAX:
+        parallelism = AUTO_PARALLELISM_MAX
+        reasons.append(f'不超过自动并行度上限 {AUTO_PARALLELISM_MAX}')
+    parallelism = max(1, parallelism)
+    return parallelism, f'自动并行度为 {parallelism}：{"；".join(reasons)}'
+
+def resolve_auto_parallelism(job):
+    """parallelism 为 auto 时确定实际并行度，写回任务配置并重新生成配置文件"""
+    with auto_parallelism_lock:
+        parallelism, reason = choose_auto_parallelism(job)
+        job['config']['flinkOMT']['parallelism'] = str(parallelism)
+    with open(job['config_file'], 'w', encoding='utf-8') as f:
+        f.write(generate_flinkomt_config(job['config']))
+    append_job_log(job, reason)
+
+def _run_job_submission(job_id):
+    """后台线程：提交任务到 Flink 集群，并更新任务状态"""
+    job = jobs[job_id]
+    if job['status'] != 'QUEUED':
+        # 排队期间已被取消
+        return
+    
+    set_job_status(job, 'SUBMITTING', '正在提交任务到 Flink 集群...')
+    try:
+        if is_auto_parallelism(job['config']):
+            resolve_auto_parallelism(job)
+        flink_job_id = submit_job(job)
+    except Exception as e:
+        set_job_status(job, 'FAILED', f'任务提交时出错: {str(e)}')
+        return
+    
+    if not flink_job_id:
+        set_job_status(job, 'FAILED', '任务提交失败，未获取到 Flink Job ID')
+        return
+    
+    job['flink_job_id'] = flink_job_id
+    set_job_status(job, 'SUBMITTED', f'任务已提交，Job ID: {flink_job_id}')
+    
+    if job.get('cancel_requested'):
+        # 提交过程中用户请求了停止，拿到 Job ID 后立即取消
+        request_job_cancel(job)
+
+def resolve_resume_from(value):
+    """resumeFrom 可以是 savepoint 路径，也可以是已通过 savepoint 停止的任务 ID，返回 savepoint 路径"""
+    value = str(value).strip()
+    previous = find_job(value)
+    if previous:
+        if previous.get('savepoint_path'):
+            return previous['savepoint_path']
+        if previous['status'] == 'CANCELLING':
+            raise ValueError(f'任务 {value} 的 savepoint 尚未完成，请稍后重试')
+        raise ValueError(f'任务 {value} 没有 savepoint，请先以 savepoint 方式停止该任务')
+    if '://' not in value and not value.startswith('/'):
+        raise ValueError(f'resumeFrom 既不是任务 ID，也不是 savepoint 路径: {value}')
+    return value
+
+def queued_job_count():
+    """当前进程已放入提交线程池、等待提交的任务数（不包括等待 slot 的任务）"""
+    with jobs_lock:
+        return sum(1 for job in jobs.values() if job['status'] == 'QUEUED' and job.get('admitted'))
+
+def waiting_job_count():
+    """当前进程在准入队列中等待 Flink 空闲 slot 的任务数"""
+    with jobs_lock:
+        return sum(1 for job in jobs.values() if job['status'] == 'QUEUED' and not job.get('admitted'))
+
+def check_submit_capacity(count=1):
+    """再提交 count 个任务时队列是否放得下，放不下时返回错误信息
+
+    开启准入控制时新任务先在准入队列中等待 slot，按 SLOT_ADMISSION_QUEUE_SIZE 限制；
+    否则直接进入提交线程池，按 FLINK_SUBMIT_QUEUE_SIZE 限制
+    """
+    if SLOT_ADMISSION_ENABLED:
+        queued, limit, waiting_for = waiting_job_count(), SLOT_ADMISSION_QUEUE_SIZE, '等待空闲 slot'
+    else:
+        queued, limit, waiting_for = queued_job_count(), FLINK_SUBMIT_QUEUE_SIZE, '等待提交'
+    if queued + count <= limit:
+        return None
+    if count == 1:
+        return f'提交队列已满（{queued} 个任务{waiting_for}），请稍后重试'
+    return f'提交队列剩余空间不足（{queued} 个任务{waiting_for}，需要再提交 {count} 个），请稍后重试'
+
+# 准入控制：Flink 空闲 slot 放得下任务的并行度时才提交，放不下的任务按优先级排队，
+# 有任务结束释放 slot 后自动提交。每个后端进程只调度自己持有的任务
+SLOT_ADMISSION_ENABLED = os.getenv('SLOT_ADMISSION_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+SLOT_ADMISSION_INTERVAL = float(os.getenv('SLOT_ADMISSION_INTERVAL', '5'))
+# 等待 slot 的任务上限，与提交线程池的排队上限分开计算
+SLOT_ADMISSION_QUEUE_SIZE = int(os.getenv('SLOT_ADMISSION_QUEUE_SIZE', '200'))
+JOB_PRIORITY_DEFAULT = 5
+admission_queue = AdmissionQueue()
+admission_wakeup = threading.Event()
+admission_scheduler = {'thread': None, 'last_check': None, 'error': None}
+admission_scheduler_lock = threading.Lock()
+
+def validate_priority(value):
+    """检查 flinkOMT.priority 是 0 到 9 的整数，不合法时抛出 ValueError"""
+    if value in (None, ''):
+        return
+    try:
+        priority = int(value)
+    except (TypeError, ValueError):
+        priority = -1
+    if not 0 <= priority <= 9:
+        raise ValueError(f'flinkOMT.priority 必须是 0 到 9 之间的整数，当前为 {value}')
+
+def job_priority(config):
+    """任务优先级，数字越大越先提交"""
+    priority = (config.get('flinkOMT') or {}).get('priority')
+    return JOB_PRIORITY_DEFAULT if priority in (None, '') else int(priority)
+
+def admit_job(job):
+    """任务放入提交线程池"""
+    job['admitted'] = True
+    job['queue_position'] = None
+    job['waiting_reason'] = None
+    job['future'] = submit_executor.submit(_run_job_submission, job['job_id'])
+
+def enqueue_job(job):
+    """任务进入提交队列：开启准入控制时先在等待队列中等待 slot"""
+    if not SLOT_ADMISSION_ENABLED:
+        admit_job(job)
+        return
+    job['admitted'] = False
+    admission_queue.add(job['job_id'], job_priority(job['config']))
+    ensure_admission_scheduler()
+    admission_wakeup.set()
+
+def update_waiting_job(job, position, reason):
+    """更新等待中任务的队列位置和原因，有变化时通知推送连接"""
+    if job.get('queue_position') == position and job.get('waiting_reason') == reason:
+        return
+    first_wait = job.get('waiting_reason') is None
+    job['queue_position'] = position
+    job['waiting_reason'] = reason
+    if first_wait:
+        append_job_log(job, f'{reason}，任务在等待队列中排第 {position} 位')
+    else:
+        notify_job_changed(job)
+
+def admit_waiting_jobs_once():
+    """按优先级提交放得下的任务
+
+    队首的任务放不下时，后面的任务即使放得下也继续等待，避免并行度大的任务一直等不到 slot。
+    slot 总数为 0 时集群按需启动 TaskManager（YARN / Kubernetes），无法按空闲 slot 判断，直接按顺序提交；
+    并行度超过当前 slot 总数的任务要等集群扩容，不阻塞后面的任务
+    """
+    waiting = []
+    for job_id in admission_queue.ordered():
+        job = jobs.get(job_id)
+        if not job or job['status'] != 'QUEUED':
+            # 已取消或已被其他进程接管
+            admission_queue.remove(job_id)
+            continue
+        waiting.append(job)
+    if not waiting:
+        return
+    
+    try:
+        free, total = fetch_free_slots()
+    except Exception as e:
+        admission_scheduler['error'] = f'读取 Flink 空闲 slot 失败: {str(e)}'
+        for position, job in enumerate(waiting, 1):
+            update_waiting_job(job, position, f'无法读取 Flink 空闲 slot（{str(e)}）')
+        return
+    admission_scheduler['error'] = None
+    
+    if total == 0:
+        for job in waiting:
+            admission_queue.remove(job['job_id'])
+            if job.get('waiting_reason'):
+                append_job_log(job, 'Flink 集群当前没有 TaskManager，由集群按需申请 slot，开始提交')
+            admit_job(job)
+        return
+    
+    available = free - reserved_slots(None)
+    blocked = False
+    position = 0
+    for job in waiting:
+        required = required_slots(job)
+        if required > total:
+            position += 1
+            update_waiting_job(job, position, f'任务并行度 {required} 超过 Flink 集群当前的 slot 总数 {total}，'
+                                              f'等待集群扩容，或停止任务后减小并行度重新提交')
+            continue
+        if not blocked and required <= available:
+            admission_queue.remove(job['job_id'])
+            available -= required
+            if job.get('waiting_reason'):
+                append_job_log(job, f'已有 {required} 个空闲 slot，开始提交')
+            admit_job(job)
+            continue
+        
+        blocked = True
+        position += 1
+        if required > available:
+            reason = f'等待空闲 slot：需要 {required} 个，当前可用 {max(available, 0)} 个（共 {total} 个）'
+        else:
+            reason = f'等待优先级更高的任务先提交（需要 {required} 个 slot）'
+        update_waiting_job(job, position, reason)
+
+def _run_admission_scheduler():
+    """后台线程：有任务进入队列、任务结束或每隔 SLOT_ADMISSION_INTERVAL 秒检查一次等待队列"""
+    while True:
+        admission_wakeup.wait(SLOT_ADMISSION_INTERVAL)
+        admission_wakeup.clear()
+        try:
+            admit_waiting_jobs_once()
+        except Exception as e:
+            admission_scheduler['error'] = f'准入调度错误: {str(e)}'
+        admission_scheduler['last_check'] = get_shanghai_time().isoformat()
+
+def ensure_admission_scheduler():
+    """启动准入调度线程（每个进程只启动一个）"""
+    with admission_scheduler_lock:
+        if admission_scheduler['thread'] is None:
+            admission_scheduler['thread'] = threading.Thread(target=_run_admission_scheduler, daemon=True)
+            admission_scheduler['thread'].start()
+
+def create_job(config, **fields):
+    """生成配置文件、登记任务并放入提交队列，fields 为额外保存到任务中的字段"""
+    job_id = str(uuid.uuid4())
+    print('job_id: ', job_id)
+    
+    # 生成 FlinkOMT YAML 配置文件
+    yaml_content = generate_flinkomt_config(config)
+    config_file = os.path.join(FLINKOMT_CONFIG_DIR, f'flinkomt_{job_id}.yaml')
+    
+    with open(config_file, 'w', encoding='utf-8') as f:
+        f.write(yaml_content)
+    
+    logs = JobLogBuffer(JOB_LOG_MAX_ENTRIES)
+    first_log = logs.append('任务已进入提交队列', get_shanghai_time().isoformat())
+    
+    # 初始化任务状态，'process' 只在 flink run 执行期间保存
+    job = {
+        'job_id': job_id,
+        'flink_job_id': None,
+        'owner': WORKER_ID,
+        'version': 0,
+        'status': 'QUEUED',
+        'config': config,
+        'config_file': config_file,
+        'process': None,
+        'logs': logs,
+        'last_status': 'QUEUED',  # 记录上次的状态，用于避免重复添加状态日志
+        'start_time': get_shanghai_time().isoformat(),
+        'last_update': get_shanghai_time().isoformat(),
+        **fields
+    }
+    with jobs_lock:
+        jobs[job_id] = job
+    persist_job(job)
+    persist_job_log(job, first_log)
+    enqueue_job(job)
+    ensure_flink_poller()
+    return job
+
+@app.route('/api/start-job', methods=['POST'])
+def start_job():
+    """启动 FlinkOMT 任务（立即返回本地任务 ID，由后台线程提交到 Flink）"""
+    try:
+        config = request.json
+        # resumeFrom 不属于同步配置，单独保存在任务中
+        resume_from = config.pop('resumeFrom', None)
+        try:
+            validate_job_config(config)
+            if resume_from:
+                resume_from = resolve_resume_from(resume_from)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        capacity_error = check_submit_capacity()
+        if capacity_error:
+            return jsonify({'error': capacity_error}), 429
+        
+        job = create_job(config, resume_from=resume_from)
+        job_id = job['job_id']
+        logs = ['任务已进入提交队列']
+        if resume_from:
+            logs.append(f'将从 savepoint 恢复: {resume_from}')
+            append_job_log(job, logs[-1])
+        
+        return jsonify({
+            'jobId': job_id,
+            'flinkJobId': None,
+            'status': job['status'],
+            'logs': logs,
+            'lastUpdate': get_shanghai_time().isoformat()  # 返回东八区时间戳
+        }), 202
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Flink 任务状态快照，由后台轮询线程统一刷新，key 为 Flink Job ID
+flink_job_states = {}
+flink_poller = {'thread': None, 'last_poll': None, 'error': None}
+flink_poller_lock = threading.Lock()
+FLINK_POLL_INTERVAL = float(os.getenv('FLINK_POLL_INTERVAL', '2'))
+
+def apply_flink_job_state(job, state):
+    """根据 Flink 返回的状态更新任务，并在需要时追加状态日志"""
+    previous_status = job.get('last_status', '')
+    changed = state != job['status']
+    
+    # 更新状态
+    job['status'] = state
+    job['flink_state'] = flink_job_states.get(job.get('flink_job_id'))
+    
+    # 对于 RUNNING 状态，每次轮询都记录心跳，连续的心跳合并为一条并累加计数
+    if state == 'RUNNING':
+        job['last_status'] = state
+        append_job_log(job, '任务正在运行中...', collapse=True)
+    # 对于其他状态，只在状态变化时添加日志
+    elif state != previous_status:
+        job['last_status'] = state
+        if state == 'FINISHED' and job.get('stop_with_savepoint'):
+            # stop-with-savepoint 停止的任务在 Flink 中也是 FINISHED
+            append_job_log(job, '任务已停止（已保存 savepoint）')
+        elif state == 'FINISHED':
+            append_job_log(job, '任务已完成！')
+        elif state == 'FAILED':
+            append_job_log(job, '任务执行失败')
+        elif state == 'CANCELED':
+            append_job_log(job, '任务已取消')
+    job['last_update'] = get_shanghai_time().isoformat()
+    if changed:
+        notify_job_changed(job)
+        if state in FLINK_TERMINAL_STATES and len(admission_queue):
+            # 任务结束释放了 slot，立即检查等待队列
+            admission_wakeup.set()
+
+# 任务连续多少轮不在 /jobs/overview 中时标记为 NO_JOB
+JOB_MISSING_POLLS = 3
+
+def poll_flink_jobs_once():
+    """调用一次 /jobs/overview，刷新所有被跟踪任务的状态"""
+    with jobs_lock:
+        tracked = [job for job in jobs.values()
+                   if job.get('flink_job_id') and job['status'] not in FLINK_TERMINAL_STATES]
+    if not tracked:
+        return
+    
+    try:
+        response = flink_request('GET', '/jobs/overview', 'jobs_overview', timeout=5)
+        if response.status_code != 200:
+            raise Exception(f'Flink REST API 返回错误状态码: {response.status_code}')
+        overview = response.json().get('jobs', [])
+    except Exception as e:
+        error_msg = f'监控错误: {str(e)}'
+        flink_poller['error'] = error_msg
+        for job in tracked:
+            # 相同的错误日志合并为一条
+            append_job_log(job, error_msg, collapse=True)
+        return
+    
+    snapshot = {}
+    for item in overview:
+        snapshot[item['jid']] = {
+            'state': item.get('state', 'UNKNOWN'),
+            'name': item.get('name'),
+            'startTime': item.get('start-time'),
+            'endTime': item.get('end-time'),
+            'duration': item.get('duration'),
+            'lastModification': item.get('last-modification'),
+            'tasks': item.get('tasks', {})
+        }
+    flink_job_states.update(snapshot)
+    flink_poller['last_poll'] = get_shanghai_time().isoformat()
+    flink_poller['error'] = None
+    
+    for job in tracked:
+        info = snapshot.get(job['flink_job_id'])
+        if not info:
+            # 连续几轮都找不到的任务（JobManager 重启或任务记录已过期）标记为无任务在执行
+            job['missing_polls'] = job.get('missing_polls', 0) + 1
+            if job['missing_polls'] >= JOB_MISSING_POLLS and job['status'] not in ('NO_JOB', 'CANCELLING'):
+                set_job_status(job, 'NO_JOB', 'Flink 集群中已找不到该任务（可能 JobManager 已重启或任务记录已过期）')
+            continue
+        job['missing_polls'] = 0
+        # 取消中的任务在 Flink 进入终止状态前保持 CANCELLING
+        if job['status'] == 'CANCELLING' and info['state'] not in FLINK_TERMINAL_STATES:
+            continue
+        apply_flink_job_state(job, info['state'])
+
+# 每隔多少轮检查一次是否有其他进程遗留的任务需要接管
+JOB_CLAIM_EVERY_POLLS = 5
+
+def sync_job_ownership():
+    """刷新当前进程持有任务的心跳，丢弃已被其他进程接管的任务，并执行转发过来的停止请求"""
+    with jobs_lock:
+        job_ids = [job_id for job_id, job in jobs.items() if job['status'] not in FLINK_TERMINAL_STATES]
+    if not job_ids:
+        return
+    owned = job_store.heartbeat(WORKER_ID, time.time(), job_ids)
+    with jobs_lock:
+        for job_id in set(job_ids) - owned:
+            jobs.pop(job_id, None)
+    
+    # 执行其他进程转发过来的停止请求
+    for cancel in job_store.take_cancel_requests(owned):
+        job = jobs.get(cancel['job_id'])
+        if job:
+            append_job_log(job, '收到其他后端进程转发的停止请求')
+            request_job_cancel(job, cancel['savepoint'], cancel['target_directory'])
+
+def reconcile_adopted_job(job, overview):
+    """接管其他进程遗留的任务后，根据 Flink 集群中的实际情况修正任务状态"""
+    status = job['status']
+    if not job.get('flink_job_id'):
+        if status == 'QUEUED':
+            # 还没开始提交，重新生成配置文件并放回提交队列
+            with open(job['config_file'], 'w', encoding='utf-8') as f:
+                f.write(generate_flinkomt_config(job['config']))
+            append_job_log(job, '后端进程已重启，任务重新进入提交队列')
+            job['waiting_reason'] = None
+            enqueue_job(job)
+        elif status == 'SUBMITTING':
+            set_job_status(job, 'FAILED', '后端进程在提交任务时退出，无法确认任务是否已提交，请检查 Flink 集群后重新提交')
+        return
+    
+    info = overview.get(job['flink_job_id'])
+    if info is None:
+        set_job_status(job, 'FAILED', 'Flink 集群中已找不到该任务（可能 JobManager 已重启或任务记录已过期）')
+    elif status == 'CANCELLING' and info['state'] not in FLINK_TERMINAL_STATES:
+        if job.get('stop_with_savepoint'):
+            # 已触发的 savepoint 继续等待结果，还没触发时重新触发
+            cancel_executor.submit(_confirm_job_stop, job, info['state'], FLINK_SAVEPOINT_DIR)
+        else:
+            # 取消请求可能没有发出，重新发起取消
+            cancel_executor.submit(_confirm_job_cancel, job, info['state'])
+    else:
+        apply_flink_job_state(job, info['state'])
+
+def claim_orphaned_jobs():
+    """接管心跳超时（所在进程已退出）的未结束任务，并与 Flink 集群对账"""
+    now = time.time()
+    orphaned = []
+    for record in job_store.list_jobs(exclude_statuses=FLINK_TERMINAL_STATES):
+        if record['job_id'] in jobs:
+            continue
+        if job_store.claim_job(record['job_id'], WORKER_ID, now, stale_before=now - JOB_OWNER_TIMEOUT):
+            orphaned.append(adopt_job(record))
+    if not orphaned:
+        return
+    
+    overview = {}
+    if any(job.get('flink_job_id') for job in orphaned):
+        response = flink_request('GET', '/jobs/overview', 'jobs_overview', timeout=5)
+        if response.status_code != 200:
+            raise Exception(f'Flink REST API 返回错误状态码: {response.status_code}')
+        overview = {item['jid']: item for item in response.json().get('jobs', [])}
+    for job in orphaned:
+        append_job_log(job, f'任务已由后端进程 {WORKER_ID} 接管')
+        reconcile_adopted_job(job, overview)
+
+def _run_flink_poller():
+    """后台线程：按固定间隔轮询 Flink 集群，启动时先与注册表对账"""
+    polls = 0
+    while True:
+        try:
+            if polls % JOB_CLAIM_EVERY_POLLS == 0:
+                # 顺便回收空闲超时的数据库连接，不用等到下次从同一个分组获取连接
+                db_pool.evict_idle()
+                claim_orphaned_jobs()
+            sync_job_ownership()
+            poll_flink_jobs_once()
+        except Exception as e:
+            flink_poller['error'] = f'监控错误: {str(e)}'
+        polls += 1
+        time.sleep(FLINK_POLL_INTERVAL)
+
+def ensure_flink_poller():
+    """启动 Flink 状态轮询线程（每个进程只启动一个）"""
+    with flink_poller_lock:
+        if flink_poller['thread'] is None:
+            flink_poller['thread'] = threading.Thread(target=_run_flink_poller, daemon=True)
+            flink_poller['thread'].start()
+    ensure_job_metrics_collector()
+
+@app.route('/api/job-status/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """获取任务状态（从后台轮询维护的内存快照中读取，不直接请求 Flink 集群）
+
+    长轮询：传入 ?version=<上次返回的 version>&wait=<秒> 时，
+    在任务没有变化的情况下最多等待 wait 秒再返回
+    """
+    job = find_job(job_id)
+    if not job:
+        return jsonify({'error': '任务不存在'}), 404
+    
+    ensure_flink_poller()
+    
+    if request.args.get('wait') and request.args.get('version') is not None:
+        try:
+            wait = min(float(request.args['wait']), JOB_EVENTS_MAX_WAIT)
+            version = int(request.args['version'])
+        except ValueError:
+            return jsonify({'error': 'wait 和 version 必须是数字'}), 400
+        if job['status'] not in JOB_EVENTS_END_STATES:
+            _, job = wait_for_job_update(job, version, wait)
+    
+    # 提交成功但没有 Flink Job ID，返回无任务在执行
+    if job['status'] not in LOCAL_JOB_STATES and not job.get('flink_job_id'):
+        previous_status = job.get('last_status', '')
+        if previous_status != 'NO_JOB':
+            set_job_status(job, 'NO_JOB', '无任务在执行')
+    
+    # 只返回序号大于 since 的日志，每个客户端各自记录自己的位置
+    try:
+        since = int(request.args.get('since', 0))
+    except ValueError:
+        return jsonify({'error': 'since 必须是整数'}), 400
+    
+    # 其他进程持有的任务使用注册表中保存的最近一次 Flink 状态
+    flink_state = flink_job_states.get(job.get('flink_job_id')) or job.get('flink_state') or {}
+    
+    # 返回任务状态信息
+    return jsonify({
+        'jobId': job['job_id'],
+        'flinkJobId': job.get('flink_job_id'),
+        'groupId': job.get('group_id'),
+        'parentJobId': job.get('parent_job_id'),
+        'status': job['status'],
+        'priority': job_priority(job['config']),
+        'queuePosition': job.get('queue_position') if job['status'] == 'QUEUED' else None,
+        'waitingReason': job.get('waiting_reason') if job['status'] == 'QUEUED' else None,
+        'savepointPath': job.get('savepoint_path'),
+        'resumeFrom': job.get('resume_from'),
+        'bottleneck': job.get('bottleneck'),
+        'logs': job['logs'].since(since),  # 只返回新增的日志
+        'lastSeq': job['logs'].last_seq,
+        'startTime': job.get('start_time'),
+        'lastUpdate': job.get('last_update'),
+        'endTime': job.get('end_time'),
+        'flinkStartTime': flink_state.get('startTime'),
+        'flinkEndTime': flink_state.get('endTime'),
+        'duration': flink_state.get('duration'),
+        'tasks': flink_state.get('tasks'),
+        'lastPoll': flink_poller['last_poll'],
+        'version': job.get('version', 0)
+    })
+
+# 推送连接的参数：长轮询最长等待时间、SSE 心跳间隔和单个 SSE 连接的最长持续时间
+JOB_EVENTS_MAX_WAIT = 60
+JOB_EVENTS_KEEPALIVE = 15
+JOB_EVENTS_MAX_DURATION = int(os.getenv('JOB_EVENTS_MAX_DURATION', '300'))
+# 任务进入这些状态后 SSE 发送 end 事件并关闭连接，长轮询不再等待
+JOB_EVENTS_END_STATES = FLINK_TERMINAL_STATES + ('NO_JOB',)
+
+@app.route('/api/job-events/<job_id>', methods=['GET'])
+def job_events(job_id):
+    """通过 Server-Sent Events 推送任务状态和日志，只在状态变化或有新日志时发送事件
+
+    事件 id 为已发送日志的最大序号，断线重连时浏览器会通过 Last-Event-ID 从该位置继续
+    """
+    job = find_job(job_id)
+    if not job:
+        return jsonify({'error': '任务不存在'}), 404
+    
+    ensure_flink_poller()
+    
+    try:
+        sent_seq = int(request.headers.get('Last-Event-ID') or request.args.get('since') or 0)
+    except ValueError:
+        sent_seq = 0
+    
+    def generate():
+        nonlocal sent_seq, job
+        deadline = time.monotonic() + JOB_EVENTS_MAX_DURATION
+        last_state = None
+        version = -1
+        # 告诉浏览器断线后 3 秒重连
+        yield 'retry: 3000\n\n'
+        while time.monotonic() < deadline:
+            changed, job = wait_for_job_update(job, version, JOB_EVENTS_KEEPALIVE)
+            if not changed:
+                yield ': keepalive\n\n'
+                continue
+            version = job.get('version', 0)
+            
+            new_logs = job['logs'].since(sent_seq)
+            # 排队中的任务在队列位置或等待原因变化时也推送
+            state = (job['status'], job.get('queue_position'), job.get('waiting_reason'))
+            if state == last_state and not new_logs:
+                continue
+            last_state = state
+            if new_logs:
+                sent_seq = new_logs[-1]['seq']
+            
+            flink_state = flink_job_states.get(job.get('flink_job_id')) or job.get('flink_state') or {}
+            event = {
+                'jobId': job['job_id'],
+                'flinkJobId': job.get('flink_job_id'),
+                'status': job['status'],
+                'queuePosition': job.get('queue_position') if job['status'] == 'QUEUED' else None,
+                'waitingReason': job.get('waiting_reason') if job['status'] == 'QUEUED' else None,
+                'savepointPath': job.get('savepoint_path'),
+                'logs': new_logs,
+                'lastSeq': sent_seq,
+                'startTime': job.get('start_time'),
+                'lastUpdate': job.get('last_update'),
+                'tasks': flink_state.get('tasks'),
+                'version': version
+            }
+            yield f'id: {sent_seq}\nevent: status\ndata: {app.json.dumps(event)}\n\n'
+            
+            if job['status'] in JOB_EVENTS_END_STATES:
+                yield 'event: end\ndata: {}\n\n'
+                return
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+# 取消任务的后台线程池：等待 Flink 确认取消不占用请求线程
+FLINK_CANCEL_TIMEOUT = int(os.getenv('FLINK_CANCEL_TIMEOUT', '30'))
+cancel_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='flink-cancel')
+
+def send_flink_cancel(flink_job_id):
+    """向 Flink 集群发送取消请求，失败时抛出异常"""
+    # 发送取消请求 - 使用 GET 方法访问 yarn-cancel 端点
+    response = flink_request('GET', f'/jobs/{flink_job_id}/yarn-cancel', 'job_yarn_cancel', timeout=10)
+    
+    if response.status_code not in [200, 202]:
+        # 如果 GET yarn-cancel 失败，尝试标准的 PATCH cancel 端点
+        response = flink_request('PATCH', f'/jobs/{flink_job_id}/cancel', 'job_cancel',
+                                 headers={'Content-Type': 'application/json'}, timeout=10)
+        
+        if response.status_code not in [200, 202]:
+            raise Exception(f'取消 Flink 任务失败: {_flink_rest_error(response)}')
+
+# stop-with-savepoint：先创建 savepoint 再停止任务，之后可以用 resumeFrom 从 savepoint 继续同步
+FLINK_SAVEPOINT_DIR = os.getenv('FLINK_SAVEPOINT_DIR', '')
+FLINK_SAVEPOINT_TIMEOUT = int(os.getenv('FLINK_SAVEPOINT_TIMEOUT', '600'))
+
+def trigger_flink_stop(flink_job_id, target_directory=None):
+    """调用 /jobs/<id>/stop 触发 stop-with-savepoint，返回 trigger id"""
+    body = {'drain': False}
+    if target_directory:
+        body['targetDirectory'] = target_directory
+    response = flink_request('POST', f'/jobs/{flink_job_id}/stop', 'job_stop', json=body, timeout=10)
+    if response.status_code not in [200, 202]:
+        raise Exception(f'创建 savepoint 失败: {_flink_rest_error(response)}')
+    return response.json()['request-id']
+
+def wait_for_savepoint(flink_job_id, trigger_id, timeout):
+    """轮询 savepoint 进度，完成时返回 savepoint 路径，失败或超时时抛出异常"""
+    deadline = time.monotonic() + timeout
+    while True:
+        response = flink_request('GET', f'/jobs/{flink_job_id}/savepoints/{trigger_id}',
+                                 'savepoint_status', timeout=10)
+        if response.status_code != 200:
+            raise Exception(f'查询 savepoint 状态失败: {_flink_rest_error(response)}')
+        result = response.json()
+        if result.get('status', {}).get('id') == 'COMPLETED':
+            operation = result.get('operation') or {}
+            if operation.get('location'):
+                return operation['location']
+            cause = operation.get('failure-cause') or {}
+            stack_trace = (cause.get('stack-trace') or cause.get('class') or '未知错误').splitlines()[0]
+            raise Exception(f'创建 savepoint 失败: {stack_trace}')
+        if time.monotonic() >= deadline:
+            raise Exception(f'等待 savepoint 超过 {timeout} 秒')
+        time.sleep(2)
+
+def cleanup_job_resources(job):
+    """终止提交进程并清理配置文件"""
+    # 终止进程（如果存在）
+    process = job.get('process')
+    if process:
+        try:
+            process.terminate()
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        except Exception as e:
+            append_job_log(job, f'终止进程时出错: {str(e)}')
+    
+    # 清理配置文件
+    config_file = job.get('config_file', '')
+    if config_file and os.path.exists(config_file):
+        try:
+            os.remove(config_file)
+        except Exception as e:
+            append_job_log(job, f'清理配置文件时出错: {str(e)}')
+
+def _confirm_job_cancel(job, previous_status):
+    """后台线程：发送取消请求，并等待轮询线程确认任务进入终止状态"""
+    try:
+        send_flink_cancel(job['flink_job_id'])
+    except Exception as e:
+        error_msg = str(e)
+        if isinstance(e, requests.exceptions.RequestException):
+            error_msg = f'请求 Flink REST API 失败: {error_msg}'
+        set_job_status(job, previous_status, error_msg)
+        return
+    
+    append_job_log(job, '已发送取消请求到 Flink 集群')
+    ensure_flink_poller()
+    
+    # 状态由共享轮询线程刷新，这里只等待状态变化，不再单独请求 Flink
+    deadline = time.monotonic() + FLINK_CANCEL_TIMEOUT
+    while job['status'] not in FLINK_TERMINAL_STATES:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            append_job_log(job, '等待任务取消超时，但取消请求已发送')
+            break
+        wait_for_job_change(job, job.get('version', 0), remaining)
+    
+    if job['status'] in FLINK_TERMINAL_STATES:
+        append_job_log(job, f'任务已成功取消，最终状态: {job["status"]}')
+    else:
+        # 更新状态为已取消
+        set_job_status(job, 'CANCELED')
+    
+    cleanup_job_resources(job)
+
+def _confirm_job_stop(job, previous_status, target_directory=None):
+    """后台线程：以 stop-with-savepoint 方式停止任务，记录 savepoint 路径并等待任务结束"""
+    try:
+        if not job.get('savepoint_trigger'):
+            job['savepoint_trigger'] = trigger_flink_stop(job['flink_job_id'], target_directory)
+            append_job_log(job, '已请求 Flink 创建 savepoint 并停止任务')
+        savepoint_path = wait_for_savepoint(job['flink_job_id'], job['savepoint_trigger'], FLINK_SAVEPOINT_TIMEOUT)
+    except Exception as e:
+        error_msg = str(e)
+        if isinstance(e, requests.exceptions.RequestException):
+            error_msg = f'请求 Flink REST API 失败: {error_msg}'
+        job.pop('savepoint_trigger', None)
+        job.pop('stop_with_savepoint', None)
+        # savepoint 失败时 Flink 不会停止任务，恢复为原来的状态
+        set_job_status(job, previous_status, f'{error_msg}，任务未停止')
+        return
+    
+    job.pop('savepoint_trigger', None)
+    job['savepoint_path'] = savepoint_path
+    append_job_log(job, f'savepoint 已保存: {savepoint_path}，可以使用 resumeFrom 从该位置继续同步')
+    ensure_flink_poller()
+    
+    deadline = time.monotonic() + FLINK_CANCEL_TIMEOUT
+    while job['status'] not in FLINK_TERMINAL_STATES:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            append_job_log(job, '等待任务停止超时，但 savepoint 已完成')
+            break
+        wait_for_job_change(job, job.get('version', 0), remaining)
+    
+    if job['status'] in FLINK_TERMINAL_STATES:
+        append_job_log(job, f'任务已停止，最终状态: {job["status"]}')
+    else:
+        set_job_status(job, 'CANCELED')
+    
+    cleanup_job_resources(job)
+
+def request_job_cancel(job, savepoint=False, target_directory=None):
+    """发起取消任务，立即返回结果和 HTTP 状态码，确认过程在后台线程中完成
+
+    savepoint=True 时先创建 savepoint 再停止；任务还没有 Flink Job ID 时没有进度可保存，直接取消
+    """
+    status = job['status']
+    if status in FLINK_TERMINAL_STATES:
+        return {'jobId': job['job_id'], 'status': status}, 200
+    if status == 'CANCELLING':
+        return {'jobId': job['job_id'], 'status': 'CANCELLING'}, 202
+    if not is_local_job(job):
+        # 任务由其他后端进程持有，记录停止请求，由持有进程在下一轮轮询时执行
+        job_store.request_cancel(job['job_id'], savepoint, target_directory, get_shanghai_time().isoformat())
+        return {'jobId': job['job_id'], 'status': status, 'cancelRequested': True, 'owner': job.get('owner')}, 202
+    
+    if not job.get('flink_job_id'):
+        if status == 'SUBMITTING':
+            # 正在提交，等拿到 Flink Job ID 后由提交线程取消
+            job['cancel_requested'] = True
+            append_job_log(job, '任务正在提交，提交完成后将立即取消')
+            return {'jobId': job['job_id'], 'status': 'CANCELLING'}, 202
+        if job.get('future'):
+            job['future'].cancel()
+        if admission_queue.remove(job['job_id']):
+            admission_wakeup.set()
+        set_job_status(job, 'CANCELED', '任务已停止（无 Flink Job ID）')
+        cleanup_job_resources(job)
+        return {'jobId': job['job_id'], 'status': 'CANCELED'}, 200
+    
+    if savepoint:
+        set_job_status(job, 'CANCELLING', '正在创建 savepoint 并停止任务...')
+        job['stop_with_savepoint'] = True
+        cancel_executor.submit(_confirm_job_stop, job, status, target_directory or FLINK_SAVEPOINT_DIR)
+    else:
+        job.pop('stop_with_savepoint', None)
+        set_job_status(job, 'CANCELLING', '正在取消任务...')
+        cancel_executor.submit(_confirm_job_cancel, job, status)
+    return {'jobId': job['job_id'], 'status': 'CANCELLING'}, 202
+
+@app.route('/api/stop-job/<job_id>', methods=['POST'])
+def stop_job(job_id):
+    """停止任务（立即返回 202，任务状态依次变为 CANCELLING → CANCELED）
+
+    请求体 {"savepoint": true, "targetDirectory": "..."} 时先创建 savepoint 再停止，
+    savepoint 路径记录在任务的 savepointPath 中
+    """
+    job = find_job(job_id, adopt=True)
+    if not job:
+        return jsonify({'error': '任务不存在'}), 404
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        result, status_code = request_job_cancel(job, bool(data.get('savepoint')), data.get('targetDirectory'))
+        return jsonify(result), status_code
+    except Exception as e:
+        error_msg = f'停止任务时出错: {str(e)}'
+        append_job_log(job, error_msg)
+        return jsonify({'error': error_msg}), 500
+
+@app.route('/api/stop-jobs', methods=['POST'])
+def stop_jobs():
+    """批量停止任务：{"jobIds": [...]} 停止指定任务，{"all": true} 停止所有未结束的任务
+
+    同时传 "savepoint": true 时每个任务都先创建 savepoint 再停止
+    """
+    data = request.json or {}
+    results = []
+    if data.get('all'):
+        # 包括其他后端进程持有的任务
+        targets = [find_job(record['job_id'], adopt=True)
+                   for record in job_store.list_jobs(exclude_statuses=FLINK_TERMINAL_STATES)]
+    else:
+        job_ids = data.get('jobIds') or []
+        if not isinstance(job_ids, list) or not job_ids:
+            return jsonify({'error': '请提供 jobIds 列表或 all: true'}), 400
+        targets = []
+        for job_id in job_ids:
+            job = find_job(job_id, adopt=True)
+            if job:
+                targets.append(job)
+            else:
+                results.append({'jobId': job_id, 'error': '任务不存在'})
+    
+    for job in targets:
+        try:
+            result, _ = request_job_cancel(job, bool(data.get('savepoint')), data.get('targetDirectory'))
+        except Exception as e:
+            result = {'jobId': job['job_id'], 'error': f'停止任务时出错: {str(e)}'}
+        results.append(result)
+    
+    return jsonify({'results': results}), 202
+
+@app.route('/api/admission-queue', methods=['GET'])
+def admission_queue_status():
+    """当前进程中等待 Flink slot 的任务，按提交顺序排列"""
+    waiting = []
+    for job_id in admission_queue.ordered():
+        job = jobs.get(job_id)
+        if job and job['status'] == 'QUEUED':
+            waiting.append({
+                'jobId': job_id,
+                'priority': job_priority(job['config']),
+                'requiredSlots': required_slots(job),
+                'queuePosition': job.get('queue_position'),
+                'waitingReason': job.get('waiting_reason'),
+                'startTime': job.get('start_time')
+            })
+    return jsonify({
+        'enabled': SLOT_ADMISSION_ENABLED,
+        'waiting': waiting,
+        'lastCheck': admission_scheduler['last_check'],
+        'error': admission_scheduler['error']
+    })
+
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    """从注册表列出任务，可通过 ?status=RUNNING,FAILED 按状态过滤"""
+    statuses = [status for status in request.args.get('status', '').split(',') if status]
+    return jsonify({'jobs': [{
+        'jobId': record['job_id'],
+        'flinkJobId': record.get('flink_job_id'),
+        'groupId': record.get('group_id'),
+        'parentJobId': record.get('parent_job_id'),
+        'status': record['status'],
+        'savepointPath': record.get('savepoint_path'),
+        'startTime': record.get('start_time'),
+        'endTime': record.get('end_time'),
+        'lastUpdate': record.get('last_update')
+    } for record in job_store.list_jobs(statuses=statuses)]})
+
+@app.route('/api/jobs/<job_id>/transitions', methods=['GET'])
+def job_transitions(job_id):
+    """获取任务的状态变化记录"""
+    record = job_store.load_job(job_id)
+    if not record:
+        return jsonify({'error': '任务不存在'}), 404
+    return jsonify({'jobId': record['job_id'], 'transitions': job_store.transitions(record['job_id'])})
+
+# 同步任务组：按表的数据量把一批表拆分成多个负载均衡的 Flink 任务，作为一个整体跟踪
+SYNC_GROUP_MAX_JOBS = int(os.getenv('SYNC_GROUP_MAX_JOBS', '8'))
+
+def plan_sync_group(config):
+    """在 StarRocks 中展开表名模式并按数据量分组，返回分组计划"""
+    starrocks = config.get('starrocks') or {}
+    try:
+        job_count = int((config.get('flinkOMT') or {}).get('jobCount') or 0)
+    except (TypeError, ValueError):
+        raise ValueError('flinkOMT.jobCount 必须是整数')
+    if job_count <= 0 or job_count > SYNC_GROUP_MAX_JOBS:
+        raise ValueError(f'flinkOMT.jobCount 必须在 1 到 {SYNC_GROUP_MAX_JOBS} 之间')
+    validate_job_config(config)
+    
+    connection = get_starrocks_connection(starrocks)
+    try:
+        tables = expand_tables(connection, starrocks.get('tables', ''))
+    finally:
+        connection.close()
+    if not tables:
+        raise ValueError(f'表名模式 {starrocks.get("tables")} 没有匹配到任何表')
+    
+    plan = plan_table_groups(tables, job_count)
+    plan.update({
+        'tableCount': len(tables),
+        'rows': sum(t['rows'] for t in tables),
+        'dataSize': sum(t['dataSize'] for t in tables)
+    })
+    return plan
+
+# 组内任务处于这些状态时按失败计算：提交后没有对应的 Flink 任务，或任务已不在注册表中
+GROUP_FAILED_STATES = ('NO_JOB', 'UNKNOWN')
+
+def combine_group_status(statuses):
+    """根据组内各任务的状态计算同步任务组的整体状态"""
+    statuses = ['FAILED' if status in GROUP_FAILED_STATES else status for status in statuses]
+    if all(status in FLINK_TERMINAL_STATES for status in statuses):
+        if all(status == 'FINISHED' for status in statuses):
+            return 'FINISHED'
+        return 'FAILED' if 'FAILED' in statuses else 'CANCELED'
+    if 'FAILED' in statuses:
+        # 部分任务失败，其余任务仍在运行
+        return 'PARTIALLY_FAILED'
+    if 'CANCELLING' in statuses:
+        # 部分任务正在取消，取消完成后按终止状态计算
+        return 'CANCELLING'
+    if all(status == 'RUNNING' or status in FLINK_TERMINAL_STATES for status in statuses):
+        # 其余任务已经结束
+        return 'RUNNING'
+    return 'STARTING'
+
+@app.route('/api/sync-groups/plan', methods=['POST'])
+def sync_group_plan():
+    """预览同步任务组的分组计划（请求体与 start-job 相同，flinkOMT.jobCount 为拆分的任务数），不提交任务"""
+    try:
+        return jsonify(plan_sync_group(request.json or {}))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/sync-groups', methods=['POST'])
+def start_sync_group():
+    """按分组计划提交一组任务，每组表对应一个 Flink 任务，立即返回任务组 ID"""
+    config = request.json or {}
+    try:
+        plan = plan_sync_group(config)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    groups = plan['groups']
+    capacity_error = check_submit_capacity(len(groups))
+    if capacity_error:
+        return jsonify({'error': capacity_error}), 429
+    
+    group_id = str(uuid.uuid4())
+    job_ids = []
+    try:
+        for index, group in enumerate(groups):
+            child = copy.deepcopy(config)
+            child['starrocks']['tables'] = format_table_list(group['tables'])
+            child['flinkOMT']['jobName'] = f'Sync StarRocks Database to OceanBase ({index + 1}/{len(groups)})'
+            job = create_job(child, group_id=group_id, group_index=index)
+            append_job_log(job, f'同步任务组 {group_id} 的第 {index + 1}/{len(groups)} 个任务，'
+                                f'包含 {len(group["tables"])} 张表，约 {group["rows"]} 行')
+            job_ids.append(job['job_id'])
+    except Exception as e:
+        # 已经提交的任务仍然属于该任务组，可以通过任务组查看和停止
+        return jsonify({'error': f'提交第 {len(job_ids) + 1} 个任务时出错: {str(e)}',
+                        'groupId': group_id, 'jobIds': job_ids}), 500
+    finally:
+        job_store.save_group(group_id, get_shanghai_time().isoformat(), job_ids, plan)
+    
+    return jsonify({
+        'groupId': group_id,
+        'jobIds': job_ids,
+        'status': 'STARTING',
+        'plan': plan
+    }), 202
+
+@app.route('/api/sync-groups/<group_id>', methods=['GET'])
+def sync_group_status(group_id):
+    """获取同步任务组的整体状态和组内各任务的状态"""
+    group = job_store.load_group(group_id)
+    if not group:
+        return jsonify({'error': '任务组不存在'}), 404
+    
+    members = []
+    for index, job_id in enumerate(group['job_ids']):
+        job = find_job(job_id)
+        tables = group['plan']['groups'][index]['tables'] if group['plan'] else []
+        members.append({
+            'jobId': job_id,
+            'flinkJobId': job.get('flink_job_id') if job else None,
+            'status': job['status'] if job else 'UNKNOWN',
+            'lastUpdate': job.get('last_update') if job else None,
+            'tables': [f"{t['database']}.{t['table']}" for t in tables]
+        })
+    
+    statuses = [member['status'] for member in members]
+    counts = {}
+    for status in statuses:
+        counts[status] = counts.get(status, 0) + 1
+    return jsonify({
+        'groupId': group['group_id'],
+        'status': combine_group_status(statuses) if statuses else 'FAILED',
+        'statusCounts': counts,
+        'createdTime': group['created_time'],
+        'jobs': members
+    })
+
+# 数据校验：比较 StarRocks 和 OceanBase 中每张表的行数和按主键范围分块的校验和
+VERIFY_CHUNK_ROWS = int(os.getenv('VERIFY_CHUNK_ROWS', '100000'))
+VERIFY_DB_PARALLELISM = int(os.getenv('VERIFY_DB_PARALLELISM', '4'))
+VERIFY_MAX_KEPT = 50
+# 所有数据校验共用的连接上限：每个连接池分组同时执行的校验查询数，
+# 必须小于连接池大小，多个校验同时运行时也给 SQL 控制台和健康检查留出连接
+VERIFY_POOL_CONNECTIONS = min(int(os.getenv('VERIFY_POOL_CONNECTIONS', str(max(1, db_pool.max_size // 2)))),
+                              max(1, db_pool.max_size - 1))
+verify_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='verify')
+verifications = {}
+verifications_lock = threading.Lock()
+# 每个连接池分组的校验查询信号量，key 与连接池分组相同
+verify_pool_slots = {}
+verify_pool_slots_lock = threading.Lock()
+
+def _verify_pool_slot(pool_key):
+    """获取连接池分组的校验查询信号量，所有校验和行数比较共用"""
+    with verify_pool_slots_lock:
+        slot = verify_pool_slots.get(pool_key)
+        if slot is None:
+            slot = verify_pool_slots[pool_key] = threading.BoundedSemaphore(VERIFY_POOL_CONNECTIONS)
+        return slot
+
+def verification_query(config):
+    """返回在 StarRocks（source）或 OceanBase（target）中执行校验 SQL 的函数"""
+    def run_query(side, sql, params):
+        engine = 'starrocks' if side == 'source' else 'oceanbase'
+        with _verify_pool_slot(_pool_key(engine, config[engine])):
+            connection = _pooled_connection(engine, config[engine])
+            try:
+                with track_outbound(engine, 'verify'):
+                    with connection.cursor() as cursor:
+                        cursor.execute(sql, params or None)
+                        return cursor.fetchall()
+            finally:
+                connection.close()
+    return run_query
+
+def _run_verification(entry):
+    """后台线程：执行数据校验并记录结果"""
+    try:
+        entry['summary'] = entry['verification'].run()
+        entry['status'] = 'FINISHED'
+    except Exception as e:
+        entry['status'] = 'FAILED'
+        entry['error'] = str(e)
+    entry['end_time'] = get_shanghai_time().isoformat()
+
+@app.route('/api/verifications', methods=['POST'])
+def start_verification():
+    """启动数据校验（立即返回校验 ID，在后台并发校验每张表）
+
+    请求体传 jobId 时使用该任务的配置，否则传 starrocks（包含 tables）和 oceanbase 连接配置；
+    可选 chunkRows（每个数据块的行数）和 parallelism（每个数据库同时执行的查询数）
+    """
+    data = request.json or {}
+    job = None
+    if data.get('jobId'):
+        job = find_job(data['jobId'])
+        if not job:
+            return jsonify({'error': '任务不存在'}), 404
+        config = job['config']
+    else:
+        config = data
+    if not config.get('starrocks') or not config.get('oceanbase'):
+        return jsonify({'error': '请提供 jobId 或 starrocks 和 oceanbase 配置'}), 400
+    
+    try:
+        chunk_rows = int(data.get('chunkRows') or VERIFY_CHUNK_ROWS)
+        parallelism = int(data.get('parallelism') or VERIFY_DB_PARALLELISM)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'chunkRows 和 parallelism 必须是整数'}), 400
+    if chunk_rows <= 0 or parallelism <= 0 or parallelism > db_pool.max_size:
+        return jsonify({'error': f'chunkRows 必须大于 0，parallelism 必须在 1 到 {db_pool.max_size} 之间'}), 400
+    
+    try:
+        connection = get_starrocks_connection(config['starrocks'])
+        try:
+            tables = expand_tables(connection, config['starrocks'].get('tables', ''))
+        finally:
+            connection.close()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    if not tables:
+        return jsonify({'error': f'表名模式 {config["starrocks"].get("tables")} 没有匹配到任何表'}), 400
+    
+    verify_id = str(uuid.uuid4())
+    entry = {
+        'verify_id': verify_id,
+        'job_id': job['job_id'] if job else None,
+        'status': 'RUNNING',
+        'start_time': get_shanghai_time().isoformat(),
+        'end_time': None,
+        'error': None,
+        'summary': None,
+        'verification': DataVerification(verification_query(config), tables, sink_database(config),
+                                         chunk_rows=chunk_rows, parallelism=parallelism)
+    }
+    with verifications_lock:
+        # 只保留最近的校验结果
+        finished = [key for key, item in verifications.items() if item['status'] != 'RUNNING']
+        for key in finished[:max(0, len(verifications) - VERIFY_MAX_KEPT + 1)]:
+            verifications.pop(key)
+        verifications[verify_id] = entry
+    verify_executor.submit(_run_verification, entry)
+    
+    return jsonify({
+        'verifyId': verify_id,
+        'jobId': entry['job_id'],
+        'jobStatus': job['status'] if job else None,
+        'status': 'RUNNING',
+        'tables': len(tables)
+    }), 202
+
+@app.route('/api/verifications/<verify_id>', methods=['GET'])
+def verification_status(verify_id):
+    """获取数据校验的进度和结果，mismatchedRanges 为两边不一致的主键范围"""
+    entry = verifications.get(verify_id)
+    if not entry:
+        return jsonify({'error': '校验不存在'}), 404
+    verification = entry['verification']
+    return jsonify({
+        'verifyId': verify_id,
+        'jobId': entry['job_id'],
+        'status': entry['status'],
+        'startTime': entry['start_time'],
+        'endTime': entry['end_time'],
+        'error': entry['error'],
+        'summary': entry['summary'] or verification.summary(),
+        'tables': [{key: value for key, value in result.items() if key not in ('database', 'name')}
+                   for result in verification.snapshot()]
+    })
+
+# 只重新同步未完成的表：比较每张表在两边的行数，或使用已完成的数据校验结果
+RETRY_ALLOWED_STATES = ('FAILED', 'CANCELED', 'FINISHED')
+
+def compare_table_rows(config, tables):
+    """并发统计每张表在 StarRocks 和 OceanBase 中的行数，返回每张表的比较结果"""
+    run_query = verification_query(config)
+    target_database = sink_database(config)
+    
+    def count_rows(table):
+        result = {
+            'table': f"{table['database']}.{table['table']}",
+            'target': f"{target_database}.{table['table']}",
+            'sourceRows': None,
+            'targetRows': None,
+            'complete': False
+        }
+        rows = run_query('source', f'SELECT COUNT(*) AS row_count FROM '
+                         f'{quote_identifier(table["database"])}.{quote_identifier(table["table"])}', ())
+        result['sourceRows'] = int(rows[0]['row_count'])
+        try:
+            rows = run_query('target', f'SELECT COUNT(*) AS row_count FROM '
+                             f'{quote_identifier(target_database)}.{quote_identifier(table["table"])}', ())
+        except pymysql.err.ProgrammingError:
+            # 目标表不存在，说明该表还没开始同步
+            result['reason'] = '目标表不存在'
+            return result
+        result['targetRows'] = int(rows[0]['row_count'])
+        result['complete'] = result['targetRows'] == result['sourceRows']
+        if not result['complete']:
+            result['reason'] = f'行数不一致（StarRocks {result["sourceRows"]} 行，OceanBase {result["targetRows"]} 行）'
+        return result
+    
+    with ThreadPoolExecutor(max_workers=VERIFY_DB_PARALLELISM, thread_name_prefix='retry-count') as executor:
+        return list(executor.map(count_rows, tables))
+
+def tables_from_verification(verify_id, job_id, tables):
+    """使用任务已完成的数据校验结果，校验结果为 MATCH 的表视为已完成"""
+    entry = verifications.get(verify_id)
+    if not entry or entry['job_id'] != job_id:
+        raise ValueError(f'任务 {job_id} 没有 ID 为 {verify_id} 的数据校验')
+    if entry['status'] != 'FINISHED':
+        raise ValueError('数据校验尚未完成')
+    by_table = {result['table']: result for result in entry['verification'].snapshot()}
+    results = []
+    for table in tables:
+        name = f"{table['database']}.{table['table']}"
+        verified = by_table.get(name)
+        result = {
+            'table': name,
+            'target': verified['target'] if verified else None,
+            'sourceRows': verified['sourceRows'] if verified else None,
+            'targetRows': verified['targetRows'] if verified else None,
+            'complete': bool(verified) and verified['status'] == 'MATCH'
+        }
+        if not verified:
+            result['reason'] = '数据校验中没有该表'
+        elif not result['complete']:
+            result['reason'] = f'数据校验结果为 {verified["status"]}' + (
+                f'：{verified["error"]}' if verified.get('error') else '')
+        results.append(result)
+    return results
+
+@app.route('/api/jobs/<job_id>/retry-failed-tables', methods=['POST'])
+def retry_failed_tables(job_id):
+    """只重新同步任务中未完成的表，作为原任务的子任务提交
+
+    默认比较每张表在两边的行数；传 verifyId 时使用该任务已完成的数据校验结果。
+    dryRun 为 true 时只返回需要重新同步的表，不提交任务
+    """
+    job = find_job(job_id)
+    if not job:
+        return jsonify({'error': '任务不存在'}), 404
+    if job['status'] not in RETRY_ALLOWED_STATES:
+        return jsonify({'error': f'任务状态为 {job["status"]}，任务结束后才能重新同步未完成的表'}), 409
     
+    data = request.get_json(silent=True) or {}
+    config = job['config']
+    try:
+        connection = get_starrocks_connection(config['starrocks'])
+        try:
+            tables = expand_tables(connection, config['starrocks'].get('tables', ''))
+        finally:
+            connection.close()
+        if data.get('verifyId'):
+            results = tables_from_verification(data['verifyId'], job['job_id'], tables)
+        else:
+            results = compare_table_rows(config, tables)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'检查各表同步进度失败: {str(e)}'}), 500
     
-    # 构建 StarRocks JDBC URL
-    starrocks_jdbc_url = f"jdbc:mysql://{starrocks.get('host', '127.0.0.1')}:{starrocks.get('port', '9030')}/sys"
+    incomplete = [table for table, result in zip(tables, results) if not result['complete']]
+    response = {
+        'parentJobId': job['job_id'],
+        'checkedBy': 'verification' if data.get('verifyId') else 'rowCount',
+        'completedTables': len(tables) - len(incomplete),
+        'tables': [result for result in results if not result['complete']],
+        'jobId': None
+    }
+    if not incomplete or data.get('dryRun'):
+        return jsonify(response)
     
-    # 构建 StarRocks Scan URL (FE 端口，通常是 8030)
-    scan_port = starrocks.get('scanPort', '8030')
-    scan_url = f"{starrocks.get('host', '127.0.0.1')}:{scan_port}"
-    tables = starrocks.get('tables', '')
+    capacity_error = check_submit_capacity()
+    if capacity_error:
+        return jsonify({'error': capacity_error}), 429
     
+    child_config = copy.deepcopy(config)
+    child_config['starrocks']['tables'] = format_table_list(incomplete)
+    child = create_job(child_config, parent_job_id=job['job_id'],
+                       retry_tables=[f"{t['database']}.{t['table']}" for t in incomplete])
+    append_job_log(child, f'重新同步任务 {job["job_id"]} 中未完成的 {len(incomplete)} 张表')
+    response['jobId'] = child['job_id']
+    response['status'] = child['status']
+    return jsonify(response), 202
+
+# 运行中任务的吞吐量和 checkpoint 指标：独立的后台线程按间隔采集，每个任务保留最近的采样点
+# 每个任务每次采集要请求多个 Flink 接口，不放在状态轮询线程中，JobManager 响应慢时不会拖慢状态更新
+JOB_METRICS_INTERVAL = float(os.getenv('JOB_METRICS_INTERVAL', '10'))
+JOB_METRICS_HISTORY = int(os.getenv('JOB_METRICS_HISTORY', '180'))
+VERTEX_RATE_METRICS = ('numRecordsInPerSecond', 'numRecordsOutPerSecond', 'numBytesInPerSecond', 'numBytesOutPerSecond')
+# 每秒中繁忙、被反压和空闲的毫秒数，取各并行子任务中的最大值
+VERTEX_LOAD_METRICS = {
+    'busyTimeMsPerSecond': 'busyRatio',
+    'backPressuredTimeMsPerSecond': 'backPressuredRatio',
+    'idleTimeMsPerSecond': 'idleRatio'
+}
+# 采样 Flink 反压等级（/vertices/<id>/backpressure，每个算子一次请求）的间隔，单位秒
+BACKPRESSURE_SAMPLE_INTERVAL = float(os.getenv('BACKPRESSURE_SAMPLE_INTERVAL', '60'))
+# 连续多少个采样点 OceanBase 写入端都是瓶颈时，认为写入端持续反压并记录日志
+SINK_BOTTLENECK_SAMPLES = int(os.getenv('SINK_BOTTLENECK_SAMPLES', '6'))
+
+def _get_flink_json(path, operation):
+    """GET 请求 Flink REST API 并返回 JSON，失败时抛出异常"""
+    response = flink_request('GET', path, operation, timeout=5)
+    if response.status_code != 200:
+        raise Exception(f'请求 {path} 失败: {_flink_rest_error(response)}')
+    return response.json()
+
+def fetch_vertex_metrics(flink_job_id, vertex_id):
+    """获取算子的吞吐量和负载，返回 (各并行子任务每秒处理的记录数和字节数之和, 繁忙/反压/空闲时间占比)"""
+    names = VERTEX_RATE_METRICS + tuple(VERTEX_LOAD_METRICS)
+    metrics = _get_flink_json(f'/jobs/{flink_job_id}/vertices/{vertex_id}/subtasks/metrics'
+                              f'?get={",".join(names)}&agg=sum,max', 'vertex_metrics')
+    rates = {name: 0.0 for name in VERTEX_RATE_METRICS}
+    load = {ratio: None for ratio in VERTEX_LOAD_METRICS.values()}
+    for metric in metrics:
+        if metric.get('id') in rates and metric.get('sum') is not None:
+            rates[metric['id']] = float(metric['sum'])
+        elif metric.get('id') in VERTEX_LOAD_METRICS and metric.get('max') is not None:
+            # 空闲的子任务可能报告 NaN
+            value = float(metric['max'])
+            load[VERTEX_LOAD_METRICS[metric['id']]] = None if math.isnan(value) else min(value / 1000, 1.0)
+    return rates, load
+
+def fetch_vertex_backpressure(flink_job_id, vertex_id):
+    """获取 Flink 给出的算子反压等级（ok / low / high），还没有采样结果时返回 None"""
+    result = _get_flink_json(f'/jobs/{flink_job_id}/vertices/{vertex_id}/backpressure', 'vertex_backpressure')
+    return result.get('backpressureLevel') or result.get('backpressure-level')
+
+def summarize_checkpoints(checkpoints):
+    """从 /jobs/<id>/checkpoints 的返回中提取 checkpoint 次数和最近一次完成的 checkpoint"""
+    counts = checkpoints.get('counts') or {}
+    latest = checkpoints.get('latest') or {}
+    completed = latest.get('completed') or {}
+    failed = latest.get('failed')
+    return {
+        'completed': counts.get('completed', 0),
+        'failed': counts.get('failed', 0),
+        'inProgress': counts.get('in_progress', 0),
+        'lastCheckpointId': completed.get('id'),
+        'lastDuration': completed.get('end_to_end_duration'),
+        'lastStateSize': completed.get('state_size'),
+        'lastCheckpointedSize': completed.get('checkpointed_size', completed.get('state_size')),
+        'lastCompletedTime': completed.get('latest_ack_timestamp'),
+        'lastFailure': {
+            'id': failed.get('id'),
+            'time': failed.get('failure_timestamp'),
+            'message': failed.get('failure_message')
+        } if failed else None
+    }
+
+def checkpoint_age(checkpoints):
+    """最近一次完成的 checkpoint 距今的毫秒数"""
+    completed_time = checkpoints.get('lastCompletedTime')
+    if not completed_time:
+        return None
+    return max(0, int(time.time() * 1000) - completed_time)
+
+def collect_flink_job_metrics(flink_job_id, backpressure_levels=None):
+    """采集一次任务的算子吞吐量和 checkpoint 指标，返回 (时间序列采样点, 完整指标)
+
+    任务的读取速率取 source 算子（没有上游）的输出速率之和，写入速率取 sink 算子（没有下游）的输入速率之和；
+    传入 backpressure_levels（{算子 ID: 反压等级}）时沿用其中的反压等级，不再请求 Flink
+    """
+    detail = _get_flink_json(f'/jobs/{flink_job_id}', 'job_detail')
+    checkpoints = summarize_checkpoints(_get_flink_json(f'/jobs/{flink_job_id}/checkpoints', 'job_checkpoints'))
     
-    # 构建 OceanBase JDBC URL
-    oceanbase_url = f"jdbc:mysql://{oceanbase.get('host', '127.0.0.1')}:{oceanbase.get('port', '2881')}/test"
+    nodes = (detail.get('plan') or {}).get('nodes') or []
+    upstreams = {node['id']: [edge['id'] for edge in node.get('inputs') or []] for node in nodes}
+    has_upstream = {node_id for node_id, inputs in upstreams.items() if inputs}
+    has_downstream = {upstream for inputs in upstreams.values() for upstream in inputs}
     
-    # FlinkOMT YAML 配置
-    yaml_content = f"""
-source:
-  type: starrocks
-  jdbc-url: {starrocks_jdbc_url}
-  username: {starrocks.get('username', 'root')}
-  password: {starrocks.get('password', '')}
-  scan-url: {scan_url}
-  scan.max-retries: {starrocks.get('scanMaxRetries', '1')}
-  tables: {tables}
+    sample = {
+        'time': get_shanghai_time().isoformat(),
+        'recordsInPerSecond': 0.0,
+        'recordsOutPerSecond': 0.0,
+        'bytesInPerSecond': 0.0,
+        'bytesOutPerSecond': 0.0
+    }
+    vertices = []
+    for vertex in detail.get('vertices', []):
+        rates, load = fetch_vertex_metrics(flink_job_id, vertex['id'])
+        is_source = vertex['id'] not in has_upstream
+        is_sink = vertex['id'] not in has_downstream
+        if is_source:
+            sample['recordsInPerSecond'] += rates['numRecordsOutPerSecond']
+            sample['bytesInPerSecond'] += rates['numBytesOutPerSecond']
+        if is_sink:
+            sample['recordsOutPerSecond'] += rates['numRecordsInPerSecond']
+            sample['bytesOutPerSecond'] += rates['numBytesInPerSecond']
+        vertices.append({
+            'id': vertex['id'],
+            'name': vertex.get('name'),
+            'parallelism': vertex.get('parallelism'),
+            'status': vertex.get('status'),
+            'source': is_source,
+            'sink': is_sink,
+            'recordsInPerSecond': rates['numRecordsInPerSecond'],
+            'recordsOutPerSecond': rates['numRecordsOutPerSecond'],
+            'bytesInPerSecond': rates['numBytesInPerSecond'],
+            'bytesOutPerSecond': rates['numBytesOutPerSecond'],
+            'backpressureLevel': (fetch_vertex_backpressure(flink_job_id, vertex['id'])
+                                  if backpressure_levels is None else backpressure_levels.get(vertex['id'])),
+            **load
+        })
+    
+    bottleneck = find_bottleneck(vertices, upstreams)
+    sample.update({
+        'checkpointDuration': checkpoints['lastDuration'],
+        'checkpointSize': checkpoints['lastCheckpointedSize'],
+        'lastCheckpointAge': checkpoint_age(checkpoints),
+        'bottleneck': bottleneck['name'] if bottleneck else None,
+        'bottleneckSide': bottleneck['side'] if bottleneck else None,
+        'sinkBackPressuredRatio': sink_backpressure(vertices, upstreams)
+    })
+    latest = {'collectedAt': sample['time'], 'vertices': vertices, 'checkpoints': checkpoints, 'bottleneck': bottleneck}
+    return sample, latest
 
-oceanbase:
-  url: {oceanbase_url}
-  username: {oceanbase.get('username', 'root@test')}
-  password: {oceanbase.get('password', '')}
-  schema-name: test
+def record_job_metrics(flink_job_id, metrics):
+    """采集一次指标写入时间序列，失败时记录错误；反压等级按 BACKPRESSURE_SAMPLE_INTERVAL 间隔采样"""
+    sample_backpressure = metrics.backpressure_due(BACKPRESSURE_SAMPLE_INTERVAL)
+    try:
+        sample, latest = collect_flink_job_metrics(
+            flink_job_id, None if sample_backpressure else metrics.backpressure_levels)
+        metrics.append(sample, latest)
+        if sample_backpressure:
+            metrics.update_backpressure({vertex['id']: vertex['backpressureLevel'] for vertex in latest['vertices']})
+    except Exception as e:
+        metrics.mark_failed(f'采集任务指标失败: {str(e)}')
 
-pipeline:
-  name: Sync StarRocks Database to OceanBase
-  parallelism: {flinkomt.get('parallelism', '2')}
-"""
-    return yaml_content
+def update_job_bottleneck(job, metrics):
+    """根据最近一次采集结果更新任务的瓶颈算子，瓶颈变化或写入端持续成为瓶颈时记录日志"""
+    if metrics.error or not metrics.latest:
+        return
+    bottleneck = metrics.latest['bottleneck']
+    recent = metrics.since(max(0, metrics.last_seq - SINK_BOTTLENECK_SAMPLES))
+    persistent_sink = (len(recent) >= SINK_BOTTLENECK_SAMPLES
+                       and all(sample['bottleneckSide'] == 'sink' for sample in recent))
+    previous = job.get('bottleneck')
+    job['bottleneck'] = dict(bottleneck, persistentSink=persistent_sink) if bottleneck else None
+    
+    previous_vertex = previous['vertexId'] if previous else None
+    if bottleneck and bottleneck['vertexId'] != previous_vertex:
+        append_job_log(job, f'瓶颈算子: {bottleneck["name"]}（{bottleneck["sideName"]}，{bottleneck["reason"]}）')
+    elif not bottleneck and previous:
+        append_job_log(job, '当前没有明显的瓶颈算子')
+    if persistent_sink and not (previous and previous.get('persistentSink')):
+        append_job_log(job, f'OceanBase 写入端已连续 {SINK_BOTTLENECK_SAMPLES} 次采样'
+                            f'（约 {SINK_BOTTLENECK_SAMPLES * JOB_METRICS_INTERVAL:.0f} 秒）成为瓶颈，'
+                            f'上游持续被反压，可以增大并行度或检查 OceanBase 写入性能')
 
-@app.route('/api/start-job', methods=['POST'])
-def start_job():
-    """启动 FlinkOMT 任务"""
-    try:
-        config = request.json
-        job_id = str(uuid.uuid4())
-        print('job_id: ', job_id)
-        
-        # 生成 FlinkOMT YAML 配置文件
-        yaml_content = generate_flinkomt_config(config)
-        config_file = f'/tmp/flinkomt_{job_id}.yaml'
-        
-        with open(config_file, 'w', encoding='utf-8') as f:
-            f.write(yaml_content)
-        
-        # 提交 Flink 任务
-        flinkomt = config['flinkOMT']
-        
-        # 转换 checkpointInterval 从毫秒到秒
-        checkpoint_interval_ms = int(flinkomt.get('checkpointInterval', '10000'))
-        checkpoint_interval_sec = checkpoint_interval_ms // 1000
-        parallelism = flinkomt.get('parallelism', '1')
-        
-        # 构建 FlinkOMT 启动命令
-        flink_cmd = [
-            f'{FLINK_HOME}/bin/flink',
-            'run',
-            '-m', 'jobmanager:8081',
-            '-d',  # 后台运行
-            '-D', f'execution.checkpointing.interval={checkpoint_interval_sec}s',
-            '-D', f'parallelism.default={parallelism}',
-            '-c', 'com.oceanbase.omt.cli.CommandLineCliFront',
-            f'{FLINK_HOME}/lib/flink-omt-flink_1.18-1.1.jar',
-            '-config', config_file,
-            '--skip-confirm'
-        ]
-        
-        # 提交 Flink 任务
-        process = subprocess.Popen(
-            flink_cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-        
-        # 等待进程完成并获取输出 (Flink 命令会立即返回 Job ID)
+def collect_job_metrics_once():
+    """为当前进程持有的运行中任务采集指标，每个任务按 JOB_METRICS_INTERVAL 间隔采集"""
+    with jobs_lock:
+        running = [job for job in jobs.values() if job['status'] == 'RUNNING' and job.get('flink_job_id')]
+    for job in running:
+        metrics = job.setdefault('metrics', JobMetricsBuffer(JOB_METRICS_HISTORY))
+        if metrics.due(JOB_METRICS_INTERVAL):
+            record_job_metrics(job['flink_job_id'], metrics)
+            update_job_bottleneck(job, metrics)
+
+job_metrics_collector = {'thread': None, 'error': None}
+job_metrics_collector_lock = threading.Lock()
+# 采集线程检查是否有任务到了采集时间的间隔
+JOB_METRICS_TICK = 1
+
+def _run_job_metrics_collector():
+    """后台线程：为运行中任务采集指标，与 Flink 状态轮询线程互不阻塞"""
+    while True:
         try:
-            stdout, stderr = process.communicate(timeout=30)
-            output = stdout + stderr if stderr else stdout
-            
-            # 从输出中提取 Flink Job ID
-            flink_job_id = extract_flink_job_id(output)
-            
-            if flink_job_id:
-                logs = [f'任务已提交，Job ID: {flink_job_id}']
-            else:
-                logs = ['任务已提交，等待启动...', f'输出: {output[:200]}']
-        except subprocess.TimeoutExpired:
-            process.kill()
-            stdout, stderr = process.communicate()
-            output = stdout + stderr if stderr else stdout
-            flink_job_id = extract_flink_job_id(output)
-            logs = ['任务提交超时，尝试提取 Job ID...']
-            if flink_job_id:
-                logs.append(f'已提取 Job ID: {flink_job_id}')
+            collect_job_metrics_once()
+            job_metrics_collector['error'] = None
         except Exception as e:
-            flink_job_id = None
-            logs = [f'任务提交时出错: {str(e)}']
-        
-        # 初始化任务状态
-        jobs[flink_job_id] = {
-            'job_id': flink_job_id,
-            'status': 'SUBMITTED',
-            'config': config,
-            'config_file': config_file,
-            'process': process,
-            'logs': logs,
-            'last_log_count': len(logs),  # 记录上次返回的日志数量
-            'last_status': 'SUBMITTED',  # 记录上次的状态，用于避免重复添加状态日志
-            'start_time': get_shanghai_time().isoformat(),
-            'last_update': get_shanghai_time().isoformat()
-        }
-        
-        return jsonify({
-            'jobId': flink_job_id, 
-            'status': 'submitted',
-            'logs': logs,
-            'lastUpdate': get_shanghai_time().isoformat()  # 返回东八区时间戳
-        })
-    
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+            job_metrics_collector['error'] = f'采集任务指标失败: {str(e)}'
+        time.sleep(min(JOB_METRICS_TICK, JOB_METRICS_INTERVAL))
 
-@app.route('/api/job-status/<job_id>', methods=['GET'])
-def job_status(job_id):
-    """获取任务状态"""
-    job = jobs.get(job_id)
+def ensure_job_metrics_collector():
+    """启动任务指标采集线程（每个进程只启动一个）"""
+    with job_metrics_collector_lock:
+        if job_metrics_collector['thread'] is None:
+            job_metrics_collector['thread'] = threading.Thread(target=_run_job_metrics_collector, daemon=True)
+            job_metrics_collector['thread'].start()
+
+@app.route('/api/job-metrics/<job_id>', methods=['GET'])
+def job_metrics(job_id):
+    """获取任务的吞吐量和 checkpoint 指标
+
+    当前进程持有的任务返回后台采集的时间序列，传 ?since=<seq> 只返回序号更大的采样点；
+    其他进程持有的任务直接向 Flink 采集一次，只返回当前值
+    """
+    job = find_job(job_id)
     if not job:
         return jsonify({'error': '任务不存在'}), 404
     
     try:
-        # 尝试从 Flink REST API 获取任务状态
-        if job.get('job_id'):
-            response = requests.get(f'{FLINK_REST_URL}/jobs/{job["job_id"]}')
-            if response.status_code == 200:
-                job_data = response.json()
-                state = job_data.get('state', 'UNKNOWN')
-                previous_status = job.get('last_status', '')
-                
-                # 更新状态
-                job['status'] = state
-                
-                # 对于 RUNNING 状态，每次轮询都添加日志，让用户知道任务在运行
-                if state == 'RUNNING':
-                    job['logs'].append('任务正在运行中...')
-                    job['last_status'] = state
-                # 对于其他状态，只在状态变化时添加日志
-                elif state != previous_status:
-                    job['last_status'] = state
-                    if state == 'FINISHED':
-                        job['logs'].append('任务已完成！')
-                    elif state == 'FAILED':
-                        job['logs'].append('任务执行失败')
-                    elif state == 'CANCELED':
-                        job['logs'].append('任务已取消')
-        else:
-            # 没有 flink_job_id，返回无任务在执行
-            previous_status = job.get('last_status', '')
-            if previous_status != 'NO_JOB':
-                job['status'] = 'NO_JOB'
-                job['last_status'] = 'NO_JOB'
-                job['logs'].append('无任务在执行')
-            
-        job['last_update'] = get_shanghai_time().isoformat()
-    except Exception as e:
-        error_msg = f'监控错误: {str(e)}'
-        # 避免重复添加相同的错误日志
-        if not job.get('logs') or job['logs'][-1] != error_msg:
-            job['logs'].append(error_msg)
+        since = int(request.args.get('since', 0))
+    except ValueError:
+        return jsonify({'error': 'since 必须是整数'}), 400
     
-    # 只返回新增的日志（从上次返回的位置开始）
-    last_log_count = job.get('last_log_count', 0)
-    all_logs = job.get('logs', [])
-    new_logs = all_logs[last_log_count:]
+    ensure_flink_poller()
     
-    # 更新上次返回的日志数量
-    job['last_log_count'] = len(all_logs)
+    metrics = job.get('metrics') if is_local_job(job) else None
+    if metrics is None and job['status'] == 'RUNNING' and job.get('flink_job_id'):
+        metrics = JobMetricsBuffer(JOB_METRICS_HISTORY)
+        if is_local_job(job):
+            metrics = job.setdefault('metrics', metrics)
+        record_job_metrics(job['flink_job_id'], metrics)
+    
+    latest = metrics.latest if metrics else None
+    checkpoints = dict(latest['checkpoints']) if latest else None
+    if checkpoints:
+        checkpoints['lastCheckpointAge'] = checkpoint_age(checkpoints)
     
-    # 返回任务状态信息
     return jsonify({
         'jobId': job['job_id'],
+        'flinkJobId': job.get('flink_job_id'),
         'status': job['status'],
-        'logs': new_logs,  # 只返回新增的日志
-        'startTime': job.get('start_time'),
-        'lastUpdate': job.get('last_update')
+        'interval': JOB_METRICS_INTERVAL,
+        'samples': metrics.since(since) if metrics else [],
+        'lastSeq': metrics.last_seq if metrics else 0,
+        'collectedAt': latest['collectedAt'] if latest else None,
+        'vertices': latest['vertices'] if latest else [],
+        'bottleneck': latest['bottleneck'] if latest else None,
+        'checkpoints': checkpoints,
+        'error': metrics.error if metrics else None
     })
 
-@app.route('/api/stop-job/<job_id>', methods=['POST'])
-def stop_job(job_id):
-    """停止任务"""
-    if job_id not in jobs:
-        return jsonify({'error': '任务不存在'}), 404
-    
-    job = jobs[job_id]
-    flink_job_id = job.get('job_id')
-    
-    if not flink_job_id:
-        job['status'] = 'CANCELED'
-        job['logs'].append('任务已停止（无 Flink Job ID）')
-        return jsonify({'status': 'stopped'})
-    
-    try:
-        # 发送取消请求 - 使用 GET 方法访问 yarn-cancel 端点
-        cancel_url = f'{FLINK_REST_URL}/jobs/{flink_job_id}/yarn-cancel'
-        response = requests.get(cancel_url, timeout=30)
-        
-        if response.status_code not in [200, 202]:
-            # 如果 GET yarn-cancel 失败，尝试标准的 PATCH cancel 端点
-            cancel_url = f'{FLINK_REST_URL}/jobs/{flink_job_id}/cancel'
-            response = requests.patch(cancel_url, headers={'Content-Type': 'application/json'}, timeout=30)
-            
-            if response.status_code not in [200, 202]:
-                error_msg = f'取消 Flink 任务失败: HTTP {response.status_code}'
-                try:
-                    error_detail = response.json().get('errors', [])
-                    if error_detail:
-                        error_msg += f' - {error_detail[0] if isinstance(error_detail, list) else error_detail}'
-                except:
-                    error_msg += f' - {response.text[:200]}'
-                job['logs'].append(error_msg)
-                return jsonify({'error': error_msg}), 500
-        
-        job['logs'].append('已发送取消请求到 Flink 集群')
-        
-        # 等待任务真正取消，最多等待 30 秒
-        max_wait_time = 30
-        check_interval = 1
-        waited_time = 0
-        last_state = None
-        
-        while waited_time < max_wait_time:
-            try:
-                status_response = requests.get(f'{FLINK_REST_URL}/jobs/{flink_job_id}', timeout=5)
-                if status_response.status_code == 200:
-                    job_data = status_response.json()
-                    state = job_data.get('state', 'UNKNOWN')
-                    
-                    # 只在状态变化时记录日志，避免重复
-                    if state != last_state:
-                        last_state = state
-                        if state in ['CANCELED', 'FAILED', 'FINISHED']:
-                            job['status'] = state
-                            job['logs'].append(f'任务已成功取消，最终状态: {state}')
-                            break
-                        elif state == 'CANCELLING':
-                            job['logs'].append('任务正在取消中...')
-                    elif state in ['CANCELED', 'FAILED', 'FINISHED']:
-                        break
-                elif status_response.status_code == 404:
-                    # 任务不存在，可能已经取消
-                    job['logs'].append('任务已不存在，可能已成功取消')
-                    break
-            except requests.exceptions.RequestException:
-                # 请求失败，可能任务已经不存在
-                if waited_time > 5:  # 至少等待 5 秒后再判断
-                    job['logs'].append('无法连接到 Flink REST API，可能任务已取消')
-                    break
-            
-            time.sleep(check_interval)
-            waited_time += check_interval
-        
-        if waited_time >= max_wait_time and job.get('status') not in ['CANCELED', 'FAILED', 'FINISHED']:
-            job['logs'].append('等待任务取消超时，但取消请求已发送')
-        
-        # 终止进程（如果存在）
-        if job.get('process'):
-            try:
-                job['process'].terminate()
-                try:
-                    job['process'].wait(timeout=5)
-                except subprocess.TimeoutExpired:
-                    job['process'].kill()
-            except Exception as e:
-                job['logs'].append(f'终止进程时出错: {str(e)}')
-        
-        # 更新状态为已取消
-        if job.get('status') not in ['CANCELED', 'FAILED', 'FINISHED']:
-            job['status'] = 'CANCELED'
-        
-        # 清理配置文件
-        config_file = job.get('config_file', '')
-        if config_file and os.path.exists(config_file):
-            try:
-                os.remove(config_file)
-            except Exception as e:
-                job['logs'].append(f'清理配置文件时出错: {str(e)}')
-        
-        return jsonify({'status': 'stopped'})
-        
-    except requests.exceptions.RequestException as e:
-        error_msg = f'请求 Flink REST API 失败: {str(e)}'
-        job['logs'].append(error_msg)
-        return jsonify({'error': error_msg}), 500
-    except Exception as e:
-        error_msg = f'停止任务时出错: {str(e)}'
-        job['logs'].append(error_msg)
-        return jsonify({'error': error_msg}), 500
-
 @app.route('/api/health', methods=['GET'])
 def health():
     """基础健康检查"""
@@ -376,10 +2341,12 @@ def health_starrocks():
         
         # 尝试连接并执行简单查询
         conn = get_starrocks_connection(starrocks_config)
-        with conn.cursor() as cursor:
-            cursor.execute('SELECT 1')
-            cursor.fetchone()
-        conn.close()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+        finally:
+            conn.close()
         
         return jsonify({
             'status': 'ok',
@@ -410,10 +2377,12 @@ def health_oceanbase():
         
         # 尝试连接并执行简单查询
         conn = get_oceanbase_connection(oceanbase_config)
-        with conn.cursor() as cursor:
-            cursor.execute('SELECT 1')
-            cursor.fetchone()
-        conn.close()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+        finally:
+            conn.close()
         
         return jsonify({
             'status': 'ok',
@@ -434,7 +2403,7 @@ def health_flink():
     try:
         # 检查 Flink REST API 是否可访问
         timeout = 5  # 5秒超时
-        response = requests.get(f'{FLINK_REST_URL}/overview', timeout=timeout)
+        response = flink_request('GET', '/overview', 'cluster_overview', timeout=timeout)
         
         if response.status_code == 200:
             return jsonify({
@@ -468,44 +2437,503 @@ def health_flink():
             'error': str(e)
         }), 503
 
+# 聚合健康检查：并发检查 Flink、StarRocks、OceanBase，结果缓存几秒，连续失败时熔断
+health_checker = HealthChecker(
+    cache_ttl=float(os.getenv('HEALTH_CACHE_TTL', '5')),
+    failure_threshold=int(os.getenv('HEALTH_FAILURE_THRESHOLD', '3')),
+    reset_timeout=float(os.getenv('HEALTH_RESET_TIMEOUT', '30'))
+)
+# 单次聚合检查最多等待的时间，超过时该依赖返回超时，探测线程在后台继续执行
+HEALTH_CHECK_TIMEOUT = 12
+health_executor = ThreadPoolExecutor(max_workers=6, thread_name_prefix='health')
+
+def probe_flink():
+    """检查 Flink REST API，返回提示信息，失败时抛出异常"""
+    response = flink_request('GET', '/overview', 'cluster_overview', timeout=5)
+    if response.status_code != 200:
+        raise Exception(f'Flink REST API 返回错误状态码: {response.status_code}')
+    overview = response.json()
+    return (f'Flink 集群运行正常（{overview.get("taskmanagers", 0)} 个 TaskManager，'
+            f'空闲 slot {overview.get("slots-available", 0)}/{overview.get("slots-total", 0)}）')
+
+def probe_database(engine, config):
+    """从连接池获取连接并执行 SELECT 1，返回提示信息，失败时抛出异常"""
+    connection = _pooled_connection(engine, config)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    finally:
+        connection.close()
+    return f'{"StarRocks" if engine == "starrocks" else "OceanBase"} 连接成功'
+
+@app.route('/api/health/all', methods=['POST'])
+def health_all():
+    """并发检查所有依赖（请求体传 starrocks 和 oceanbase 连接配置，未提供的不检查）"""
+    data = request.json or {}
+    checks = {'flink': (('flink', FLINK_REST_URL), probe_flink)}
+    for engine in ('starrocks', 'oceanbase'):
+        config = data.get(engine)
+        if not config:
+            continue
+        key = (engine, config.get('host'), str(config.get('port')),
+               MetadataCache.credential(config.get('username'), config.get('password')))
+        checks[engine] = (key, lambda engine=engine, config=config: probe_database(engine, config))
+    
+    futures = {name: health_executor.submit(health_checker.check, key, probe)
+               for name, (key, probe) in checks.items()}
+    deadline = time.monotonic() + HEALTH_CHECK_TIMEOUT
+    results = {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result(timeout=max(0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            results[name] = {'connected': False, 'error': f'检查超时（超过 {HEALTH_CHECK_TIMEOUT} 秒）', 'cached': False}
+        except Exception as e:
+            results[name] = {'connected': False, 'error': str(e), 'cached': False}
+    
+    healthy = all(result['connected'] for result in results.values())
+    return jsonify({'status': 'ok' if healthy else 'error', **results}), 200 if healthy else 503
+
+def _pool_key(engine, config):
+    """连接池分组的 key：(engine, host, port, user, database)"""
+    # database 字段可选，如果不存在则使用空字符串（连接但不选择数据库）
+    return (engine, config['host'], int(config['port']), config['username'], config.get('database', ''))
+
+def _pooled_connection(engine, config):
+    """从连接池获取连接，连接池按 (engine, host, port, user, database) 分组"""
+    key = _pool_key(engine, config)
+    _, host, port, user, database = key
+    password = config['password']
+
+    def connect():
+        with track_outbound(engine, 'connect'):
+            return pymysql.connect(
+                host=host,
+                port=port,
+                user=user,
+                password=password,
+                database=database if database else None,
+                charset='utf8mb4',
+                cursorclass=pymysql.cursors.DictCursor,
+                connect_timeout=10
+            )
+
+    return db_pool.acquire(key, password, connect)
+
 def get_starrocks_connection(config):
-    """获取 StarRocks 数据库连接"""
-    try:
-        # database 字段可选，如果不存在则使用空字符串（连接但不选择数据库）
-        database = config.get('database', '')
-        connection = pymysql.connect(
-            host=config['host'],
-            port=int(config['port']),
-            user=config['username'],
-            password=config['password'],
-            database=database if database else None,
-            charset='utf8mb4',
-            cursorclass=pymysql.cursors.DictCursor,
-            connect_timeout=10
-        )
-        return connection
+    """获取 StarRocks 数据库连接（来自连接池，close() 时归还）"""
+    try:
+        return _pooled_connection('starrocks', config)
     except Exception as e:
         raise Exception(f"连接 StarRocks 失败: {str(e)}")
 
 def get_oceanbase_connection(config):
-    """获取 OceanBase 数据库连接"""
-    try:
-        # database 字段可选，如果不存在则使用空字符串（连接但不选择数据库）
-        database = config.get('database', '')
-        connection = pymysql.connect(
-            host=config['host'],
-            port=int(config['port']),
-            user=config['username'],
-            password=config['password'],
-            database=database if database else None,
-            charset='utf8mb4',
-            cursorclass=pymysql.cursors.DictCursor,
-            connect_timeout=10
-        )
-        return connection
+    """获取 OceanBase 数据库连接（来自连接池，close() 时归还）"""
+    try:
+        return _pooled_connection('oceanbase', config)
     except Exception as e:
         raise Exception(f"连接 OceanBase 失败: {str(e)}")
 
+@app.route('/api/pool-stats', methods=['GET'])
+def pool_stats():
+    """获取数据库连接池统计信息"""
+    return jsonify(db_pool.stats())
+
+# 元数据缓存：数据库、表、列信息按集群缓存，SQL 控制台执行 DDL 后清除该集群的缓存
+metadata_cache = MetadataCache(
+    ttl=int(os.getenv('METADATA_CACHE_TTL', '300')),
+    max_entries=int(os.getenv('METADATA_CACHE_MAX_ENTRIES', '1000'))
+)
+
+def _metadata_cluster(db_type, config):
+    return (db_type, config['host'], int(config['port']))
+
+def _metadata_query(db_type, config, sql, params=None):
+    """在连接池的连接上执行元数据查询"""
+    connection = _pooled_connection(db_type, {**config, 'database': ''})
+    try:
+        with track_outbound(db_type, 'metadata'):
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                return cursor.fetchall()
+    finally:
+        connection.close()
+
+def _metadata_request():
+    """解析元数据接口的请求体，返回 (dbType, 连接配置, 请求体, 错误响应)"""
+    data = request.json or {}
+    db_type = data.get('dbType')
+    config = data.get('config')
+    if db_type not in ('starrocks', 'oceanbase'):
+        return None, None, None, (jsonify({'error': '不支持的数据库类型'}), 400)
+    if not config or not config.get('host') or not config.get('port'):
+        return None, None, None, (jsonify({'error': '数据库配置不能为空'}), 400)
+    return db_type, config, data, None
+
+def _cached_metadata(db_type, config, kind, database, table, loader, refresh):
+    """从缓存读取元数据，返回 (值, 缓存信息)"""
+    value, age = metadata_cache.get(
+        _metadata_cluster(db_type, config),
+        MetadataCache.credential(config.get('username'), config.get('password')),
+        kind, database, table, loader, refresh=refresh
+    )
+    return value, {'cached': age > 0, 'age': round(age, 1)}
+
+@app.route('/api/metadata/databases', methods=['POST'])
+def metadata_databases():
+    """获取数据库列表（带缓存，请求体传 refresh: true 时重新查询）"""
+    db_type, config, data, error = _metadata_request()
+    if error:
+        return error
+    
+    def load():
+        rows = _metadata_query(db_type, config, 'SHOW DATABASES')
+        return [next(iter(row.values())) for row in rows]
+    
+    try:
+        databases, cache_info = _cached_metadata(db_type, config, 'databases', None, None, load,
+                                                 bool(data.get('refresh')))
+        return jsonify({'databases': databases, **cache_info})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/metadata/tables', methods=['POST'])
+def metadata_tables():
+    """获取数据库中的表及其行数估计和数据大小（带缓存）"""
+    db_type, config, data, error = _metadata_request()
+    if error:
+        return error
+    database = data.get('database')
+    if not database:
+        return jsonify({'error': '请指定 database'}), 400
+    
+    def load():
+        rows = _metadata_query(
+            db_type, config,
+            'SELECT TABLE_NAME, TABLE_TYPE, TABLE_ROWS, DATA_LENGTH, TABLE_COMMENT FROM information_schema.tables '
+            'WHERE TABLE_SCHEMA = %s ORDER BY TABLE_NAME',
+            (database,)
+        )
+        return [{
+            'name': row['TABLE_NAME'],
+            'type': row['TABLE_TYPE'],
+            'rows': row['TABLE_ROWS'],
+            'dataSize': row['DATA_LENGTH'],
+            'comment': row['TABLE_COMMENT']
+        } for row in rows]
+    
+    try:
+        tables, cache_info = _cached_metadata(db_type, config, 'tables', database, None, load,
+                                              bool(data.get('refresh')))
+        return jsonify({'database': database, 'tables': tables, **cache_info})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/metadata/columns', methods=['POST'])
+def metadata_columns():
+    """获取表的列信息（带缓存）"""
+    db_type, config, data, error = _metadata_request()
+    if error:
+        return error
+    database = data.get('database')
+    table = data.get('table')
+    if not database or not table:
+        return jsonify({'error': '请指定 database 和 table'}), 400
+    
+    def load():
+        rows = _metadata_query(
+            db_type, config,
+            'SELECT COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, COLUMN_KEY, COLUMN_DEFAULT, COLUMN_COMMENT '
+            'FROM information_schema.columns WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s ORDER BY ORDINAL_POSITION',
+            (database, table)
+        )
+        return [{
+            'name': row['COLUMN_NAME'],
+            'type': row['COLUMN_TYPE'],
+            'nullable': row['IS_NULLABLE'] == 'YES',
+            'key': row['COLUMN_KEY'],
+            'default': row['COLUMN_DEFAULT'],
+            'comment': row['COLUMN_COMMENT']
+        } for row in rows]
+    
+    try:
+        columns, cache_info = _cached_metadata(db_type, config, 'columns', database, table, load,
+                                               bool(data.get('refresh')))
+        return jsonify({'database': database, 'table': table, 'columns': columns, **cache_info})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/metadata/invalidate', methods=['POST'])
+def metadata_invalidate():
+    """清除元数据缓存：只传连接配置时清除整个集群，可以指定 database 和 table 缩小范围"""
+    db_type, config, data, error = _metadata_request()
+    if error:
+        return error
+    removed = metadata_cache.invalidate(_metadata_cluster(db_type, config), data.get('database'), data.get('table'))
+    return jsonify({'invalidated': removed})
+
+@app.route('/api/metadata/stats', methods=['GET'])
+def metadata_stats():
+    """获取元数据缓存统计信息"""
+    return jsonify(metadata_cache.stats())
+
+USE_STATEMENT_PATTERN = re.compile(r'^USE\s+', re.IGNORECASE)
+SESSION_STATEMENT_PATTERN = re.compile(r'^(USE|SET)\s+', re.IGNORECASE)
+# 会修改库表结构（或表的行数）的语句，执行后清除元数据缓存
+DDL_STATEMENT_PATTERN = re.compile(r'^(CREATE|DROP|ALTER|RENAME|TRUNCATE)\s+', re.IGNORECASE)
+
+# 流式查询配置：单次最多返回的行数和每个分块的行数
+SQL_STREAM_MAX_ROWS = int(os.getenv('SQL_STREAM_MAX_ROWS', '100000'))
+SQL_STREAM_CHUNK_ROWS = int(os.getenv('SQL_STREAM_CHUNK_ROWS', '500'))
+
+def is_query_statement(sql):
+    """判断语句是否是返回结果集的查询语句"""
+    sql_upper = sql.strip().upper()
+    return sql_upper.startswith(('SELECT', 'DESC', 'DESCRIBE', 'SHOW'))
+
+def stream_query_results(connection, sql, max_rows, chunk_rows):
+    """使用非缓冲的服务端游标执行查询，按 NDJSON 分块返回结果
+
+    每行一个 JSON 对象：
+    - {"type": "meta", "columns": [...]}
+    - {"type": "rows", "rows": [...]}（每 chunk_rows 行一块）
+    - {"type": "end", "rowCount": n, "truncated": bool} 或 {"type": "error", "error": "..."}
+
+    连接在流结束时归还；客户端在第一块之前断开或响应没有被迭代时，生成器的 finally 不会执行，
+    由响应关闭时的回调归还
+    """
+    state = {'drained': False, 'released': False}
+
+    def release():
+        if state['released']:
+            return
+        state['released'] = True
+        if not state['drained']:
+            # 结果集没有读完（超出行数上限、出错或客户端断开），
+            # 关闭非缓冲游标会把剩余的行全部读完，直接丢弃连接
+            connection.mark_dirty()
+        connection.close()
+
+    def generate():
+        cursor = connection.cursor(pymysql.cursors.SSDictCursor)
+        row_count = 0
+        drained = False
+        try:
+            with track_outbound(connection.engine, 'query'):
+                cursor.execute(sql)
+            columns = [desc[0] for desc in cursor.description] if cursor.description else []
+            yield app.json.dumps({'type': 'meta', 'columns': columns}) + '\n'
+
+            while row_count < max_rows:
+                rows = cursor.fetchmany(min(chunk_rows, max_rows - row_count))
+                if not rows:
+                    drained = True
+                    break
+                row_count += len(rows)
+                yield app.json.dumps({'type': 'rows', 'rows': rows}) + '\n'
+
+            if not drained:
+                drained = cursor.fetchone() is None
+            yield app.json.dumps({'type': 'end', 'rowCount': row_count, 'truncated': not drained}) + '\n'
+        except Exception as e:
+            yield app.json.dumps({'type': 'error', 'error': str(e)}) + '\n'
+        finally:
+            state['drained'] = drained
+            if drained:
+                cursor.close()
+            release()
+
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.call_on_close(release)
+    return response
+
+# 分页查询配置：打开的服务端游标在空闲超过该时间后自动关闭
+SQL_CURSOR_IDLE_TIMEOUT = int(os.getenv('SQL_CURSOR_IDLE_TIMEOUT', '120'))
+# 每个连接池分组同时打开的分页查询上限，每个分页查询占用一个连接，
+# 上限必须小于连接池大小，给普通查询和健康检查留出连接
+SQL_CURSOR_MAX_OPEN = min(int(os.getenv('SQL_CURSOR_MAX_OPEN', str(max(1, db_pool.max_size // 2)))),
+                          max(1, db_pool.max_size - 1))
+SQL_PAGE_MAX_SIZE = 10000
+
+# 分页查询打开的服务端游标，key 为返回给前端的 continuation token
+query_cursors = {}
+# 每个连接池分组已占用的分页查询名额（包括正在打开的）
+query_cursor_counts = {}
+query_cursors_lock = threading.Lock()
+query_cursor_reaper = None
+
+class QueryCursorLimitError(Exception):
+    """同一个连接池分组打开的分页查询过多"""
+
+def _reserve_query_cursor(pool_key):
+    """占用一个分页查询名额，在从连接池获取连接之前调用"""
+    with query_cursors_lock:
+        count = query_cursor_counts.get(pool_key, 0)
+        if count >= SQL_CURSOR_MAX_OPEN:
+            raise QueryCursorLimitError(
+                f'该数据库打开的分页查询过多（最多 {SQL_CURSOR_MAX_OPEN} 个），请先关闭不再使用的查询')
+        query_cursor_counts[pool_key] = count + 1
+
+def _release_query_cursor(pool_key):
+    with query_cursors_lock:
+        count = query_cursor_counts.get(pool_key, 0) - 1
+        if count > 0:
+            query_cursor_counts[pool_key] = count
+        else:
+            query_cursor_counts.pop(pool_key, None)
+
+def _close_query_cursor(entry):
+    """关闭分页游标、释放连接和名额，重复调用时只关闭一次"""
+    if entry['closed']:
+        return
+    entry['closed'] = True
+    if not entry['drained']:
+        # 结果集没有读完，关闭非缓冲游标会读完剩余所有行，直接丢弃连接
+        entry['connection'].mark_dirty()
+    else:
+        try:
+            entry['cursor'].close()
+        except Exception:
+            pass
+    entry['connection'].close()
+    _release_query_cursor(entry['pool_key'])
+
+def _reap_idle_query_cursors():
+    """后台线程：关闭空闲超时的分页游标"""
+    while True:
+        time.sleep(max(1, SQL_CURSOR_IDLE_TIMEOUT // 4))
+        now = time.monotonic()
+        entries = []
+        with query_cursors_lock:
+            for token, entry in list(query_cursors.items()):
+                # 持有游标的锁后再移除，正在翻页的游标跳过，翻页请求拿到锁后会发现游标已关闭
+                if now - entry['last_access'] > SQL_CURSOR_IDLE_TIMEOUT and entry['lock'].acquire(blocking=False):
+                    query_cursors.pop(token)
+                    entries.append(entry)
+        for entry in entries:
+            try:
+                _close_query_cursor(entry)
+            finally:
+                entry['lock'].release()
+
+def _ensure_query_cursor_reaper():
+    global query_cursor_reaper
+    with query_cursors_lock:
+        if query_cursor_reaper is None:
+            query_cursor_reaper = threading.Thread(target=_reap_idle_query_cursors, daemon=True)
+            query_cursor_reaper.start()
+
+def _fetch_query_page(entry, token, page_size):
+    """从分页游标读取一页数据，多读一行用于判断是否还有下一页"""
+    rows = entry.pop('pending', [])
+    if len(rows) < page_size + 1 and not entry['drained']:
+        fetched = entry['cursor'].fetchmany(page_size + 1 - len(rows))
+        if len(fetched) < page_size + 1 - len(rows):
+            entry['drained'] = True
+        rows.extend(fetched)
+
+    has_more = len(rows) > page_size
+    if has_more:
+        entry['pending'] = rows[page_size:]
+        rows = rows[:page_size]
+
+    offset = entry['offset']
+    entry['offset'] += len(rows)
+    entry['last_access'] = time.monotonic()
+    return {
+        'success': True,
+        'columns': entry['columns'],
+        'rows': rows,
+        'rowCount': len(rows),
+        'offset': offset,
+        'hasMore': has_more,
+        'nextToken': token if has_more else None
+    }
+
+def open_query_page(connection, pool_key, sql, page_size):
+    """在服务端游标上执行查询并返回第一页，还有数据时保留游标并返回 continuation token
+
+    调用前需要先用 _reserve_query_cursor 占用名额，连接和名额都由这里负责释放
+    """
+    entry = {
+        'connection': connection,
+        'pool_key': pool_key,
+        'cursor': None,
+        'columns': [],
+        'offset': 0,
+        'page_size': page_size,
+        'drained': False,
+        'closed': False,
+        'lock': threading.Lock(),
+        'last_access': time.monotonic()
+    }
+    token = uuid.uuid4().hex
+    try:
+        entry['cursor'] = connection.cursor(pymysql.cursors.SSDictCursor)
+        with track_outbound(connection.engine, 'query'):
+            entry['cursor'].execute(sql)
+        entry['columns'] = [desc[0] for desc in entry['cursor'].description] if entry['cursor'].description else []
+        page = _fetch_query_page(entry, token, page_size)
+    except Exception:
+        _close_query_cursor(entry)
+        raise
+
+    if page['hasMore']:
+        with query_cursors_lock:
+            query_cursors[token] = entry
+        _ensure_query_cursor_reaper()
+    else:
+        _close_query_cursor(entry)
+    return page
+
+@app.route('/api/execute-sql/next', methods=['POST'])
+def execute_sql_next():
+    """根据 continuation token 获取分页查询的下一页，复用已打开的服务端游标"""
+    data = request.json or {}
+    token = data.get('token')
+    with query_cursors_lock:
+        entry = query_cursors.get(token)
+    if not entry:
+        return jsonify({'error': '分页查询不存在或已超时关闭，请重新执行查询'}), 404
+
+    try:
+        page_size = int(data.get('pageSize') or entry['page_size'])
+    except (TypeError, ValueError):
+        return jsonify({'error': 'pageSize 必须是整数'}), 400
+    if page_size <= 0 or page_size > SQL_PAGE_MAX_SIZE:
+        return jsonify({'error': f'pageSize 必须在 1 到 {SQL_PAGE_MAX_SIZE} 之间'}), 400
+
+    with entry['lock']:
+        if entry['closed']:
+            return jsonify({'error': '分页查询不存在或已超时关闭，请重新执行查询'}), 404
+        try:
+            page = _fetch_query_page(entry, token, page_size)
+        except Exception as e:
+            entry['drained'] = False
+            page = None
+            error = str(e)
+
+        if page is None or not page['hasMore']:
+            with query_cursors_lock:
+                query_cursors.pop(token, None)
+            _close_query_cursor(entry)
+
+    if page is None:
+        return jsonify({'error': error}), 500
+    return jsonify(page)
+
+@app.route('/api/execute-sql/close', methods=['POST'])
+def execute_sql_close():
+    """关闭分页查询，释放服务端游标和连接"""
+    data = request.json or {}
+    with query_cursors_lock:
+        entry = query_cursors.pop(data.get('token'), None)
+    if entry:
+        with entry['lock']:
+            _close_query_cursor(entry)
+    return jsonify({'status': 'closed'})
+
 @app.route('/api/execute-sql', methods=['POST'])
 def execute_sql():
     """执行 SQL 查询"""
@@ -514,40 +2942,99 @@ def execute_sql():
         db_type = data.get('dbType')  # 'starrocks' or 'oceanbase'
         sql = data.get('sql')
         db_config = data.get('config')
+        stream = bool(data.get('stream'))
+        page_size = data.get('pageSize')
         
         if not sql or not sql.strip():
             return jsonify({'error': 'SQL 语句不能为空'}), 400
         
+        try:
+            max_rows = int(data.get('maxRows') or SQL_STREAM_MAX_ROWS)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'maxRows 必须是整数'}), 400
+        if max_rows <= 0:
+            return jsonify({'error': 'maxRows 必须大于 0'}), 400
+        
+        if page_size is not None:
+            try:
+                page_size = int(page_size)
+            except (TypeError, ValueError):
+                return jsonify({'error': 'pageSize 必须是整数'}), 400
+            if page_size <= 0 or page_size > SQL_PAGE_MAX_SIZE:
+                return jsonify({'error': f'pageSize 必须在 1 到 {SQL_PAGE_MAX_SIZE} 之间'}), 400
+        
         if not db_config:
             return jsonify({'error': '数据库配置不能为空'}), 400
         
-        # 获取数据库连接
-        if db_type == 'starrocks':
-            connection = get_starrocks_connection(db_config)
-        elif db_type == 'oceanbase':
-            connection = get_oceanbase_connection(db_config)
-        else:
+        if db_type not in ('starrocks', 'oceanbase'):
             return jsonify({'error': '不支持的数据库类型'}), 400
         
+        # 支持多语句执行（用分号分隔）
+        statements = [s.strip() for s in sql.split(';') if s.strip()]
+        
+        if not statements:
+            return jsonify({'error': 'SQL 语句不能为空'}), 400
+        
+        # 开头的 USE database 直接作为连接池分组的 database，
+        # 这样池中连接的默认库不会被修改，可以继续复用
+        while len(statements) > 1 and USE_STATEMENT_PATTERN.match(statements[0]):
+            database = statements.pop(0)[3:].strip().strip('`')
+            db_config = {**db_config, 'database': database}
+        
+        # 分页模式下先占用分页查询名额，超过上限时不再从连接池获取连接
+        paged = bool(page_size) and is_query_statement(statements[-1])
+        pool_key = None
+        if paged:
+            pool_key = _pool_key(db_type, db_config)
+            try:
+                _reserve_query_cursor(pool_key)
+            except QueryCursorLimitError as e:
+                return jsonify({'error': str(e)}), 429
+        
+        # 获取数据库连接
+        try:
+            if db_type == 'starrocks':
+                connection = get_starrocks_connection(db_config)
+            else:
+                connection = get_oceanbase_connection(db_config)
+        except Exception:
+            if paged:
+                _release_query_cursor(pool_key)
+            raise
+        
+        handed_off = False
+        has_ddl = any(DDL_STATEMENT_PATTERN.match(stmt) for stmt in statements)
         try:
             with connection.cursor() as cursor:
-                # 支持多语句执行（用分号分隔）
-                statements = [s.strip() for s in sql.split(';') if s.strip()]
-                
-                if not statements:
-                    return jsonify({'error': 'SQL 语句不能为空'}), 400
+                # USE / SET 会修改会话状态，这样的连接用完后不再放回连接池
+                if any(SESSION_STATEMENT_PATTERN.match(stmt) for stmt in statements):
+                    connection.mark_dirty()
                 
-                # 执行前面的语句（如 USE database）
+                # 执行前面的语句
                 for stmt in statements[:-1]:
-                    cursor.execute(stmt)
-                
+                    with track_outbound(db_type, 'query'):
+                        cursor.execute(stmt)
+            
+            final_sql = statements[-1]
+            
+            # 流式模式和分页模式下连接交给服务端游标，由它们负责归还
+            # 流式模式：查询结果由服务端游标分块返回，连接在流结束后归还
+            if stream and is_query_statement(final_sql):
+                handed_off = True
+                return stream_query_results(connection, final_sql, max_rows, SQL_STREAM_CHUNK_ROWS)
+            
+            # 分页模式：返回第一页和 continuation token，游标保持打开供后续翻页
+            if paged:
+                handed_off = True
+                return jsonify(open_query_page(connection, pool_key, final_sql, page_size))
+            
+            with connection.cursor() as cursor:
                 # 执行最后一条语句（实际的 SQL）
-                final_sql = statements[-1]
-                cursor.execute(final_sql)
+                with track_outbound(db_type, 'query'):
+                    cursor.execute(final_sql)
                 
                 # 判断最后一条语句是否是查询语句
-                sql_upper = final_sql.strip().upper()
-                if sql_upper.startswith('SELECT') or sql_upper.startswith('DESC') or sql_upper.startswith('DESCRIBE') or sql_upper.startswith('SHOW'):
+                if is_query_statement(final_sql):
                     # 查询语句，返回结果
                     results = cursor.fetchall()
                     columns = [desc[0] for desc in cursor.description] if cursor.description else []
@@ -568,11 +3055,63 @@ def execute_sql():
                         'affectedRows': affected_rows
                     })
         finally:
-            connection.close()
+            if not handed_off:
+                connection.close()
+                if paged:
+                    _release_query_cursor(pool_key)
+            if has_ddl:
+                # 执行失败时前面的 DDL 也可能已经生效，同样清除缓存
+                metadata_cache.invalidate(_metadata_cluster(db_type, db_config))
             
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def observe_request_duration(response):
+    """按路由模板记录请求耗时，未匹配的路径统一记为 unmatched"""
+    start = g.pop('request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, method=request.method,
+                                      route=route, status=response.status_code)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """以 Prometheus 文本格式输出指标，任务数和连接池状态在抓取时计算"""
+    JOBS_BY_STATUS.clear()
+    for status, total in job_store.count_by_status().items():
+        JOBS_BY_STATUS.set(total, status=status)
+    
+    SUBMIT_QUEUE_LENGTH.set(queued_job_count())
+    ADMISSION_QUEUE_LENGTH.set(waiting_job_count())
+    
+    DB_POOL_CONNECTIONS.clear()
+    DB_POOL_EVENTS.clear()
+    pool = {}
+    for item in db_pool.stats()['pools']:
+        # 按 (engine, host, port) 汇总，不同用户和数据库的分组合并统计
+        key = (item['engine'], item['host'], item['port'])
+        totals = pool.setdefault(key, dict.fromkeys(('idle', 'inUse', 'created', 'reused', 'evicted', 'waits'), 0))
+        for name in totals:
+            totals[name] += item[name]
+    for (engine, host, port), totals in pool.items():
+        DB_POOL_CONNECTIONS.set(totals['idle'], engine=engine, host=host, port=port, state='idle')
+        DB_POOL_CONNECTIONS.set(totals['inUse'], engine=engine, host=host, port=port, state='in_use')
+        for event in ('created', 'reused', 'evicted', 'waits'):
+            DB_POOL_EVENTS.set(totals[event], engine=engine, host=host, port=port, event=event)
+    
+    return Response(metrics_registry.render(), mimetype=None, content_type=MetricsRegistry.CONTENT_TYPE)
+
+# 加载应用时就启动后台轮询，没有收到请求的进程也会与注册表和 Flink 集群对账，接管已退出进程遗留的任务；
+# debug 模式下 reloader 的父进程不处理请求，只在实际运行应用的子进程中启动后台线程
+if __name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+    ensure_flink_poller()
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
 
@@ -0,0 +1,75 @@
+# Flink 反压等级的划分：反压时间占比 10% 以下为 ok，10%~50% 为 low，50% 以上为 high
+BACKPRESSURE_HIGH_RATIO = 0.5
+# 繁忙时间占比超过该值的算子认为处理能力已经用满
+BUSY_RATIO_THRESHOLD = 0.5
+
+SIDE_NAMES = {
+    'source': 'StarRocks 读取',
+    'sink': 'OceanBase 写入',
+    'chained': 'StarRocks 读取和 OceanBase 写入',
+    'operator': '中间处理'
+}
+
+
+def vertex_side(vertex):
+    """算子属于读取端、写入端还是中间处理；source 和 sink 链接成一个算子时无法区分"""
+    if vertex['source'] and vertex['sink']:
+        return 'chained'
+    if vertex['source']:
+        return 'source'
+    if vertex['sink']:
+        return 'sink'
+    return 'operator'
+
+
+def find_bottleneck(vertices, upstreams):
+    """找出限制吞吐量的算子，没有明显瓶颈时返回 None
+
+    vertices 按上游到下游的顺序排列，需要包含 busyRatio 和 backPressuredRatio（各并行子任务中的最大值）；
+    upstreams 为 {算子 ID: [上游算子 ID, ...]}。
+    瓶颈是处理能力用满（繁忙）但自身没有被反压的算子：它的上游因为等待它而被反压，
+    没有算子被反压时，繁忙的 source 说明读取速度是上限
+    """
+    by_id = {vertex['id']: vertex for vertex in vertices}
+
+    def backpressured(vertex):
+        return (vertex.get('backPressuredRatio') or 0) >= BACKPRESSURE_HIGH_RATIO
+
+    candidates = []
+    for vertex in vertices:
+        if backpressured(vertex) or (vertex.get('busyRatio') or 0) < BUSY_RATIO_THRESHOLD:
+            continue
+        blocked = [by_id[upstream] for upstream in upstreams.get(vertex['id'], [])
+                   if upstream in by_id and backpressured(by_id[upstream])]
+        if blocked or vertex['source']:
+            candidates.append((vertex, blocked))
+    if not candidates:
+        return None
+
+    vertex, blocked = max(candidates, key=lambda item: (bool(item[1]), item[0]['busyRatio']))
+    side = vertex_side(vertex)
+    reason = f'繁忙时间占比 {vertex["busyRatio"]:.0%}'
+    if blocked:
+        reason += '，上游 ' + '、'.join(
+            f'{upstream["name"]} 反压 {upstream["backPressuredRatio"]:.0%}' for upstream in blocked)
+    elif side == 'source':
+        reason += '，下游没有反压，读取速度是吞吐量上限'
+    if side == 'chained':
+        reason += '；source 和 sink 链接在同一个算子中，无法区分是读取还是写入较慢'
+    return {
+        'vertexId': vertex['id'],
+        'name': vertex['name'],
+        'side': side,
+        'sideName': SIDE_NAMES[side],
+        'busyRatio': vertex['busyRatio'],
+        'reason': reason
+    }
+
+
+def sink_backpressure(vertices, upstreams):
+    """写入端造成的反压：sink 算子的直接上游中最大的反压时间占比，没有上游时返回 None"""
+    by_id = {vertex['id']: vertex for vertex in vertices}
+    ratios = [by_id[upstream].get('backPressuredRatio') or 0
+              for vertex in vertices if vertex['sink'] and not vertex['source']
+              for upstream in upstreams.get(vertex['id'], []) if upstream in by_id]
+    return max(ratios) if ratios else None
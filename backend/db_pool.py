@@ -0,0 +1,247 @@
+import hashlib
+import threading
+import time
+
+
+class PoolExhaustedError(Exception):
+    """连接池已满且在等待时间内没有可用连接"""
+
+
+class _IdleConnection:
+    """连接池中空闲的原始连接"""
+
+    def __init__(self, raw, created_at, password_digest):
+        self.raw = raw
+        self.created_at = created_at
+        self.password_digest = password_digest
+        self.last_used = time.monotonic()
+
+
+class PooledConnection:
+    """连接池中的连接包装，close() 时归还连接池而不是真正断开
+
+    每次从连接池获取连接都会生成新的包装，归还后旧的包装即使再次调用 close() 也不会影响其他使用者
+    """
+
+    def __init__(self, pool, key, raw, password_digest, created_at=None):
+        self._pool = pool
+        self._key = key
+        self._raw = raw
+        self._password_digest = password_digest
+        self._released = False
+        self._dirty = False
+        self.created_at = created_at or time.monotonic()
+
+    def __getattr__(self, name):
+        if self._raw is None:
+            raise RuntimeError('连接已归还连接池，不能再使用')
+        return getattr(self._raw, name)
+
+    @property
+    def engine(self):
+        return self._key[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def mark_dirty(self):
+        """标记会话状态已被修改（如执行了 USE），归还时直接关闭不再复用"""
+        self._dirty = True
+
+    def close(self):
+        """归还连接到连接池"""
+        if self._released:
+            return
+        self._released = True
+        self._pool._release(self)
+
+
+class _KeyPool:
+    """同一个 (engine, host, port, user, database) 下的连接集合
+
+    password_digest 是最近一次成功建立连接时使用的密码，只有用这个密码建立的连接才会放回空闲列表
+    """
+
+    def __init__(self):
+        self.password_digest = None
+        self.idle = []
+        self.in_use = 0
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+        self.waits = 0
+
+
+class ConnectionPool:
+    """按 (engine, host, port, user, database) 分组的数据库连接池
+
+    - 每组最多 max_size 个连接（空闲 + 使用中）
+    - 空闲超过 idle_timeout 秒的连接会被回收
+    - 复用空闲连接前先 ping 检查连接是否存活
+    """
+
+    def __init__(self, max_size=8, idle_timeout=300, acquire_timeout=10):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+        self._pools = {}
+        self._cond = threading.Condition()
+
+    @staticmethod
+    def _digest(password):
+        return hashlib.sha256((password or '').encode('utf-8')).hexdigest()
+
+    def acquire(self, key, password, connect):
+        """从连接池获取连接，没有可用的空闲连接时调用 connect() 新建"""
+        digest = self._digest(password)
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._cond:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = self._pools[key] = _KeyPool()
+
+            while True:
+                self._evict_expired(pool)
+                # 只复用用同一个密码建立的连接，密码错误的请求不能拿到其他人已认证的连接
+                conn = next((c for c in reversed(pool.idle) if c.password_digest == digest), None)
+                if conn is not None:
+                    pool.idle.remove(conn)
+                    pool.in_use += 1
+                    break
+                if pool.in_use + len(pool.idle) < self.max_size:
+                    pool.in_use += 1
+                    break
+                if pool.idle:
+                    # 连接数已满但空闲连接都不能复用，关闭最早的一个腾出位置
+                    self._close_idle(pool, [pool.idle[0]])
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolExhaustedError(
+                        f'连接池已满（最大 {self.max_size} 个连接），等待 {self.acquire_timeout} 秒后仍无可用连接')
+                pool.waits += 1
+                self._cond.wait(remaining)
+
+        # 网络操作放在锁外执行
+        if conn is not None:
+            if self._is_alive(conn.raw):
+                with self._cond:
+                    pool.reused += 1
+                return PooledConnection(self, key, conn.raw, digest, conn.created_at)
+            self._close_raw(conn.raw)
+            with self._cond:
+                pool.evicted += 1
+
+        try:
+            raw = connect()
+        except Exception:
+            with self._cond:
+                pool.in_use -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            pool.created += 1
+            if pool.password_digest != digest:
+                # 新密码连接成功后，用旧密码建立的空闲连接不再复用
+                pool.password_digest = digest
+                self._close_idle(pool, [c for c in pool.idle if c.password_digest != digest])
+        return PooledConnection(self, key, raw, digest)
+
+    def _release(self, conn):
+        raw = conn._raw
+        # 断开包装与原始连接的关联，已归还的包装不能再使用这个连接
+        conn._raw = None
+        reusable = not conn._dirty
+        if reusable:
+            try:
+                # 结束未提交的事务，避免把事务状态带给下一个使用者
+                raw.rollback()
+            except Exception:
+                reusable = False
+
+        with self._cond:
+            pool = self._pools.get(conn._key)
+            if pool is None:
+                reusable = False
+            else:
+                pool.in_use -= 1
+                # 密码已经变化的连接直接关闭
+                reusable = reusable and conn._password_digest == pool.password_digest
+                if reusable:
+                    pool.idle.append(_IdleConnection(raw, conn.created_at, conn._password_digest))
+                else:
+                    pool.evicted += 1
+            self._cond.notify()
+
+        if not reusable:
+            self._close_raw(raw)
+
+    def _is_alive(self, raw):
+        try:
+            raw.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _evict_expired(self, pool):
+        now = time.monotonic()
+        expired = [c for c in pool.idle if now - c.last_used > self.idle_timeout]
+        if expired:
+            self._close_idle(pool, expired)
+
+    def _close_idle(self, pool, conns):
+        for conn in conns:
+            pool.idle.remove(conn)
+            pool.evicted += 1
+            self._close_raw(conn.raw)
+
+    @staticmethod
+    def _close_raw(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def evict_idle(self):
+        """回收所有分组中空闲超时的连接"""
+        with self._cond:
+            for pool in self._pools.values():
+                self._evict_expired(pool)
+
+    def close_all(self):
+        """关闭所有空闲连接"""
+        with self._cond:
+            for pool in self._pools.values():
+                self._close_idle(pool, list(pool.idle))
+
+    def stats(self):
+        """返回连接池统计信息"""
+        with self._cond:
+            for pool in self._pools.values():
+                self._evict_expired(pool)
+            pools = []
+            for (engine, host, port, user, database), pool in self._pools.items():
+                pools.append({
+                    'engine': engine,
+                    'host': host,
+                    'port': port,
+                    'user': user,
+                    'database': database,
+                    'idle': len(pool.idle),
+                    'inUse': pool.in_use,
+                    'created': pool.created,
+                    'reused': pool.reused,
+                    'evicted': pool.evicted,
+                    'waits': pool.waits
+                })
+            return {
+                'maxSize': self.max_size,
+                'idleTimeout': self.idle_timeout,
+                'acquireTimeout': self.acquire_timeout,
+                'totalIdle': sum(p['idle'] for p in pools),
+                'totalInUse': sum(p['inUse'] for p in pools),
+                'pools': pools
+            }
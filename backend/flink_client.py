@@ -0,0 +1,87 @@
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# GET 请求遇到这些状态码时重试（JobManager 重启或前面的代理暂时不可用）
+RETRY_STATUS_CODES = (502, 503, 504)
+
+
+class _InFlight:
+    """正在进行的 GET 请求，相同请求的其他调用方等待并共享结果"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class FlinkClient:
+    """Flink REST API 客户端
+
+    - 所有请求共用一个 Session，保持与 JobManager 的长连接
+    - 每个请求都有连接超时和读取超时，调用方传入的 timeout 作为读取超时
+    - GET 请求在连接失败、超时或返回 502/503/504 时按随机退避重试
+    - 同时发起的相同 GET 请求只向 JobManager 发送一次，调用方共享同一个响应
+    """
+
+    def __init__(self, base_url, connect_timeout=3, read_timeout=10, get_retries=2,
+                 retry_backoff=0.2, pool_size=10):
+        self.base_url = base_url.rstrip('/')
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.get_retries = get_retries
+        self.retry_backoff = retry_backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def request(self, method, path, timeout=None, **kwargs):
+        """发送请求并返回 Response，网络错误时抛出 requests 的异常"""
+        timeout = (self.connect_timeout, timeout or self.read_timeout)
+        if method.upper() != 'GET':
+            return self.session.request(method, self.base_url + path, timeout=timeout, **kwargs)
+
+        key = (path, repr(sorted(kwargs.get('params', {}).items())), repr(kwargs.get('headers')))
+        with self._lock:
+            in_flight = self._in_flight.get(key)
+            leader = in_flight is None
+            if leader:
+                in_flight = self._in_flight[key] = _InFlight()
+
+        if not leader:
+            in_flight.done.wait()
+            if in_flight.error is not None:
+                raise in_flight.error
+            return in_flight.response
+
+        try:
+            in_flight.response = self._get_with_retry(path, timeout, **kwargs)
+            return in_flight.response
+        except Exception as e:
+            in_flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            in_flight.done.set()
+
+    def _get_with_retry(self, path, timeout, **kwargs):
+        for attempt in range(self.get_retries + 1):
+            last_attempt = attempt == self.get_retries
+            try:
+                response = self.session.get(self.base_url + path, timeout=timeout, **kwargs)
+                # 先读完响应体，共享给其他调用方时不会并发读取连接
+                response.content
+                if response.status_code not in RETRY_STATUS_CODES or last_attempt:
+                    return response
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if last_attempt:
+                    raise
+            # 指数退避加随机抖动，避免多个进程同时重试
+            time.sleep(random.uniform(0, self.retry_backoff * (2 ** attempt)))
@@ -0,0 +1,124 @@
+import threading
+import time
+
+
+class CircuitBreaker:
+    """连续失败 failure_threshold 次后熔断，reset_timeout 秒内直接返回失败
+
+    熔断时间过后进入半开状态，只放行一次探测：成功则恢复，失败则继续熔断
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return 'open'
+        return 'half_open'
+
+    def allow(self):
+        """是否允许发起请求"""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def retry_after(self):
+        """熔断状态下距离下次允许探测的秒数"""
+        if self.opened_at is None:
+            return 0
+        return max(0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class HealthChecker:
+    """依赖的健康检查：结果缓存 cache_ttl 秒，连续失败时熔断
+
+    同一个依赖同时只执行一次探测，其他请求等待并共享结果，
+    依赖不可用时不会有大量线程阻塞在连接超时上
+    """
+
+    def __init__(self, cache_ttl=5, failure_threshold=3, reset_timeout=30):
+        self.cache_ttl = cache_ttl
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._results = {}
+        self._breakers = {}
+        self._probing = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, key):
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = self._breakers[key] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def check(self, key, probe):
+        """检查依赖，probe() 成功时返回提示信息，失败时抛出异常"""
+        while True:
+            with self._lock:
+                cached = self._results.get(key)
+                if cached and time.monotonic() - cached[1] < self.cache_ttl:
+                    return dict(cached[0], cached=True)
+                probing = self._probing.get(key)
+                if probing is None:
+                    probing = self._probing[key] = threading.Event()
+                    break
+            probing.wait()
+
+        try:
+            return self._probe(key, probe)
+        finally:
+            with self._lock:
+                self._probing.pop(key, None)
+            probing.set()
+
+    def _probe(self, key, probe):
+        breaker = self.breaker(key)
+        if not breaker.allow():
+            # 熔断期间不缓存，熔断结束后第一次检查立即探测
+            return {
+                'connected': False,
+                'error': f'连续 {breaker.failures} 次检查失败，已暂停检查，{breaker.retry_after():.0f} 秒后重试',
+                'circuit': breaker.state,
+                'latencyMs': 0,
+                'cached': False
+            }
+
+        start = time.perf_counter()
+        try:
+            result = {'connected': True, 'message': probe()}
+            breaker.record_success()
+        except Exception as e:
+            result = {'connected': False, 'error': str(e)}
+            breaker.record_failure()
+        result['latencyMs'] = round((time.perf_counter() - start) * 1000, 1)
+        result['circuit'] = breaker.state
+        with self._lock:
+            self._results[key] = (result, time.monotonic())
+        return dict(result, cached=False)
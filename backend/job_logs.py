@@ -0,0 +1,55 @@
+import threading
+from collections import deque
+
+
+class JobLogBuffer:
+    """固定大小的任务日志环形缓冲区
+
+    每条日志带有递增的序号 seq，客户端通过 since(seq) 只获取更新的日志，
+    多个客户端互不影响。collapse=True 时与上一条相同的日志会合并为一条并累加 count，
+    同时分配新的 seq，这样心跳类日志不会占满缓冲区。
+    """
+
+    def __init__(self, maxlen=500):
+        self._entries = deque(maxlen=maxlen)
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def append(self, message, time, collapse=False):
+        """追加一条日志，返回该条日志"""
+        with self._lock:
+            self._seq += 1
+            last = self._entries[-1] if self._entries else None
+            if collapse and last is not None and last['message'] == message:
+                last['seq'] = self._seq
+                last['time'] = time
+                last['count'] += 1
+                return dict(last)
+            entry = {'seq': self._seq, 'time': time, 'message': message, 'count': 1}
+            self._entries.append(entry)
+            return dict(entry)
+
+    def restore(self, entries):
+        """从持久化的日志恢复缓冲区，后续日志的序号从最大序号继续递增"""
+        with self._lock:
+            self._entries.clear()
+            for entry in entries:
+                self._entries.append(dict(entry))
+                self._seq = max(self._seq, entry['seq'])
+
+    def since(self, seq=0):
+        """返回序号大于 seq 的日志"""
+        with self._lock:
+            return [dict(entry) for entry in self._entries if entry['seq'] > seq]
+
+    def messages(self):
+        """返回所有日志内容"""
+        with self._lock:
+            return [entry['message'] for entry in self._entries]
+
+    @property
+    def last_seq(self):
+        return self._seq
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,66 @@
+import threading
+import time
+from collections import deque
+
+
+class JobMetricsBuffer:
+    """固定大小的任务指标时间序列环形缓冲区
+
+    每个采样点带有递增的序号 seq，客户端通过 since(seq) 只获取新的采样点，
+    用于前端绘制吞吐量曲线。latest 保存最近一次采集的完整指标（包括各算子的明细）。
+    """
+
+    def __init__(self, maxlen=180):
+        self._samples = deque(maxlen=maxlen)
+        self._seq = 0
+        self._lock = threading.Lock()
+        self.latest = None
+        self.collected_at = None
+        self.error = None
+        # 反压等级的采样开销较大，按单独的间隔采样，其余时间沿用上次的结果
+        self.backpressure_levels = {}
+        self.backpressure_sampled_at = None
+
+    def append(self, sample, latest=None):
+        """追加一个采样点，返回该采样点"""
+        with self._lock:
+            self._seq += 1
+            sample = dict(sample, seq=self._seq)
+            self._samples.append(sample)
+            if latest is not None:
+                self.latest = latest
+            self.collected_at = time.monotonic()
+            self.error = None
+            return dict(sample)
+
+    def mark_failed(self, error):
+        """记录采集失败，到下一个采集间隔再重试"""
+        with self._lock:
+            self.collected_at = time.monotonic()
+            self.error = error
+
+    def since(self, seq=0):
+        """返回序号大于 seq 的采样点"""
+        with self._lock:
+            return [dict(sample) for sample in self._samples if sample['seq'] > seq]
+
+    def due(self, interval):
+        """距离上次采集是否已超过 interval 秒"""
+        return self.collected_at is None or time.monotonic() - self.collected_at >= interval
+
+    def backpressure_due(self, interval):
+        """距离上次采样反压等级是否已超过 interval 秒"""
+        return self.backpressure_sampled_at is None or time.monotonic() - self.backpressure_sampled_at >= interval
+
+    def update_backpressure(self, levels):
+        """记录一次反压等级采样结果，levels 为 {算子 ID: 反压等级}"""
+        with self._lock:
+            self.backpressure_levels = dict(levels)
+            self.backpressure_sampled_at = time.monotonic()
+
+    @property
+    def last_seq(self):
+        return self._seq
+
+    def __len__(self):
+        return len(self._samples)
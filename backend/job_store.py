@@ -0,0 +1,262 @@
+import json
+import os
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    flink_job_id TEXT,
+    status TEXT NOT NULL,
+    config TEXT,
+    config_file TEXT,
+    start_time TEXT,
+    last_update TEXT,
+    end_time TEXT,
+    version INTEGER NOT NULL DEFAULT 0,
+    owner TEXT,
+    owner_heartbeat REAL,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status);
+CREATE INDEX IF NOT EXISTS idx_jobs_start_time ON jobs (start_time);
+CREATE INDEX IF NOT EXISTS idx_jobs_flink_job_id ON jobs (flink_job_id);
+
+CREATE TABLE IF NOT EXISTS job_transitions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    time TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_job_transitions_job_id ON job_transitions (job_id);
+
+CREATE TABLE IF NOT EXISTS job_logs (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    time TEXT NOT NULL,
+    message TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (job_id, seq)
+);
+
+CREATE TABLE IF NOT EXISTS job_cancel_requests (
+    job_id TEXT PRIMARY KEY,
+    savepoint INTEGER NOT NULL DEFAULT 0,
+    target_directory TEXT,
+    time TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS sync_groups (
+    group_id TEXT PRIMARY KEY,
+    created_time TEXT NOT NULL,
+    job_ids TEXT NOT NULL,
+    plan TEXT
+);
+"""
+
+# 日志超过 log_max_entries 这么多条后才清理一次，避免每次写入都删除
+LOG_TRIM_SLACK = 100
+
+COLUMNS = ('job_id', 'flink_job_id', 'status', 'config', 'config_file', 'start_time',
+           'last_update', 'end_time', 'version', 'owner', 'owner_heartbeat', 'extra')
+
+
+class JobStore:
+    """基于 SQLite（WAL 模式）的任务注册表
+
+    保存任务配置、Flink Job ID、状态变化记录、时间戳和日志，
+    多个后端进程可以共享同一个数据库文件。
+    """
+
+    def __init__(self, path, log_max_entries=500):
+        self.path = path
+        self.log_max_entries = log_max_entries
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript(SCHEMA)
+
+    def _conn(self):
+        # sqlite3 连接不能跨线程使用，每个线程一个连接
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=30000')
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _to_record(row):
+        if row is None:
+            return None
+        record = dict(row)
+        record['config'] = json.loads(record['config']) if record['config'] else None
+        extra = json.loads(record.pop('extra') or '{}')
+        for key, value in extra.items():
+            record.setdefault(key, value)
+        return record
+
+    def save_job(self, record):
+        """新增或更新任务，record 中不属于固定列的字段保存在 extra 中
+
+        任务已被其他进程接管（owner 不同）时不会覆盖
+        """
+        values = {column: record.get(column) for column in COLUMNS if column not in ('config', 'extra')}
+        values['config'] = json.dumps(record.get('config'), ensure_ascii=False, default=str)
+        extra = {key: value for key, value in record.items() if key not in COLUMNS}
+        values['extra'] = json.dumps(extra, ensure_ascii=False, default=str)
+        placeholders = ', '.join(f':{column}' for column in COLUMNS)
+        updates = ', '.join(f'{column} = excluded.{column}' for column in COLUMNS if column != 'job_id')
+        self._conn().execute(
+            f'INSERT INTO jobs ({", ".join(COLUMNS)}) VALUES ({placeholders}) '
+            f'ON CONFLICT (job_id) DO UPDATE SET {updates} '
+            f'WHERE jobs.owner IS NULL OR jobs.owner = excluded.owner',
+            values
+        )
+
+    def record_transition(self, job_id, status, time):
+        """记录一次状态变化"""
+        self._conn().execute(
+            'INSERT INTO job_transitions (job_id, status, time) VALUES (?, ?, ?)',
+            (job_id, status, time)
+        )
+
+    def transitions(self, job_id):
+        """返回任务的状态变化记录"""
+        rows = self._conn().execute(
+            'SELECT status, time FROM job_transitions WHERE job_id = ? ORDER BY id', (job_id,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def save_log(self, job_id, entry):
+        """保存一条日志；count > 1 表示与上一条合并，更新最后一条日志"""
+        conn = self._conn()
+        if entry['count'] > 1:
+            cursor = conn.execute(
+                'UPDATE job_logs SET seq = ?, time = ?, count = ? WHERE job_id = ? AND seq = '
+                '(SELECT MAX(seq) FROM job_logs WHERE job_id = ?)',
+                (entry['seq'], entry['time'], entry['count'], job_id, job_id)
+            )
+            if cursor.rowcount:
+                return
+        conn.execute(
+            'INSERT OR REPLACE INTO job_logs (job_id, seq, time, message, count) VALUES (?, ?, ?, ?, ?)',
+            (job_id, entry['seq'], entry['time'], entry['message'], entry['count'])
+        )
+        # 按实际行数判断：合并的心跳日志会占用序号但不插入新行，不能按序号判断
+        total = conn.execute('SELECT COUNT(*) FROM job_logs WHERE job_id = ?', (job_id,)).fetchone()[0]
+        if total >= self.log_max_entries + LOG_TRIM_SLACK:
+            # 只保留最近 log_max_entries 条日志
+            conn.execute(
+                'DELETE FROM job_logs WHERE job_id = ? AND seq < ('
+                'SELECT seq FROM job_logs WHERE job_id = ? ORDER BY seq DESC LIMIT 1 OFFSET ?)',
+                (job_id, job_id, self.log_max_entries - 1)
+            )
+
+    def fetch_logs(self, job_id, since=0):
+        """返回序号大于 since 的日志"""
+        rows = self._conn().execute(
+            'SELECT seq, time, message, count FROM job_logs WHERE job_id = ? AND seq > ? '
+            'ORDER BY seq DESC LIMIT ?',
+            (job_id, since, self.log_max_entries)
+        ).fetchall()
+        return [dict(row) for row in reversed(rows)]
+
+    def load_job(self, job_id):
+        """按本地任务 ID 或 Flink Job ID 加载任务"""
+        row = self._conn().execute(
+            'SELECT * FROM jobs WHERE job_id = ? OR flink_job_id = ? LIMIT 1', (job_id, job_id)
+        ).fetchone()
+        return self._to_record(row)
+
+    def list_jobs(self, statuses=None, exclude_statuses=None):
+        """按开始时间倒序列出任务，可按状态过滤"""
+        sql = 'SELECT * FROM jobs'
+        params = []
+        if statuses:
+            sql += f' WHERE status IN ({", ".join("?" for _ in statuses)})'
+            params.extend(statuses)
+        elif exclude_statuses:
+            sql += f' WHERE status NOT IN ({", ".join("?" for _ in exclude_statuses)})'
+            params.extend(exclude_statuses)
+        sql += ' ORDER BY start_time DESC'
+        return [self._to_record(row) for row in self._conn().execute(sql, params).fetchall()]
+
+    def save_group(self, group_id, created_time, job_ids, plan):
+        """保存同步任务组及其包含的任务"""
+        self._conn().execute(
+            'INSERT OR REPLACE INTO sync_groups (group_id, created_time, job_ids, plan) VALUES (?, ?, ?, ?)',
+            (group_id, created_time, json.dumps(job_ids), json.dumps(plan, ensure_ascii=False, default=str))
+        )
+
+    def load_group(self, group_id):
+        """加载同步任务组，不存在时返回 None"""
+        row = self._conn().execute('SELECT * FROM sync_groups WHERE group_id = ?', (group_id,)).fetchone()
+        if row is None:
+            return None
+        group = dict(row)
+        group['job_ids'] = json.loads(group['job_ids'])
+        group['plan'] = json.loads(group['plan']) if group['plan'] else None
+        return group
+
+    def count_by_status(self):
+        """返回每种状态的任务数"""
+        rows = self._conn().execute('SELECT status, COUNT(*) AS total FROM jobs GROUP BY status').fetchall()
+        return {row['status']: row['total'] for row in rows}
+
+    def heartbeat(self, owner, now, job_ids):
+        """刷新 owner 持有任务的心跳，返回仍归 owner 所有的任务 ID"""
+        if not job_ids:
+            return set()
+        conn = self._conn()
+        placeholders = ', '.join('?' for _ in job_ids)
+        conn.execute(
+            f'UPDATE jobs SET owner_heartbeat = ? WHERE owner = ? AND job_id IN ({placeholders})',
+            (now, owner, *job_ids)
+        )
+        rows = conn.execute(
+            f'SELECT job_id FROM jobs WHERE owner = ? AND job_id IN ({placeholders})',
+            (owner, *job_ids)
+        ).fetchall()
+        return {row['job_id'] for row in rows}
+
+    def claim_job(self, job_id, owner, now, stale_before=None):
+        """认领任务；stale_before 不为空时只认领心跳早于该时间的任务，返回是否认领成功"""
+        if stale_before is None:
+            cursor = self._conn().execute(
+                'UPDATE jobs SET owner = ?, owner_heartbeat = ? WHERE job_id = ?',
+                (owner, now, job_id)
+            )
+        else:
+            cursor = self._conn().execute(
+                'UPDATE jobs SET owner = ?, owner_heartbeat = ? WHERE job_id = ? '
+                'AND (owner IS NULL OR owner = ? OR owner_heartbeat IS NULL OR owner_heartbeat < ?)',
+                (owner, now, job_id, owner, stale_before)
+            )
+        return cursor.rowcount == 1
+
+    def request_cancel(self, job_id, savepoint, target_directory, time):
+        """记录停止请求，由持有任务的进程执行"""
+        self._conn().execute(
+            'INSERT OR REPLACE INTO job_cancel_requests (job_id, savepoint, target_directory, time) '
+            'VALUES (?, ?, ?, ?)',
+            (job_id, int(bool(savepoint)), target_directory, time)
+        )
+
+    def take_cancel_requests(self, job_ids):
+        """取出并删除这些任务的停止请求"""
+        if not job_ids:
+            return []
+        job_ids = list(job_ids)
+        placeholders = ', '.join('?' for _ in job_ids)
+        rows = self._conn().execute(
+            f'DELETE FROM job_cancel_requests WHERE job_id IN ({placeholders}) '
+            f'RETURNING job_id, savepoint, target_directory, time',
+            job_ids
+        ).fetchall()
+        return [dict(row, savepoint=bool(row['savepoint'])) for row in rows]
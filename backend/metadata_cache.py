@@ -0,0 +1,92 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class MetadataCache:
+    """按集群缓存数据库、表、列等元数据，缓存 ttl 秒后过期
+
+    - key 为 (集群, 凭据, 类型, 数据库, 表)，集群为 (engine, host, port)，
+      凭据包含密码摘要，密码错误时不会读到其他用户缓存的元数据
+    - 同一个 key 同时只有一个请求查询数据库，其他请求等待结果
+    - 超过 max_entries 时淘汰最久未使用的条目
+    """
+
+    def __init__(self, ttl=300, max_entries=1000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def credential(user, password):
+        return (user, hashlib.sha256((password or '').encode('utf-8')).hexdigest())
+
+    def get(self, cluster, credential, kind, database, table, loader, refresh=False):
+        """返回 (值, 缓存时间距今的秒数)，没有缓存、已过期或 refresh=True 时调用 loader() 重新加载"""
+        key = (cluster, credential, kind, database, table)
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry and not refresh and time.monotonic() - entry[1] < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0], time.monotonic() - entry[1]
+                loading = self._loading.get(key)
+                if loading is None:
+                    loading = self._loading[key] = threading.Event()
+                    self.misses += 1
+                    break
+            # 其他请求正在加载同一个 key，等待它完成后读取缓存
+            loading.wait()
+            refresh = False
+
+        try:
+            value = loader()
+            with self._lock:
+                self._entries[key] = (value, time.monotonic())
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return value, 0.0
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+            loading.set()
+
+    def invalidate(self, cluster, database=None, table=None):
+        """清除缓存，返回清除的条目数
+
+        只传 cluster 时清除整个集群；传 database 时清除该库的表和列，以及数据库列表；
+        再传 table 时只清除该表的列和该库的表列表
+        """
+        with self._lock:
+            keys = []
+            for key in self._entries:
+                entry_cluster, _, kind, entry_database, entry_table = key
+                if entry_cluster != cluster:
+                    continue
+                if database is None:
+                    keys.append(key)
+                elif table is None:
+                    if kind == 'databases' or entry_database == database:
+                        keys.append(key)
+                elif entry_database == database and (kind == 'tables' or entry_table == table):
+                    keys.append(key)
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'ttl': self.ttl,
+                'maxEntries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses
+            }
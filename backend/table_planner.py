@@ -0,0 +1,92 @@
+import heapq
+import re
+
+# StarRocks 自带的系统库，展开表名模式时跳过
+SYSTEM_DATABASES = ('information_schema', '_statistics_', 'sys', 'starrocks_monitor')
+
+
+def parse_table_patterns(tables):
+    """解析 FlinkOMT 的 tables 配置，返回 [(库名正则, 表名正则), ...]
+
+    多个模式用逗号分隔，每个模式在第一个未转义的点处分成库名和表名，
+    表名中的 \\. 表示字面的点，单独的 * 表示所有表
+    """
+    patterns = []
+    for item in tables.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        match = re.match(r'^((?:[^.\\]|\\.)*)\.(.*)$', item)
+        if not match:
+            raise ValueError(f'表名模式 {item} 格式错误，应为 db.table')
+        database, table = match.group(1), match.group(2)
+        if table == '*':
+            table = '.*'
+        patterns.append((re.compile(database), re.compile(table)))
+    if not patterns:
+        raise ValueError('未指定要迁移的表')
+    return patterns
+
+
+def expand_tables(connection, tables):
+    """在 StarRocks information_schema 中展开表名模式，返回匹配的表及其行数和数据大小"""
+    patterns = parse_table_patterns(tables)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT TABLE_SCHEMA, TABLE_NAME, TABLE_ROWS, DATA_LENGTH FROM information_schema.tables "
+            "WHERE TABLE_TYPE = 'BASE TABLE'"
+        )
+        rows = cursor.fetchall()
+
+    matched = []
+    for row in rows:
+        database, table = row['TABLE_SCHEMA'], row['TABLE_NAME']
+        if database in SYSTEM_DATABASES:
+            continue
+        if any(db_re.fullmatch(database) and table_re.fullmatch(table) for db_re, table_re in patterns):
+            matched.append({
+                'database': database,
+                'table': table,
+                'rows': int(row['TABLE_ROWS'] or 0),
+                'dataSize': int(row['DATA_LENGTH'] or 0)
+            })
+    matched.sort(key=lambda t: (t['database'], t['table']))
+    return matched
+
+
+def plan_table_groups(tables, group_count):
+    """把表分成 group_count 组，使每组的数据量尽量均衡（最长处理时间优先的贪心算法）
+
+    按数据大小分配；统计信息里没有数据大小时按行数分配，都没有时按表的个数平均分配
+    """
+    if any(t['dataSize'] for t in tables):
+        weight_by = 'dataSize'
+    elif any(t['rows'] for t in tables):
+        weight_by = 'rows'
+    else:
+        weight_by = 'count'
+
+    def weight(table):
+        # 空表也计 1，避免所有空表都被分到同一组
+        return 1 if weight_by == 'count' else max(table[weight_by], 1)
+
+    group_count = max(1, min(group_count, len(tables)))
+    groups = [{'tables': [], 'rows': 0, 'dataSize': 0, 'weight': 0} for _ in range(group_count)]
+    heap = [(0, index) for index in range(group_count)]
+    for table in sorted(tables, key=weight, reverse=True):
+        load, index = heapq.heappop(heap)
+        group = groups[index]
+        group['tables'].append(table)
+        group['rows'] += table['rows']
+        group['dataSize'] += table['dataSize']
+        group['weight'] += weight(table)
+        heapq.heappush(heap, (load + weight(table), index))
+
+    for group in groups:
+        group['tables'].sort(key=lambda t: (t['database'], t['table']))
+    return {'weightBy': weight_by, 'groups': groups}
+
+
+def format_table_list(tables):
+    """把表列表转换成 FlinkOMT 的 tables 配置，表名中的正则特殊字符会被转义"""
+    return ','.join(f"{re.escape(t['database'])}.{re.escape(t['table'])}" for t in tables)
@@ -0,0 +1,65 @@
+import sys
+import os
+
+# 添加 backend 目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backpressure import find_bottleneck, sink_backpressure
+
+
+def vertex(vertex_id, busy, backpressured, source=False, sink=False):
+    return {'id': vertex_id, 'name': vertex_id, 'source': source, 'sink': sink,
+            'busyRatio': busy, 'backPressuredRatio': backpressured}
+
+
+# 测试瓶颈算子判断（不需要连接 Flink）
+if __name__ == '__main__':
+    print("=" * 60)
+    print("正在测试 backpressure...")
+    print("=" * 60)
+
+    upstreams = {'source': [], 'map': ['source'], 'sink': ['map']}
+    cases = [
+        # (说明, 各算子的 busy / backpressured, 期望的瓶颈位置)
+        ('写入端繁忙，上游被反压', [('source', 0.1, 0.9), ('map', 0.2, 0.8), ('sink', 0.95, 0.0)], 'sink'),
+        ('中间算子繁忙，source 被它反压', [('source', 0.1, 0.9), ('map', 0.9, 0.0), ('sink', 0.3, 0.0)], 'operator'),
+        ('没有反压，source 繁忙', [('source', 0.9, 0.0), ('map', 0.2, 0.0), ('sink', 0.2, 0.0)], 'source'),
+        ('都不繁忙', [('source', 0.1, 0.0), ('map', 0.1, 0.0), ('sink', 0.1, 0.0)], None),
+        ('指标缺失（NaN 转成的 None）', [('source', None, None), ('map', None, None), ('sink', None, None)], None)
+    ]
+
+    # 步骤1: 判断瓶颈算子
+    print("\n[步骤1] 判断瓶颈算子...")
+    print("-" * 60)
+    for name, ratios, expected in cases:
+        vertices = [vertex(vertex_id, busy, backpressured, source=vertex_id == 'source', sink=vertex_id == 'sink')
+                    for vertex_id, busy, backpressured in ratios]
+        bottleneck = find_bottleneck(vertices, upstreams)
+        side = bottleneck['side'] if bottleneck else None
+        print(f"{name}: {bottleneck}")
+        if side != expected:
+            print(f"✗ 瓶颈位置应该是 {expected}，实际是 {side}")
+            exit(1)
+        if name == '写入端繁忙，上游被反压':
+            if 'map 反压 80%' not in bottleneck['reason'] or sink_backpressure(vertices, upstreams) != 0.8:
+                print("✗ 写入端造成的反压应该是直接上游的反压占比")
+                exit(1)
+    print("✓ 瓶颈算子判断正确")
+
+    # 步骤2: source 和 sink 链接成一个算子
+    print("\n[步骤2] source 和 sink 链接成一个算子...")
+    print("-" * 60)
+    vertices = [vertex('chain', 0.9, 0.0, source=True, sink=True)]
+    bottleneck = find_bottleneck(vertices, {'chain': []})
+    print(f"瓶颈: {bottleneck}")
+    if not bottleneck or bottleneck['side'] != 'chained' or '无法区分' not in bottleneck['reason']:
+        print("✗ 链接的算子应该提示无法区分读写")
+        exit(1)
+    if sink_backpressure(vertices, {'chain': []}) is not None:
+        print("✗ 链接的算子没有写入端反压")
+        exit(1)
+    print("✓ 链接的算子判断正确")
+
+    print(f"\n{'=' * 60}")
+    print("✓ 测试完成：全部通过")
+    print(f"{'=' * 60}")
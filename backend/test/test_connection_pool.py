@@ -0,0 +1,46 @@
+import sys
+import os
+import time
+
+# 添加 backend 目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, get_starrocks_connection
+
+# 配置项 - 在这里输入你的 StarRocks 连接信息
+config = {
+    'host': 'localhost',
+    'port': '9030',
+    'username': 'root',
+    'password': '123456',
+    'database': 'test2'
+}
+
+# 测试连接池复用
+if __name__ == '__main__':
+    try:
+        print("正在测试连接池复用...")
+        print("-" * 50)
+
+        for i in range(1, 4):
+            start = time.time()
+            connection = get_starrocks_connection(config)
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            connection.close()
+            print(f"第 {i} 次获取连接并查询耗时: {(time.time() - start) * 1000:.1f} ms")
+
+        with app.test_client() as client:
+            response = client.get('/api/pool-stats')
+            stats = response.get_json()
+            print(f"\n连接池统计: {stats}")
+
+        pool = stats['pools'][0]
+        if pool['created'] == 1 and pool['reused'] == 2:
+            print("✓ 连接被复用")
+        else:
+            print("✗ 连接未被复用")
+
+    except Exception as e:
+        print(f"✗ 测试失败: {e}")
@@ -0,0 +1,67 @@
+import sys
+import os
+
+# 添加 backend 目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from job_logs import JobLogBuffer
+
+
+# 测试任务日志环形缓冲区（不需要启动后端）
+if __name__ == '__main__':
+    print("=" * 60)
+    print("正在测试 job_logs...")
+    print("=" * 60)
+
+    # 步骤1: 合并连续相同的日志
+    print("\n[步骤1] 合并连续相同的日志...")
+    print("-" * 60)
+    logs = JobLogBuffer(maxlen=3)
+    logs.append('任务已进入提交队列', 't1')
+    for i in range(5):
+        entry = logs.append('任务正在运行中...', f't{i + 2}', collapse=True)
+    print(f"日志: {logs.since()}")
+    if len(logs) != 2 or entry['count'] != 5:
+        print("✗ 连续相同的心跳没有合并为一条")
+        exit(1)
+    if entry['seq'] != 6 or entry['time'] != 't6':
+        print(f"✗ 合并后的日志应该使用新的序号和时间: {entry}")
+        exit(1)
+    entry = logs.append('任务正在运行中...', 't7')
+    if len(logs) != 3 or entry['count'] != 1:
+        print("✗ collapse=False 时不应该合并")
+        exit(1)
+    print("✓ 连续相同的日志合并为一条")
+
+    # 步骤2: 超过上限时丢弃最早的日志，按序号增量读取
+    print("\n[步骤2] 丢弃最早的日志并增量读取...")
+    print("-" * 60)
+    logs.append('监控错误', 't8', collapse=True)
+    if len(logs) != 3 or logs.messages()[0] != '任务正在运行中...':
+        print(f"✗ 超过上限时应该丢弃最早的日志: {logs.messages()}")
+        exit(1)
+    since = logs.since(6)
+    if [item['seq'] for item in since] != [7, 8]:
+        print(f"✗ since 应该只返回序号更大的日志: {since}")
+        exit(1)
+    since[0]['message'] = '被修改'
+    if logs.since(6)[0]['message'] != '任务正在运行中...':
+        print("✗ since 应该返回日志的副本")
+        exit(1)
+    print("✓ 最早的日志被丢弃，增量读取正确")
+
+    # 步骤3: 从持久化的日志恢复后序号继续递增
+    print("\n[步骤3] 从持久化的日志恢复...")
+    print("-" * 60)
+    restored = JobLogBuffer(maxlen=10)
+    restored.restore([{'seq': 3, 'time': 't1', 'message': 'a', 'count': 1},
+                      {'seq': 9, 'time': 't2', 'message': 'b', 'count': 4}])
+    entry = restored.append('b', 't3', collapse=True)
+    if len(restored) != 2 or entry['count'] != 5 or entry['seq'] != 10 or restored.last_seq != 10:
+        print(f"✗ 恢复后应该继续合并并递增序号: {entry}")
+        exit(1)
+    print("✓ 恢复后序号继续递增")
+
+    print(f"\n{'=' * 60}")
+    print("✓ 测试完成：全部通过")
+    print(f"{'=' * 60}")
@@ -0,0 +1,71 @@
+import sys
+import os
+
+# 添加 backend 目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import MetricsRegistry
+
+
+# 测试 Prometheus 文本格式输出（不需要启动后端）
+if __name__ == '__main__':
+    print("=" * 60)
+    print("正在测试 metrics...")
+    print("=" * 60)
+
+    registry = MetricsRegistry()
+    requests_total = registry.counter('test_requests_total', '请求次数', ('route',))
+    queue_length = registry.gauge('test_queue_length', '队列长度')
+    duration = registry.histogram('test_duration_seconds', '耗时', ('route',), buckets=(0.1, 1))
+
+    requests_total.inc(route='/a')
+    requests_total.inc(2, route='/a')
+    requests_total.inc(route='/b"c')
+    queue_length.set(3)
+    duration.observe(0.05, route='/a')
+    duration.observe(0.5, route='/a')
+    duration.observe(5, route='/a')
+
+    # 步骤1: 检查输出格式
+    print("\n[步骤1] 输出 Prometheus 文本格式...")
+    print("-" * 60)
+    text = registry.render()
+    lines = text.splitlines()
+    print(text)
+    expected = [
+        '# HELP test_requests_total 请求次数',
+        '# TYPE test_requests_total counter',
+        'test_requests_total{route="/a"} 3',
+        'test_requests_total{route="/b\\"c"} 1',
+        'test_queue_length 3',
+        # 直方图分桶是累计值
+        'test_duration_seconds_bucket{route="/a",le="0.1"} 1',
+        'test_duration_seconds_bucket{route="/a",le="1"} 2',
+        'test_duration_seconds_bucket{route="/a",le="+Inf"} 3',
+        'test_duration_seconds_sum{route="/a"} 5.55',
+        'test_duration_seconds_count{route="/a"} 3'
+    ]
+    missing = [line for line in expected if line not in lines]
+    if missing or not text.endswith('\n'):
+        print(f"✗ 输出缺少以下行: {missing}")
+        exit(1)
+    print("✓ 输出格式正确")
+
+    # 步骤2: 标签不匹配时报错，clear() 清空已有的值
+    print("\n[步骤2] 检查标签校验和清空...")
+    print("-" * 60)
+    try:
+        requests_total.inc(method='GET')
+        print("✗ 标签不匹配时应该报错")
+        exit(1)
+    except ValueError as e:
+        print(f"标签不匹配: {e}")
+    queue_length.clear()
+    if 'test_queue_length 3' in registry.render().splitlines():
+        print("✗ clear() 后不应该再输出已有的值")
+        exit(1)
+    print("✓ 标签校验和清空正确")
+
+    print(f"\n{'=' * 60}")
+    print("✓ 测试完成：全部通过")
+    print(f"{'=' * 60}")
@@ -46,7 +46,8 @@ if __name__ == '__main__':
         print(f"状态码: {response.status_code}")
         print(f"响应内容: {response.get_json()}")
         
-        if response.status_code != 200:
+        # 任务提交是异步的，接口返回 202 和本地任务 ID
+        if response.status_code not in (200, 202):
             print(f"\n✗ 启动 Job 失败: {response.get_json()}")
             exit(1)
         
@@ -68,12 +69,13 @@ if __name__ == '__main__':
         check_interval = 2  # 每2秒检查一次状态
         iteration = 0
         final_status = None
+        last_seq = 0  # 已经获取到的日志序号，每次只获取更新的日志
         
         while iteration < max_iterations:
             iteration += 1
             
             # 获取 Job 状态
-            status_response = client.get(f'/api/job-status/{job_id}')
+            status_response = client.get(f'/api/job-status/{job_id}?since={last_seq}')
             
             if status_response.status_code != 200:
                 print(f"\n✗ 获取 Job 状态失败: {status_response.get_json()}")
@@ -83,6 +85,7 @@ if __name__ == '__main__':
             current_status = status_data.get('status', 'UNKNOWN')
             flink_job_id = status_data.get('flinkJobId')
             logs = status_data.get('logs', [])
+            last_seq = status_data.get('lastSeq', last_seq)
             last_update = status_data.get('lastUpdate', '')
             
             # 打印当前状态
@@ -97,7 +100,7 @@ if __name__ == '__main__':
             if logs:
                 print(f"  最新日志:")
                 for log in logs[-3:]:  # 只显示最近3条日志
-                    print(f"    - {log}")
+                    print(f"    - [{log['seq']}] {log['message']} (x{log['count']})")
             
             # 检查是否为最终状态
             if current_status in ['FINISHED', 'FAILED', 'CANCELED']:
@@ -111,7 +114,7 @@ if __name__ == '__main__':
                     print(f"\n完整日志:")
                     print("-" * 60)
                     for i, log in enumerate(logs, 1):
-                        print(f"{i}. {log}")
+                        print(f"{i}. {log['message']}")
                 
                 break
             
@@ -0,0 +1,47 @@
+import sys
+import os
+import time
+
+# 添加 backend 目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from test_start_job import test_config
+
+# 测试 stop_job：接口立即返回，任务在后台依次进入 CANCELLING → CANCELED
+if __name__ == '__main__':
+    with app.test_client() as client:
+        print("=" * 60)
+        print("正在测试 stop_job API...")
+        print("=" * 60)
+
+        response = client.post('/api/start-job', json=test_config)
+        job_id = response.get_json().get('jobId')
+        print(f"Job 已提交，本地任务 ID: {job_id}")
+
+        # 等待任务提交到 Flink 并开始运行
+        for _ in range(60):
+            status = client.get(f'/api/job-status/{job_id}').get_json().get('status')
+            if status in ['RUNNING', 'FAILED', 'CANCELED', 'FINISHED']:
+                break
+            time.sleep(2)
+        print(f"当前状态: {status}")
+
+        start = time.time()
+        response = client.post(f'/api/stop-job/{job_id}')
+        print(f"\n停止请求状态码: {response.status_code}，耗时 {(time.time() - start) * 1000:.1f} ms")
+        print(f"响应内容: {response.get_json()}")
+
+        for _ in range(30):
+            status = client.get(f'/api/job-status/{job_id}').get_json().get('status')
+            print(f"  状态: {status}")
+            if status in ['CANCELED', 'FAILED', 'FINISHED']:
+                break
+            time.sleep(1)
+
+        print(f"\n{'=' * 60}")
+        if status == 'CANCELED':
+            print("✓ 测试完成：任务已取消")
+        else:
+            print(f"✗ 测试失败：最终状态 {status}")
+        print(f"{'=' * 60}")
@@ -0,0 +1,46 @@
+import sys
+import os
+import tempfile
+
+# 添加 backend 目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 加载 app 时会启动后台轮询并接管注册表中遗留的任务，使用临时的注册表文件，不影响正在运行的后端
+os.environ['JOB_STORE_PATH'] = os.path.join(tempfile.mkdtemp(), 'flinkomt_jobs.db')
+
+from app import combine_group_status
+
+# (组内各任务的状态, 期望的任务组状态)
+cases = [
+    (['RUNNING', 'RUNNING'], 'RUNNING'),
+    (['QUEUED', 'RUNNING'], 'STARTING'),
+    (['FINISHED', 'FINISHED'], 'FINISHED'),
+    (['FINISHED', 'CANCELED'], 'CANCELED'),
+    # 已结束和仍在运行的任务混在一起
+    (['FINISHED', 'RUNNING'], 'RUNNING'),
+    (['FAILED', 'RUNNING'], 'PARTIALLY_FAILED'),
+    (['FAILED', 'QUEUED'], 'PARTIALLY_FAILED'),
+    # 正在取消的任务
+    (['CANCELED', 'CANCELLING'], 'CANCELLING'),
+    (['RUNNING', 'CANCELLING'], 'CANCELLING'),
+    # 没有 Flink 任务或已不存在的任务按失败计算
+    (['FINISHED', 'NO_JOB'], 'FAILED'),
+    (['CANCELED', 'UNKNOWN'], 'FAILED'),
+    (['RUNNING', 'NO_JOB'], 'PARTIALLY_FAILED')
+]
+
+# 测试同步任务组的整体状态（不需要连接数据库和 Flink）
+if __name__ == '__main__':
+    print("=" * 60)
+    print("正在测试同步任务组状态...")
+    print("=" * 60)
+
+    for statuses, expected in cases:
+        status = combine_group_status(statuses)
+        if status != expected:
+            print(f"✗ {statuses} 的任务组状态应该是 {expected}，实际是 {status}")
+            exit(1)
+        print(f"✓ {statuses} → {status}")
+
+    print(f"\n{'=' * 60}")
+    print("✓ 测试完成：全部通过")
+    print(f"{'=' * 60}")
@@ -0,0 +1,126 @@
+import sys
+import os
+
+# 添加 backend 目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from table_planner import parse_table_patterns, expand_tables, plan_table_groups, format_table_list
+
+
+class FakeCursor:
+    """模拟 StarRocks information_schema.tables 的查询结果"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, sql):
+        pass
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def cursor(self):
+        return FakeCursor(self.rows)
+
+
+def table_row(database, table, rows, size):
+    return {'TABLE_SCHEMA': database, 'TABLE_NAME': table, 'TABLE_ROWS': rows, 'DATA_LENGTH': size}
+
+
+# 测试表名模式解析、表展开和分组计划（不需要连接数据库）
+if __name__ == '__main__':
+    print("=" * 60)
+    print("正在测试 table_planner...")
+    print("=" * 60)
+
+    # 步骤1: 解析表名模式
+    print("\n[步骤1] 解析表名模式...")
+    print("-" * 60)
+    patterns = parse_table_patterns('test.orders, test.user\\.log, demo.*')
+    if len(patterns) != 3 or not patterns[0][1].fullmatch('orders'):
+        print(f"✗ 表名模式解析错误: {patterns}")
+        exit(1)
+    if not patterns[1][1].fullmatch('user.log') or patterns[1][1].fullmatch('userXlog'):
+        print("✗ 转义的点应该只匹配字面的点")
+        exit(1)
+    if not patterns[2][1].fullmatch('anything'):
+        print("✗ 单独的 * 应该匹配所有表")
+        exit(1)
+    for invalid in ('', 'no_dot'):
+        try:
+            parse_table_patterns(invalid)
+            print(f"✗ 模式 \"{invalid}\" 应该报错")
+            exit(1)
+        except ValueError:
+            pass
+    print("✓ 表名模式解析正确")
+
+    # 步骤2: 展开表名模式
+    print("\n[步骤2] 展开表名模式...")
+    print("-" * 60)
+    connection = FakeConnection([
+        table_row('test', 'orders', 1000, 4096),
+        table_row('test', 'users', None, None),
+        table_row('sys', 'orders', 1, 1),
+        table_row('other', 'orders', 1, 1)
+    ])
+    tables = expand_tables(connection, 'test.*,sys.*')
+    print(f"展开结果: {tables}")
+    if [t['table'] for t in tables] != ['orders', 'users']:
+        print("✗ 应该跳过系统库和不匹配的库")
+        exit(1)
+    if tables[1]['rows'] != 0 or tables[1]['dataSize'] != 0:
+        print("✗ 没有统计信息的表行数和大小应该为 0")
+        exit(1)
+    print("✓ 表名模式展开正确")
+
+    # 步骤3: 按数据大小均衡分组
+    print("\n[步骤3] 按数据大小分组...")
+    print("-" * 60)
+    tables = [{'database': 'test', 'table': f't{i}', 'rows': 0, 'dataSize': size}
+              for i, size in enumerate([100, 90, 60, 50, 10, 5])]
+    plan = plan_table_groups(tables, 2)
+    weights = sorted(group['weight'] for group in plan['groups'])
+    print(f"分组方式: {plan['weightBy']}，每组数据量: {weights}")
+    if plan['weightBy'] != 'dataSize' or weights != [155, 160]:
+        print("✗ 两组数据量不均衡")
+        exit(1)
+    if sorted(t['table'] for g in plan['groups'] for t in g['tables']) != sorted(t['table'] for t in tables):
+        print("✗ 每张表应该只分到一组")
+        exit(1)
+
+    # 组数不超过表数，没有统计信息时按表的个数平均分配
+    tables = [{'database': 'test', 'table': f't{i}', 'rows': 0, 'dataSize': 0} for i in range(3)]
+    plan = plan_table_groups(tables, 5)
+    if len(plan['groups']) != 3 or plan['weightBy'] != 'count' \
+            or any(len(group['tables']) != 1 for group in plan['groups']):
+        print(f"✗ 没有统计信息时应该按表的个数分配，且组数不超过表数: {plan}")
+        exit(1)
+    print("✓ 分组计划正确")
+
+    # 步骤4: 生成 tables 配置时转义正则特殊字符
+    print("\n[步骤4] 生成 tables 配置...")
+    print("-" * 60)
+    tables_config = format_table_list([{'database': 'test', 'table': 'user.log'}, {'database': 'test', 'table': 'a+b'}])
+    print(f"tables 配置: {tables_config}")
+    patterns = parse_table_patterns(tables_config)
+    if tables_config != 'test.user\\.log,test.a\\+b' \
+            or not patterns[0][1].fullmatch('user.log') or not patterns[1][1].fullmatch('a+b'):
+        print("✗ 表名中的特殊字符没有正确转义")
+        exit(1)
+    print("✓ 特殊字符已转义，配置可以解析回原表名")
+
+    print(f"\n{'=' * 60}")
+    print("✓ 测试完成：全部通过")
+    print(f"{'=' * 60}")
@@ -0,0 +1,98 @@
+import sys
+import os
+
+# 添加 backend 目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from verifier import split_ranges, column_expression, checksum_sql, DataVerification
+
+
+def fake_query(source_buckets, target_buckets):
+    """模拟两边的查询：表 k 没有整数主键，按 MD5 分桶比较"""
+    def run_query(side, sql, params):
+        if 'information_schema.columns' in sql:
+            if side == 'source':
+                return [{'COLUMN_NAME': 'k', 'DATA_TYPE': 'varchar', 'COLUMN_KEY': 'PRI', 'NUMERIC_SCALE': None},
+                        {'COLUMN_NAME': 'amount', 'DATA_TYPE': 'decimal', 'COLUMN_KEY': '', 'NUMERIC_SCALE': 2}]
+            return [{'COLUMN_NAME': 'k'}, {'COLUMN_NAME': 'amount'}]
+        if 'information_schema.statistics' in sql:
+            return []
+        if 'AS bucket' in sql:
+            return source_buckets if side == 'source' else target_buckets
+        return [{'row_count': sum(row['row_count'] for row in (source_buckets if side == 'source' else target_buckets))}]
+    return run_query
+
+
+# 测试数据校验的分块和校验 SQL（不需要连接数据库）
+if __name__ == '__main__':
+    print("=" * 60)
+    print("正在测试 verifier...")
+    print("=" * 60)
+
+    # 步骤1: 主键范围切分
+    print("\n[步骤1] 按主键范围切分...")
+    print("-" * 60)
+    ranges = split_ranges(1, 1000, 1000, 300)
+    print(f"切分结果: {ranges}")
+    if len(ranges) != 4 or ranges[0][0] != 1 or ranges[-1][1] != 1001 \
+            or any(a[1] != b[0] for a, b in zip(ranges, ranges[1:])):
+        print("✗ 区间应该首尾相接并覆盖整个范围")
+        exit(1)
+    if split_ranges(5, 5, 1, 100000) != [(5, 6)] or len(split_ranges(0, 2, 1000, 1)) != 3:
+        print("✗ 行数小于块大小时应该只有 1 个区间，主键稀疏时区间宽度至少为 1")
+        exit(1)
+    print("✓ 主键范围切分正确")
+
+    # 步骤2: 按类型统一列的格式，生成校验 SQL
+    print("\n[步骤2] 生成校验 SQL...")
+    print("-" * 60)
+    if column_expression('amount', 'decimal', 2) != 'CAST(`amount` AS DECIMAL(38, 2))' \
+            or not column_expression('ratio', 'double').startswith('CAST(ROUND(`ratio`, 6)') \
+            or not column_expression('ts', 'datetime').startswith('DATE_FORMAT(`ts`') \
+            or column_expression('name', 'varchar') != '`name`':
+        print("✗ 列没有按类型统一格式")
+        exit(1)
+    columns = [('id', 'bigint', None), ('ts', 'datetime', None)]
+    sql = checksum_sql('source', 'test', 'orders', columns, 'id')
+    print(f"StarRocks 按范围校验: {sql}")
+    if '`id` >= %s AND `id` < %s' not in sql or 'AS BIGINT' not in sql or 'UNSIGNED' in sql:
+        print("✗ StarRocks 按范围校验的 SQL 不正确")
+        exit(1)
+    if '%%Y' not in sql or '%Y' in sql.replace('%%', ''):
+        print("✗ 带参数时格式串中的 % 应该被转义")
+        exit(1)
+    sql = checksum_sql('target', 'test', 'orders', columns, buckets=4)
+    print(f"OceanBase 分桶校验: {sql}")
+    if 'GROUP BY' not in sql or '% 4' not in sql or 'WHERE' in sql or '%%' in sql or 'AS UNSIGNED' not in sql:
+        print("✗ OceanBase 分桶校验的 SQL 不正确")
+        exit(1)
+    print("✓ 校验 SQL 正确")
+
+    # 步骤3: 没有整数主键的表按桶比较
+    print("\n[步骤3] 没有整数主键的表按桶比较...")
+    print("-" * 60)
+    buckets = [{'bucket': b, 'row_count': 10, 'checksum1': 100 + b, 'checksum2': 200 + b} for b in range(3)]
+    tables = [{'database': 'test', 'table': 'k'}]
+    verification = DataVerification(fake_query(buckets, buckets), tables, 'target_db', chunk_rows=10)
+    summary = verification.run()
+    result = verification.snapshot()[0]
+    print(f"数据一致时: {result}")
+    if summary['matched'] != 1 or result['status'] != 'MATCH' or result['chunking'] != 'hash' \
+            or result['chunks'] != 3 or result['checkedChunks'] != 3:
+        print("✗ 数据一致时应该按行数分为 3 个桶且结果为 MATCH")
+        exit(1)
+
+    target = [dict(row) for row in buckets[:2]]
+    target[1]['checksum1'] += 1
+    verification = DataVerification(fake_query(buckets, target), tables, 'target_db', chunk_rows=10)
+    verification.run()
+    result = verification.snapshot()[0]
+    print(f"数据不一致时: {result}")
+    if result['status'] != 'MISMATCH' or sorted(item['bucket'] for item in result['mismatchedRanges']) != [1, 2]:
+        print("✗ 校验和不同和缺失的桶都应该被记录")
+        exit(1)
+    print("✓ 按桶比较正确")
+
+    print(f"\n{'=' * 60}")
+    print("✓ 测试完成：全部通过")
+    print(f"{'=' * 60}")
@@ -0,0 +1,277 @@
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# 可以按范围切分数据块的主键类型
+INTEGER_TYPES = ('tinyint', 'smallint', 'mediumint', 'int', 'integer', 'bigint', 'largeint')
+# 各引擎中把十六进制字符串转换为整数的类型
+CHECKSUM_CAST_TYPES = {'source': 'BIGINT', 'target': 'UNSIGNED'}
+DECIMAL_TYPES = ('decimal', 'decimalv2', 'decimal32', 'decimal64', 'decimal128', 'numeric')
+FLOAT_TYPES = ('float', 'double', 'real')
+# 浮点数比较时保留的小数位数，FLOAT 只有约 7 位有效数字
+FLOAT_SCALES = {'float': 4, 'real': 6, 'double': 6}
+DATETIME_FORMATS = {
+    'date': '%Y-%m-%d',
+    'datetime': '%Y-%m-%d %H:%i:%s.%f',
+    'timestamp': '%Y-%m-%d %H:%i:%s.%f'
+}
+
+
+def quote_identifier(name):
+    return '`' + name.replace('`', '``') + '`'
+
+
+def column_expression(name, data_type=None, scale=None):
+    """把列转换为两个引擎中格式相同的字符串
+
+    两个引擎对小数、浮点数和时间的默认字符串格式不同（末尾的 0、科学计数法、小数秒），
+    小数按列的精度转换为固定小数位，浮点数先四舍五入，时间按统一格式输出
+    """
+    column = quote_identifier(name)
+    data_type = (data_type or '').lower()
+    if data_type in DECIMAL_TYPES:
+        return f'CAST({column} AS DECIMAL(38, {int(scale or 0)}))'
+    if data_type in FLOAT_TYPES:
+        digits = FLOAT_SCALES[data_type]
+        return f'CAST(ROUND({column}, {digits}) AS DECIMAL(38, {digits}))'
+    if data_type in DATETIME_FORMATS:
+        return f"DATE_FORMAT({column}, '{DATETIME_FORMATS[data_type]}')"
+    return column
+
+
+def checksum_sql(side, database, table, columns, pk_column=None, buckets=None):
+    """生成在数据库端计算数据块行数和校验和的 SQL，数据不会读取到后端
+
+    columns 为 (列名, 类型, 小数位数) 列表。每行所有列拼接后取 MD5，把 MD5 的前 8 位和第 9~16 位
+    分别转换为整数求和，两个和都一致才认为数据块一致。按主键范围切分时 SQL 带两个范围参数 [lower, upper)；
+    没有整数主键时传 buckets，按 MD5 的第 17~24 位把行分到 buckets 个桶中，每个桶返回一行结果
+    """
+    cast_type = CHECKSUM_CAST_TYPES[side]
+    # NULL 用 \N 表示，避免 CONCAT_WS 跳过 NULL 导致不同的行得到相同的拼接结果
+    row_value = 'CONCAT_WS(\'#\', ' + ', '.join(
+        f"IFNULL({column_expression(*column)}, '\\\\N')" for column in columns) + ')'
+    where = ''
+    if pk_column:
+        # 带参数执行时 SQL 中的 % 需要转义（DATE_FORMAT 的格式串）
+        row_value = row_value.replace('%', '%%')
+        where = f' WHERE {quote_identifier(pk_column)} >= %s AND {quote_identifier(pk_column)} < %s'
+    bucket = ''
+    group_by = ''
+    if buckets:
+        bucket_expr = f'CAST(CONV(SUBSTR(h, 17, 8), 16, 10) AS {cast_type}) % {int(buckets)}'
+        bucket = f'{bucket_expr} AS bucket, '
+        group_by = f' GROUP BY {bucket_expr}'
+    return (
+        f'SELECT {bucket}COUNT(*) AS row_count, '
+        f'SUM(CAST(CONV(SUBSTR(h, 1, 8), 16, 10) AS {cast_type})) AS checksum1, '
+        f'SUM(CAST(CONV(SUBSTR(h, 9, 8), 16, 10) AS {cast_type})) AS checksum2 '
+        f'FROM (SELECT MD5({row_value}) AS h FROM {quote_identifier(database)}.{quote_identifier(table)}{where}) chunk'
+        f'{group_by}'
+    )
+
+
+def split_ranges(lower, upper, row_count, chunk_rows):
+    """把主键范围 [lower, upper] 按预计行数切分为若干个左闭右开区间"""
+    chunks = max(1, math.ceil(row_count / chunk_rows))
+    width = max(1, math.ceil((upper - lower + 1) / chunks))
+    ranges = []
+    start = lower
+    while start <= upper:
+        end = min(start + width, upper + 1)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+class DataVerification:
+    """比较 StarRocks（source）和 OceanBase（target）中每张表的行数和分块校验和
+
+    run_query(side, sql, params) 在对应的数据库中执行 SQL 并返回结果行。
+    每个数据库各自最多同时执行 parallelism 个查询，多张表和多个数据块并发校验。
+    """
+
+    def __init__(self, run_query, tables, target_database, chunk_rows=100000, parallelism=4):
+        self.run_query = run_query
+        self.target_database = target_database
+        self.chunk_rows = chunk_rows
+        self.parallelism = parallelism
+        self._lock = threading.Lock()
+        self.results = [{
+            'table': f"{t['database']}.{t['table']}",
+            'target': f"{target_database}.{t['table']}",
+            'database': t['database'],
+            'name': t['table'],
+            'status': 'PENDING',
+            'sourceRows': None,
+            'targetRows': None,
+            'primaryKey': None,
+            'chunking': None,
+            'chunks': 0,
+            'checkedChunks': 0,
+            'mismatchedRanges': [],
+            'error': None
+        } for t in tables]
+
+    def _query_one(self, executors, side, sql, params=()):
+        """在对应数据库的线程池中执行查询，返回 Future"""
+        return executors[side].submit(self.run_query, side, sql, params)
+
+    def _columns(self, executors, side, database, table):
+        return self._query_one(
+            executors, side,
+            'SELECT COLUMN_NAME, DATA_TYPE, COLUMN_KEY, NUMERIC_SCALE FROM information_schema.columns '
+            'WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s ORDER BY ORDINAL_POSITION',
+            (database, table)
+        )
+
+    def _primary_key(self, executors, result, source_columns):
+        """优先使用 OceanBase 目标表的主键，没有时使用 StarRocks 的 key 列"""
+        rows = self._query_one(
+            executors, 'target',
+            "SELECT COLUMN_NAME FROM information_schema.statistics "
+            "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND INDEX_NAME = 'PRIMARY' ORDER BY SEQ_IN_INDEX",
+            (self.target_database, result['name'])
+        ).result()
+        pk = [row['COLUMN_NAME'] for row in rows]
+        if not pk:
+            pk = [name for name, _, key in source_columns if key == 'PRI']
+        return pk
+
+    def verify_table(self, result, executors):
+        result['status'] = 'RUNNING'
+        source_columns = self._columns(executors, 'source', result['database'], result['name'])
+        target_columns = self._columns(executors, 'target', self.target_database, result['name'])
+        source_rows = source_columns.result()
+        scales = {row['COLUMN_NAME']: row['NUMERIC_SCALE'] for row in source_rows}
+        source_columns = [(row['COLUMN_NAME'], (row['DATA_TYPE'] or '').lower(), row['COLUMN_KEY'])
+                          for row in source_rows]
+        target_columns = [row['COLUMN_NAME'] for row in target_columns.result()]
+        if not source_columns:
+            raise Exception('StarRocks 中找不到该表')
+        if not target_columns:
+            raise Exception(f'OceanBase 中找不到目标表 {result["target"]}')
+
+        # 只比较两边都有的列，列顺序和类型以 StarRocks 为准
+        target_names = {name.lower() for name in target_columns}
+        columns = [(name, data_type, scales.get(name)) for name, data_type, _ in source_columns
+                   if name.lower() in target_names]
+        pk = self._primary_key(executors, result, source_columns)
+        result['primaryKey'] = pk
+
+        # 单列整数主键按主键范围分块，否则按每行的 MD5 分桶，每个桶约 chunk_rows 行
+        types = {name.lower(): data_type for name, data_type, _ in source_columns}
+        pk_column = pk[0] if len(pk) == 1 and types.get(pk[0].lower()) in INTEGER_TYPES else None
+        bounds_sql = 'SELECT COUNT(*) AS row_count'
+        if pk_column:
+            bounds_sql += f', MIN({quote_identifier(pk_column)}) AS min_key, MAX({quote_identifier(pk_column)}) AS max_key'
+        source_bounds = self._query_one(executors, 'source', bounds_sql +
+                                        f' FROM {quote_identifier(result["database"])}.{quote_identifier(result["name"])}')
+        target_bounds = self._query_one(executors, 'target', bounds_sql +
+                                        f' FROM {quote_identifier(self.target_database)}.{quote_identifier(result["name"])}')
+        source_bounds, target_bounds = source_bounds.result()[0], target_bounds.result()[0]
+        result['sourceRows'] = int(source_bounds['row_count'])
+        result['targetRows'] = int(target_bounds['row_count'])
+
+        max_rows = max(result['sourceRows'], result['targetRows'])
+        if pk_column:
+            result['chunking'] = 'range'
+            lowers = [b['min_key'] for b in (source_bounds, target_bounds) if b['min_key'] is not None]
+            uppers = [b['max_key'] for b in (source_bounds, target_bounds) if b['max_key'] is not None]
+            if lowers:
+                ranges = split_ranges(int(min(lowers)), int(max(uppers)), max_rows, self.chunk_rows)
+                self._verify_ranges(result, executors, columns, pk_column, ranges)
+        else:
+            result['chunking'] = 'hash'
+            if max_rows:
+                self._verify_buckets(result, executors, columns, math.ceil(max_rows / self.chunk_rows))
+
+        mismatched = result['mismatchedRanges'] or result['sourceRows'] != result['targetRows']
+        result['status'] = 'MISMATCH' if mismatched else 'MATCH'
+
+    def _verify_ranges(self, result, executors, columns, pk_column, ranges):
+        """按主键范围分块比较，不一致的范围记录在 mismatchedRanges 中"""
+        result['chunks'] = len(ranges)
+        source_sql = checksum_sql('source', result['database'], result['name'], columns, pk_column)
+        target_sql = checksum_sql('target', self.target_database, result['name'], columns, pk_column)
+        pending = []
+        for lower, upper in ranges:
+            pending.append((lower, upper,
+                            self._query_one(executors, 'source', source_sql, (lower, upper)),
+                            self._query_one(executors, 'target', target_sql, (lower, upper))))
+
+        for lower, upper, source_future, target_future in pending:
+            source, target = source_future.result()[0], target_future.result()[0]
+            source_sum = (int(source['checksum1'] or 0), int(source['checksum2'] or 0))
+            target_sum = (int(target['checksum1'] or 0), int(target['checksum2'] or 0))
+            if int(source['row_count']) != int(target['row_count']) or source_sum != target_sum:
+                with self._lock:
+                    result['mismatchedRanges'].append({
+                        'column': pk_column,
+                        'lower': lower,
+                        'upper': upper,
+                        'sourceRows': int(source['row_count']),
+                        'targetRows': int(target['row_count'])
+                    })
+            with self._lock:
+                result['checkedChunks'] += 1
+
+    def _verify_buckets(self, result, executors, columns, buckets):
+        """没有整数主键的表按行的 MD5 分桶比较，每边只扫描一次表，不一致的桶记录在 mismatchedRanges 中"""
+        result['chunks'] = buckets
+        source = self._query_one(executors, 'source',
+                                 checksum_sql('source', result['database'], result['name'], columns, buckets=buckets))
+        target = self._query_one(executors, 'target',
+                                 checksum_sql('target', self.target_database, result['name'], columns, buckets=buckets))
+        source = {int(row['bucket']): row for row in source.result()}
+        target = {int(row['bucket']): row for row in target.result()}
+        empty = {'row_count': 0, 'checksum1': 0, 'checksum2': 0}
+        for bucket in range(buckets):
+            source_row, target_row = source.get(bucket, empty), target.get(bucket, empty)
+            source_sum = (int(source_row['row_count']), int(source_row['checksum1'] or 0), int(source_row['checksum2'] or 0))
+            target_sum = (int(target_row['row_count']), int(target_row['checksum1'] or 0), int(target_row['checksum2'] or 0))
+            with self._lock:
+                if source_sum != target_sum:
+                    result['mismatchedRanges'].append({
+                        'column': None,
+                        'bucket': bucket,
+                        'buckets': buckets,
+                        'sourceRows': source_sum[0],
+                        'targetRows': target_sum[0]
+                    })
+                result['checkedChunks'] += 1
+
+    def run(self):
+        """校验所有表，返回汇总结果"""
+        executors = {
+            'source': ThreadPoolExecutor(max_workers=self.parallelism, thread_name_prefix='verify-starrocks'),
+            'target': ThreadPoolExecutor(max_workers=self.parallelism, thread_name_prefix='verify-oceanbase')
+        }
+        try:
+            # 表级别的并发不超过每个数据库的查询并发，表内的数据块查询共享同一组线程
+            with ThreadPoolExecutor(max_workers=self.parallelism, thread_name_prefix='verify-table') as tables:
+                futures = [(result, tables.submit(self.verify_table, result, executors)) for result in self.results]
+                for result, future in futures:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        result['status'] = 'ERROR'
+                        result['error'] = str(e)
+        finally:
+            for executor in executors.values():
+                executor.shutdown(wait=False, cancel_futures=True)
+        return self.summary()
+
+    def snapshot(self):
+        """返回各表校验结果的副本"""
+        with self._lock:
+            return [dict(result, mismatchedRanges=list(result['mismatchedRanges'])) for result in self.results]
+
+    def summary(self):
+        statuses = [result['status'] for result in self.results]
+        return {
+            'tables': len(statuses),
+            'matched': statuses.count('MATCH'),
+            'mismatched': statuses.count('MISMATCH'),
+            'errors': statuses.count('ERROR'),
+            'pending': statuses.count('PENDING') + statuses.count('RUNNING')
+        }
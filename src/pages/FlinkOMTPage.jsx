@@ -57,7 +57,7 @@ function FlinkOMTPage() {
     starrocks: useRef(null),
     oceanbase: useRef(null)
   }
-  const pollIntervalRef = useRef(null) // 存储轮询 interval ID
+  const jobEventsRef = useRef(null) // 存储任务状态推送的 EventSource
   const startJobAbortControllerRef = useRef(null) // 存储启动任务的 AbortController，用于取消正在进行的启动请求
   const [connectionTestStatus, setConnectionTestStatus] = useState({ starrocks: null, oceanbase: null, flink: null })
   const [connectionTestLoading, setConnectionTestLoading] = useState({ starrocks: false, oceanbase: false, flink: false })
@@ -68,19 +68,36 @@ function FlinkOMTPage() {
       scanPort: '8030',
       username: 'root',
       password: '123456',
-      tables: 'test[1-2].orders[0-9]' // 迁移的表，格式可以是 db.table 或 db[1-2].table[1-2]
+      tables: 'test[1-2].orders[0-9]', // 迁移的表，格式可以是 db.table 或 db[1-2].table[1-2]
+      scanUrls: '', // 多个 FE 的 HTTP 地址，逗号分隔，不填时使用主机和 Scan 端口
+      scanBatchRows: '',
+      scanKeepAliveMin: '',
+      scanQueryTimeout: '',
+      scanMemLimit: '',
+      tabletsPerTask: ''
     },
     oceanbase: {
       host: '192.168.112.1',
       port: '9883',
       username: 'test@sun',
-      password: '123456'
+      password: '123456',
+      targetDatabase: 'test', // 同步到 OceanBase 的目标库，与连接使用的默认库无关
+      writeMode: 'jdbc', // jdbc 或 direct-load（旁路导入，适合首次全量同步）
+      bufferSize: '',
+      bufferFlushInterval: '',
+      maxRetries: '',
+      rpcPort: '',
+      directLoadParallel: '',
+      dupAction: 'REPLACE'
     },
     flinkOMT: {
       checkpointInterval: '60000',
-      parallelism: '1'
+      parallelism: '1',
+      priority: '5' // 0-9，集群 slot 不足时数字越大越先提交
     }
   })
+  const [queueInfo, setQueueInfo] = useState(null) // 等待 slot 时的队列位置和原因
+  const [resumeFrom, setResumeFrom] = useState('') // 从 savepoint 恢复：savepoint 路径或之前以 savepoint 方式停止的任务 ID
   const [showPassword, setShowPassword] = useState({
     starrocks: false,
     oceanbase: false
@@ -109,13 +126,10 @@ function FlinkOMTPage() {
     fetchDatabases('oceanbase')
   }, [])
 
-  // 组件卸载时清除轮询
+  // 组件卸载时关闭任务状态推送连接
   useEffect(() => {
     return () => {
-      if (pollIntervalRef.current) {
-        clearInterval(pollIntervalRef.current)
-        pollIntervalRef.current = null
-      }
+      closeJobEvents()
     }
   }, [])
 
@@ -140,6 +154,18 @@ function FlinkOMTPage() {
       alert('请填写完整的 OceanBase 配置')
       return false
     }
+    const scanFields = ['scanBatchRows', 'scanKeepAliveMin', 'scanQueryTimeout', 'scanMemLimit', 'tabletsPerTask']
+    const invalidScan = scanFields.find(field => starrocks[field] !== '' && !/^\d+$/.test(starrocks[field]))
+    if (invalidScan) {
+      alert(`StarRocks 读取参数 ${invalidScan} 必须是整数`)
+      return false
+    }
+    const numberFields = ['bufferSize', 'bufferFlushInterval', 'maxRetries', 'rpcPort', 'directLoadParallel']
+    const invalid = numberFields.find(field => oceanbase[field] !== '' && !/^\d+$/.test(oceanbase[field]))
+    if (invalid) {
+      alert(`OceanBase 写入参数 ${invalid} 必须是整数`)
+      return false
+    }
     return true
   }
 
@@ -161,7 +187,8 @@ function FlinkOMTPage() {
     setLogs([{ time: formatDateTime(), message: '正在启动 FlinkOMT 任务...' }])
 
     try {
-      const response = await axios.post('/api/start-job', config, {
+      const body = resumeFrom.trim() ? { ...config, resumeFrom: resumeFrom.trim() } : config
+      const response = await axios.post('/api/start-job', body, {
         signal: abortController.signal
       })
       
@@ -207,66 +234,78 @@ function FlinkOMTPage() {
     }
   }
 
-  const pollJobStatus = async (id) => {
-    // 如果已有轮询，先清除
-    if (pollIntervalRef.current) {
-      clearInterval(pollIntervalRef.current)
-      pollIntervalRef.current = null
+  // 关闭任务状态推送连接
+  const closeJobEvents = () => {
+    if (jobEventsRef.current) {
+      jobEventsRef.current.close()
+      jobEventsRef.current = null
     }
+  }
 
-    const interval = setInterval(async () => {
-      try {
-        const response = await axios.get(`/api/job-status/${id}`)
-        const jobStatus = response.data
-        
-        setLogs(prev => {
-          const newLogs = [...prev]
-          if (jobStatus.logs && jobStatus.logs.length > 0) {
-            jobStatus.logs.forEach(log => {
-              // 只根据 message 去重，避免重复添加相同的日志
-              // 检查最后几条日志中是否已有相同的消息，避免重复
-              const recentLogs = newLogs.slice(-10) // 只检查最近10条日志
-              if (!recentLogs.find(l => l.message === log)) {
-                newLogs.push({
-                  time: formatDateTime(jobStatus.lastUpdate),
-                  message: log
-                })
-              }
-            })
-          }
-          return newLogs.slice(-50) // 只保留最近50条日志
-        })
+  const pollJobStatus = (id) => {
+    // 如果已有推送连接，先关闭
+    closeJobEvents()
 
-        if (jobStatus.status === 'RUNNING') {
-          setStatus('running')
-        } else if (jobStatus.status === 'FINISHED') {
-          setStatus('success')
-          setStep(3)
-          clearInterval(interval)
-          pollIntervalRef.current = null
-        } else if (jobStatus.status === 'FAILED' || jobStatus.status === 'CANCELED') {
-          setStatus('error')
-          clearInterval(interval)
-          pollIntervalRef.current = null
+    // 后端只在状态变化或有新日志时推送事件，断线后浏览器会自动重连
+    const eventSource = new EventSource(`/api/job-events/${id}`)
+
+    eventSource.addEventListener('status', (event) => {
+      const jobStatus = JSON.parse(event.data)
+      setQueueInfo(jobStatus.status === 'QUEUED' && jobStatus.waitingReason
+        ? { position: jobStatus.queuePosition, reason: jobStatus.waitingReason }
+        : null)
+
+      setLogs(prev => {
+        const newLogs = [...prev]
+        if (jobStatus.logs && jobStatus.logs.length > 0) {
+          jobStatus.logs.forEach(entry => {
+            const log = {
+              seq: entry.seq,
+              time: formatDateTime(entry.time),
+              message: entry.count > 1 ? `${entry.message} (×${entry.count})` : entry.message,
+              baseMessage: entry.message
+            }
+            // 后端会把连续相同的日志（如心跳）合并为一条并分配新的序号，这里替换最后一条
+            const last = newLogs[newLogs.length - 1]
+            if (last && last.seq && last.baseMessage === entry.message) {
+              newLogs[newLogs.length - 1] = log
+            } else {
+              newLogs.push(log)
+            }
+          })
         }
-      } catch (error) {
-        console.error('获取任务状态失败:', error)
-      }
-    }, 2000) // 每2秒查询一次
+        return newLogs.slice(-50) // 只保留最近50条日志
+      })
 
-    // 保存 interval ID 到 ref
-    pollIntervalRef.current = interval
+      if (jobStatus.status === 'RUNNING') {
+        setStatus('running')
+      } else if (jobStatus.status === 'FINISHED') {
+        setStatus('success')
+        setStep(3)
+        closeJobEvents()
+      } else if (['FAILED', 'CANCELED', 'NO_JOB'].includes(jobStatus.status)) {
+        setStatus('error')
+        closeJobEvents()
+      }
+    })
 
-    // 10分钟后停止轮询
-    setTimeout(() => {
-      if (pollIntervalRef.current === interval) {
-        clearInterval(interval)
-        pollIntervalRef.current = null
+    // 任务结束或 Flink 中已找不到任务时服务端关闭流
+    eventSource.addEventListener('end', () => {
+      if (jobEventsRef.current === eventSource) {
+        closeJobEvents()
       }
-    }, 600000)
+    })
+
+    eventSource.onerror = (error) => {
+      console.error('获取任务状态失败:', error)
+    }
+
+    // 保存 EventSource 到 ref
+    jobEventsRef.current = eventSource
   }
 
-  const stopJob = async () => {
+  // savepoint 为 true 时先保存同步进度再停止，之后可以从该 savepoint 继续同步
+  const stopJob = async (savepoint = false) => {
     // 如果任务正在启动中（没有 jobId 但状态是 running），取消启动请求
     if (!jobId && status === 'running') {
       if (startJobAbortControllerRef.current) {
@@ -284,23 +323,48 @@ function FlinkOMTPage() {
       return
     }
 
-    // 清除轮询
-    if (pollIntervalRef.current) {
-      clearInterval(pollIntervalRef.current)
-      pollIntervalRef.current = null
-    }
+    // 关闭任务状态推送连接
+    closeJobEvents()
 
     try {
-      await axios.post(`/api/stop-job/${jobId}`)
+      await axios.post(`/api/stop-job/${jobId}`, { savepoint })
       setStatus('idle')
       setStep(1)
       setJobId(null)
-      setLogs([{ time: formatDateTime(), message: '任务已停止' }])
+      if (savepoint) {
+        // 填入任务 ID，savepoint 完成后直接点击启动即可继续同步
+        setResumeFrom(jobId)
+        setLogs([{ time: formatDateTime(), message: `已发送停止请求，正在创建 savepoint，完成后可从任务 ${jobId} 恢复` }])
+      } else {
+        setLogs([{ time: formatDateTime(), message: '已发送停止请求，任务正在后台取消' }])
+      }
     } catch (error) {
       alert(`停止任务失败: ${error.response?.data?.error || error.message}`)
     }
   }
 
+  // 任务失败后只重新同步未完成的表（按两边行数判断），作为原任务的子任务提交
+  const retryFailedTables = async () => {
+    if (!jobId) return
+    try {
+      const response = await axios.post(`/api/jobs/${jobId}/retry-failed-tables`)
+      const { tables, completedTables } = response.data
+      if (!response.data.jobId) {
+        setLogs(prev => [...prev, { time: formatDateTime(), message: `所有 ${completedTables} 张表均已同步完成，无需重新同步` }])
+        return
+      }
+      setLogs(prev => [...prev, {
+        time: formatDateTime(),
+        message: `已完成 ${completedTables} 张表，重新同步 ${tables.length} 张表: ${tables.map(t => t.table).join(', ')}`
+      }])
+      setJobId(response.data.jobId)
+      setStatus('running')
+      pollJobStatus(response.data.jobId)
+    } catch (error) {
+      alert(`重新同步失败: ${error.response?.data?.error || error.message}`)
+    }
+  }
+
   const reset = () => {
     // 取消正在进行的启动请求
     if (startJobAbortControllerRef.current) {
@@ -308,16 +372,14 @@ function FlinkOMTPage() {
       startJobAbortControllerRef.current = null
     }
 
-    // 清除轮询
-    if (pollIntervalRef.current) {
-      clearInterval(pollIntervalRef.current)
-      pollIntervalRef.current = null
-    }
+    // 关闭任务状态推送连接
+    closeJobEvents()
     
     setStep(1)
     setStatus('idle')
     setJobId(null)
     setLogs([])
+    setQueueInfo(null)
   }
 
   const testConnection = async (type) => {
@@ -364,6 +426,45 @@ function FlinkOMTPage() {
     }
   }
 
+  // 一次请求并发检测 Flink、StarRocks、OceanBase，后端会缓存几秒内的结果
+  const testAllConnections = async () => {
+    const types = ['flink', 'starrocks', 'oceanbase']
+    setConnectionTestLoading({ flink: true, starrocks: true, oceanbase: true })
+    setConnectionTestStatus({ flink: null, starrocks: null, oceanbase: null })
+
+    let results
+    try {
+      const response = await axios.post('/api/health/all', {
+        starrocks: config.starrocks,
+        oceanbase: config.oceanbase
+      })
+      results = response.data
+    } catch (error) {
+      // 有依赖不可用时返回 503，各依赖的结果仍在响应中
+      results = error.response?.data || {}
+      if (!error.response) {
+        types.forEach(type => {
+          results[type] = { connected: false, error: error.message }
+        })
+      }
+    }
+
+    types.forEach(type => {
+      const result = results[type]
+      if (result) {
+        setConnectionTestStatus(prev => ({
+          ...prev,
+          [type]: {
+            connected: result.connected,
+            message: result.message || result.error,
+            error: result.error
+          }
+        }))
+      }
+    })
+    setConnectionTestLoading({ flink: false, starrocks: false, oceanbase: false })
+  }
+
   const renderConnectionTestResult = (type) => {
     const status = connectionTestStatus[type]
     if (!status) return null
@@ -393,24 +494,18 @@ function FlinkOMTPage() {
     }
   }
 
-  const fetchDatabases = async (dbType) => {
+  // 数据库列表来自后端的元数据缓存，点击刷新时传 refresh 重新查询
+  const fetchDatabases = async (dbType, refresh = false) => {
     setDatabaseLoading(prev => ({ ...prev, [dbType]: true }))
     try {
-      const response = await axios.post('/api/execute-sql', {
+      const response = await axios.post('/api/metadata/databases', {
         dbType,
-        sql: 'SHOW DATABASES',
-        config: config[dbType]
+        config: config[dbType],
+        refresh
       })
 
-      if (response.data.success && response.data.rows) {
-        const dbList = response.data.rows.map(row => {
-          // 处理不同格式的返回结果
-          if (Array.isArray(row)) {
-            return row[0] || row['Database'] || row['database']
-          }
-          return row['Database'] || row['database'] || Object.values(row)[0]
-        }).filter(Boolean)
-        setDatabases(prev => ({ ...prev, [dbType]: dbList }))
+      if (response.data.databases) {
+        setDatabases(prev => ({ ...prev, [dbType]: response.data.databases.filter(Boolean) }))
       }
     } catch (error) {
       console.error(`获取 ${dbType} 数据库列表失败:`, error)
@@ -437,17 +532,64 @@ function FlinkOMTPage() {
         finalSql = `USE ${selectedDatabase[dbType]};\n${sql}`
       }
 
-      const response = await axios.post('/api/execute-sql', {
-        dbType,
-        sql: finalSql,
-        config: config[dbType]
+      // 使用流式模式，后端按 NDJSON 分块返回结果，收到第一块就开始渲染
+      const response = await fetch('/api/execute-sql', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+          dbType,
+          sql: finalSql,
+          config: config[dbType],
+          stream: true
+        })
       })
 
-      setQueryResults(prev => ({ ...prev, [dbType]: response.data }))
+      const contentType = response.headers.get('Content-Type') || ''
+      if (!contentType.includes('application/x-ndjson')) {
+        // 非查询语句或出错时后端返回普通 JSON
+        const data = await response.json()
+        if (!response.ok) {
+          throw new Error(data.error || `HTTP ${response.status}`)
+        }
+        setQueryResults(prev => ({ ...prev, [dbType]: data }))
+        return
+      }
+
+      const reader = response.body.getReader()
+      const decoder = new TextDecoder()
+      let buffer = ''
+      let result = { success: true, columns: [], rows: [], rowCount: 0, streaming: true }
+
+      const handleEvent = (event) => {
+        if (event.type === 'meta') {
+          result = { ...result, columns: event.columns }
+        } else if (event.type === 'rows') {
+          const rows = result.rows.concat(event.rows)
+          result = { ...result, rows, rowCount: rows.length }
+        } else if (event.type === 'end') {
+          result = { ...result, rowCount: event.rowCount, truncated: event.truncated, streaming: false }
+        } else if (event.type === 'error') {
+          result = { error: event.error }
+        }
+      }
+
+      while (true) {
+        const { done, value } = await reader.read()
+        if (done) break
+        buffer += decoder.decode(value, { stream: true })
+        const lines = buffer.split('\n')
+        buffer = lines.pop()
+        lines.filter(line => line.trim()).forEach(line => handleEvent(JSON.parse(line)))
+        setQueryResults(prev => ({ ...prev, [dbType]: result }))
+      }
+      if (buffer.trim()) {
+        handleEvent(JSON.parse(buffer))
+      }
+      setQueryResults(prev => ({ ...prev, [dbType]: { ...result, streaming: false } }))
     } catch (error) {
       setQueryResults(prev => ({
         ...prev,
-        [dbType]: { error: error.response?.data?.error || error.message }
+        [dbType]: { error: error.message }
       }))
     } finally {
       setQueryLoading(prev => ({ ...prev, [dbType]: false }))
@@ -472,7 +614,7 @@ function FlinkOMTPage() {
         <div className="mt-4 border rounded-lg overflow-hidden">
           <div className="bg-gray-50 px-4 py-2 border-b">
             <span className="text-sm font-medium text-gray-700">
-              查询结果 ({result.rowCount} 行)
+              查询结果 ({result.rowCount} 行{result.streaming ? '，加载中...' : ''}{result.truncated ? '，已达到行数上限' : ''})
             </span>
           </div>
           <div className="overflow-x-auto">
@@ -684,6 +826,68 @@ function FlinkOMTPage() {
                         placeholder="例如: db1.table1 或者 db[1-2].table[1-2]"
                       />
                     </div>
+                    <div>
+                      <label className="block text-sm font-medium text-gray-700 mb-1">FE HTTP 地址（可选）</label>
+                      <input
+                        type="text"
+                        value={config.starrocks.scanUrls}
+                        onChange={(e) => handleConfigChange('starrocks', 'scanUrls', e.target.value)}
+                        className="w-full px-3 py-2 border rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
+                        placeholder="多个 FE 用逗号分隔，例如: fe1:8030,fe2:8030；不填时使用主机和 Scan 端口"
+                      />
+                    </div>
+                    <div className="grid grid-cols-2 gap-3">
+                      <div>
+                        <label className="block text-sm font-medium text-gray-700 mb-1">每批读取行数</label>
+                        <input
+                          type="text"
+                          value={config.starrocks.scanBatchRows}
+                          onChange={(e) => handleConfigChange('starrocks', 'scanBatchRows', e.target.value)}
+                          placeholder="连接器默认值"
+                          className="w-full px-3 py-2 border rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
+                        />
+                      </div>
+                      <div>
+                        <label className="block text-sm font-medium text-gray-700 mb-1">每个读取任务的 tablet 数</label>
+                        <input
+                          type="text"
+                          value={config.starrocks.tabletsPerTask}
+                          onChange={(e) => handleConfigChange('starrocks', 'tabletsPerTask', e.target.value)}
+                          placeholder="连接器默认值"
+                          className="w-full px-3 py-2 border rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
+                        />
+                      </div>
+                      <div>
+                        <label className="block text-sm font-medium text-gray-700 mb-1">查询超时 (秒)</label>
+                        <input
+                          type="text"
+                          value={config.starrocks.scanQueryTimeout}
+                          onChange={(e) => handleConfigChange('starrocks', 'scanQueryTimeout', e.target.value)}
+                          placeholder="连接器默认值"
+                          className="w-full px-3 py-2 border rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
+                        />
+                      </div>
+                      <div>
+                        <label className="block text-sm font-medium text-gray-700 mb-1">扫描会话保活 (分钟)</label>
+                        <input
+                          type="text"
+                          value={config.starrocks.scanKeepAliveMin}
+                          onChange={(e) => handleConfigChange('starrocks', 'scanKeepAliveMin', e.target.value)}
+                          placeholder="连接器默认值"
+                          className="w-full px-3 py-2 border rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
+                        />
+                      </div>
+                      <div>
+                        <label className="block text-sm font-medium text-gray-700 mb-1">单个查询内存上限 (字节)</label>
+                        <input
+                          type="text"
+                          value={config.starrocks.scanMemLimit}
+                          onChange={(e) => handleConfigChange('starrocks', 'scanMemLimit', e.target.value)}
+                          placeholder="连接器默认值"
+                          className="w-full px-3 py-2 border rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
+                        />
+                      </div>
+                    </div>
                   </div>
                 </div>
 
@@ -758,6 +962,99 @@ function FlinkOMTPage() {
                         </button>
                       </div>
                     </div>
+                    <div className="grid grid-cols-2 gap-3">
+                      <div>
+                        <label className="block text-sm font-medium text-gray-700 mb-1">目标数据库</label>
+                        <input
+                          type="text"
+                          value={config.oceanbase.targetDatabase}
+                          onChange={(e) => handleConfigChange('oceanbase', 'targetDatabase', e.target.value)}
+                          className="w-full px-3 py-2 border rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
+                        />
+                      </div>
+                      <div>
+                        <label className="block text-sm font-medium text-gray-700 mb-1">写入方式</label>
+                        <select
+                          value={config.oceanbase.writeMode}
+                          onChange={(e) => handleConfigChange('oceanbase', 'writeMode', e.target.value)}
+                          className="w-full px-3 py-2 border rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
+                        >
+                          <option value="jdbc">JDBC 批量写入</option>
+                          <option value="direct-load">旁路导入（首次全量同步）</option>
+                        </select>
+                      </div>
+                      <div>
+                        <label className="block text-sm font-medium text-gray-700 mb-1">
+                          {config.oceanbase.writeMode === 'direct-load' ? '缓冲行数' : '批量大小（行）'}
+                        </label>
+                        <input
+                          type="text"
+                          value={config.oceanbase.bufferSize}
+                          onChange={(e) => handleConfigChange('oceanbase', 'bufferSize', e.target.value)}
+                          placeholder="连接器默认值"
+                          className="w-full px-3 py-2 border rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
+                        />
+                      </div>
+                      {config.oceanbase.writeMode === 'direct-load' ? (
+                        <>
+                          <div>
+                            <label className="block text-sm font-medium text-gray-700 mb-1">旁路导入并行度</label>
+                            <input
+                              type="text"
+                              value={config.oceanbase.directLoadParallel}
+                              onChange={(e) => handleConfigChange('oceanbase', 'directLoadParallel', e.target.value)}
+                              placeholder="连接器默认值"
+                              className="w-full px-3 py-2 border rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
+                            />
+                          </div>
+                          <div>
+                            <label className="block text-sm font-medium text-gray-700 mb-1">OBServer RPC 端口</label>
+                            <input
+                              type="text"
+                              value={config.oceanbase.rpcPort}
+                              onChange={(e) => handleConfigChange('oceanbase', 'rpcPort', e.target.value)}
+                              placeholder="2882"
+                              className="w-full px-3 py-2 border rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
+                            />
+                          </div>
+                          <div>
+                            <label className="block text-sm font-medium text-gray-700 mb-1">主键冲突时</label>
+                            <select
+                              value={config.oceanbase.dupAction}
+                              onChange={(e) => handleConfigChange('oceanbase', 'dupAction', e.target.value)}
+                              className="w-full px-3 py-2 border rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
+                            >
+                              <option value="REPLACE">覆盖（REPLACE）</option>
+                              <option value="IGNORE">忽略（IGNORE）</option>
+                              <option value="STOP_ON_DUP">报错停止（STOP_ON_DUP）</option>
+                            </select>
+                          </div>
+                        </>
+                      ) : (
+                        <>
+                          <div>
+                            <label className="block text-sm font-medium text-gray-700 mb-1">刷新间隔 (ms)</label>
+                            <input
+                              type="text"
+                              value={config.oceanbase.bufferFlushInterval}
+                              onChange={(e) => handleConfigChange('oceanbase', 'bufferFlushInterval', e.target.value)}
+                              placeholder="连接器默认值"
+                              className="w-full px-3 py-2 border rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
+                            />
+                          </div>
+                          <div>
+                            <label className="block text-sm font-medium text-gray-700 mb-1">写入失败重试次数</label>
+                            <input
+                              type="text"
+                              value={config.oceanbase.maxRetries}
+                              onChange={(e) => handleConfigChange('oceanbase', 'maxRetries', e.target.value)}
+                              placeholder="连接器默认值"
+                              className="w-full px-3 py-2 border rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
+                            />
+                          </div>
+                        </>
+                      )}
+                    </div>
                   </div>
                 </div>
               </div>
@@ -766,13 +1063,22 @@ function FlinkOMTPage() {
               <div className="border rounded-lg p-4 bg-gray-50">
                 <div className="flex items-center justify-between mb-4">
                   <h2 className="text-xl font-semibold text-gray-800">FlinkOMT 高级配置</h2>
-                  <button
-                    onClick={() => testConnection('flink')}
-                    disabled={connectionTestLoading.flink}
-                    className="px-3 py-1.5 text-sm bg-purple-600 text-white rounded-md hover:bg-purple-700 disabled:opacity-50 disabled:cursor-not-allowed transition-colors"
-                  >
-                    {connectionTestLoading.flink ? '测试中...' : '测试 Flink 集群'}
-                  </button>
+                  <div className="flex gap-2">
+                    <button
+                      onClick={testAllConnections}
+                      disabled={connectionTestLoading.flink || connectionTestLoading.starrocks || connectionTestLoading.oceanbase}
+                      className="px-3 py-1.5 text-sm bg-gray-600 text-white rounded-md hover:bg-gray-700 disabled:opacity-50 disabled:cursor-not-allowed transition-colors"
+                    >
+                      测试全部连接
+                    </button>
+                    <button
+                      onClick={() => testConnection('flink')}
+                      disabled={connectionTestLoading.flink}
+                      className="px-3 py-1.5 text-sm bg-purple-600 text-white rounded-md hover:bg-purple-700 disabled:opacity-50 disabled:cursor-not-allowed transition-colors"
+                    >
+                      {connectionTestLoading.flink ? '测试中...' : '测试 Flink 集群'}
+                    </button>
+                  </div>
                 </div>
                 {renderConnectionTestResult('flink')}
                 <div className="grid grid-cols-2 gap-4 mt-3">
@@ -791,6 +1097,27 @@ function FlinkOMTPage() {
                       type="text"
                       value={config.flinkOMT.parallelism}
                       onChange={(e) => handleConfigChange('flinkOMT', 'parallelism', e.target.value)}
+                      placeholder="数字，或 auto 根据数据量和空闲 slot 自动确定"
+                      className="w-full px-3 py-2 border rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
+                    />
+                  </div>
+                  <div>
+                    <label className="block text-sm font-medium text-gray-700 mb-1">优先级 (0-9)</label>
+                    <input
+                      type="text"
+                      value={config.flinkOMT.priority}
+                      onChange={(e) => handleConfigChange('flinkOMT', 'priority', e.target.value)}
+                      placeholder="集群 slot 不足时数字越大越先提交"
+                      className="w-full px-3 py-2 border rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
+                    />
+                  </div>
+                  <div>
+                    <label className="block text-sm font-medium text-gray-700 mb-1">从 savepoint 恢复（可选）</label>
+                    <input
+                      type="text"
+                      value={resumeFrom}
+                      onChange={(e) => setResumeFrom(e.target.value)}
+                      placeholder="savepoint 路径，或以 savepoint 方式停止的任务 ID"
                       className="w-full px-3 py-2 border rounded-md focus:outline-none focus:ring-2 focus:ring-blue-500"
                     />
                   </div>
@@ -818,7 +1145,7 @@ function FlinkOMTPage() {
                         StarRocks
                       </h3>
                       <button
-                        onClick={() => fetchDatabases('starrocks')}
+                        onClick={() => fetchDatabases('starrocks', true)}
                         disabled={databaseLoading.starrocks}
                         className="text-xs text-blue-600 hover:text-blue-800 disabled:opacity-50"
                         title="刷新数据库列表"
@@ -916,7 +1243,7 @@ function FlinkOMTPage() {
                         OceanBase
                       </h3>
                       <button
-                        onClick={() => fetchDatabases('oceanbase')}
+                        onClick={() => fetchDatabases('oceanbase', true)}
                         disabled={databaseLoading.oceanbase}
                         className="text-xs text-green-600 hover:text-green-800 disabled:opacity-50"
                         title="刷新数据库列表"
@@ -1023,6 +1350,12 @@ function FlinkOMTPage() {
                 )}
               </div>
 
+              {queueInfo && (
+                <div className="p-3 rounded-md bg-yellow-50 border border-yellow-200 text-sm text-yellow-800">
+                  排队中（第 {queueInfo.position} 位）：{queueInfo.reason}
+                </div>
+              )}
+
               {/* Logs */}
               <div className="bg-gray-900 rounded-lg p-4 h-96 overflow-y-auto">
                 <div className="text-green-400 font-mono text-sm space-y-1">
@@ -1038,9 +1371,24 @@ function FlinkOMTPage() {
                 </div>
               </div>
 
-              <div className="flex justify-center">
+              <div className="flex justify-center gap-4">
+                {status === 'error' && jobId && (
+                  <button
+                    onClick={retryFailedTables}
+                    className="px-6 py-2 bg-blue-600 text-white rounded-lg hover:bg-blue-700 transition-colors"
+                  >
+                    重新同步未完成的表
+                  </button>
+                )}
+                <button
+                  onClick={() => stopJob(true)}
+                  disabled={!jobId}
+                  className="px-6 py-2 bg-yellow-600 text-white rounded-lg hover:bg-yellow-700 disabled:opacity-50 disabled:cursor-not-allowed transition-colors"
+                >
+                  保存进度并停止
+                </button>
                 <button
-                  onClick={stopJob}
+                  onClick={() => stopJob()}
                   className="px-6 py-2 bg-red-600 text-white rounded-lg hover:bg-red-700 transition-colors"
                 >
                   停止任务